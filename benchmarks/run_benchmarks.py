@@ -0,0 +1,239 @@
+"""
+Offline benchmarks for the simulation, data processing and rendering hot paths.
+
+All benchmarks run against synthetic price and return data, so no network
+access is needed.
+
+Usage:
+    python benchmarks/run_benchmarks.py run [--output FILE] [--repeat N] [--quick]
+    python benchmarks/run_benchmarks.py compare BASELINE RESULTS [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from retirementTester.app import data
+from retirementTester.app.returns_store import get_returns_store
+from retirementTester.app.kernels import NUMBA_AVAILABLE
+from retirementTester.app.simulation import run_retirement_simulation, simulate_portfolios
+from retirementTester.app.strategies import get_withdrawal_strategy
+from retirementTester.app.result_cache import get_figure_cache
+from retirementTester.app.summary import PercentileSketch, SimulationSummary, PERCENTILES
+from retirementTester.app.utils import SimulationConfig, setup_simulation_params
+from retirementTester.app.visualization import ChartConfig, visualize_results, visualize_summary
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'results.json')
+SEED = 12345
+
+def synthetic_prices(n_years: int = 100, seed: int = SEED) -> Dict[str, pd.Series]:
+    """Daily geometric random-walk prices for every configured ticker."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2024-12-31', periods=n_years * 252)
+    return {
+        ticker: pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(dates)))), index=dates)
+        for ticker in SimulationConfig.ASSET_TICKERS.values()
+    }
+
+def synthetic_returns(n_years: int = 100, seed: int = SEED) -> pd.DataFrame:
+    """Annual returns for every configured ticker."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end='2024-12-31', periods=n_years, freq='YE')
+    return pd.DataFrame(
+        {ticker: rng.normal(0.06, 0.15, n_years) for ticker in SimulationConfig.ASSET_TICKERS.values()},
+        index=index
+    )
+
+def simulation_params(n_simulations: int, retirement_years: int, n_assets: int):
+    """Equal-weight simulation parameters over the first n_assets assets."""
+    names = list(SimulationConfig.ASSET_TICKERS)[:n_assets]
+    return setup_simulation_params(
+        initial_portfolio=1.5e6,
+        annual_withdrawal=60000,
+        retirement_years=retirement_years,
+        n_simulations=n_simulations,
+        assets={name: 1 / n_assets for name in names},
+        seed=SEED
+    )
+
+def build_benchmarks(quick: bool) -> List[Tuple[str, Callable[[], object]]]:
+    """Create the (name, callable) pairs to time."""
+    get_returns_store().publish(synthetic_returns())
+    benchmarks = []
+
+    sizes = [(1000, 30, 2), (10000, 30, 4)] if quick else [(1000, 30, 2), (10000, 30, 4), (100000, 40, 4)]
+    for n_simulations, retirement_years, n_assets in sizes:
+        params = simulation_params(n_simulations, retirement_years, n_assets)
+        benchmarks.append((
+            f"simulation[{n_simulations}x{retirement_years}x{n_assets}]",
+            lambda params=params: run_retirement_simulation(params)
+        ))
+
+    # Dynamic strategies should stay within a small factor of the fixed-withdrawal run above
+    params = simulation_params(10000, 30, 2)
+    glide_path = dict(zip(params.assets, (0.2, 0.8)))
+    for label, strategy_params in [
+        ('guardrails', replace(params, withdrawal_strategy=SimulationConfig.WITHDRAWAL_GUARDRAILS)),
+        ('percent_of_portfolio', replace(params, withdrawal_strategy=SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO)),
+        ('glide_path', replace(params, glide_path=glide_path)),
+    ]:
+        benchmarks.append((
+            f"simulation[10000x30x2 {label}]",
+            lambda strategy_params=strategy_params: run_retirement_simulation(strategy_params)
+        ))
+
+    # The withdrawal recurrence alone, on monthly steps, for each available kernel
+    monthly = replace(params, periods_per_year=12, withdrawal_strategy=SimulationConfig.WITHDRAWAL_GUARDRAILS)
+    portfolio_returns = np.random.default_rng(SEED).normal(0.005, 0.04, (10000, monthly.n_periods))
+    kernels = [SimulationConfig.KERNEL_NUMPY] + ([SimulationConfig.KERNEL_NUMBA] if NUMBA_AVAILABLE else [])
+    for kernel in kernels:
+        benchmarks.append((
+            f"recurrence[10000x360 guardrails {kernel}]",
+            lambda kernel=kernel: simulate_portfolios(
+                portfolio_returns, monthly.initial_portfolio, monthly.period_withdrawal, keep_history=False,
+                strategy=get_withdrawal_strategy(monthly), kernel=kernel
+            )
+        ))
+
+    prices = synthetic_prices()
+    ticker = next(iter(prices))
+    benchmarks.append(("annual_returns[100y]", lambda: data.compute_annual_returns(prices[ticker])))
+    benchmarks.append((
+        "period_returns[100y YE+QE+ME]",
+        lambda: data.compute_period_returns(prices[ticker], ('YE', 'QE', 'ME'))
+    ))
+
+    # Keep benchmark caches away from the user's market data cache
+    cache_dir = tempfile.mkdtemp(prefix='retirement-bench-')
+    data.MarketDataConfig.CACHE_DIR = cache_dir
+
+    def fetch_cold():
+        data.MarketDataConfig.CACHE_DIR = tempfile.mkdtemp(dir=cache_dir)
+        data.fetch_historical_data.cache_clear()
+        return data.fetch_historical_data(tuple(prices), '1900-01-01', '2025-01-01')
+
+    def fetch_warm():
+        data.fetch_historical_data.cache_clear()
+        return data.fetch_historical_data(tuple(prices), '1900-01-01', '2025-01-01')
+
+    data.set_price_source(data.FixturePriceSource(prices))
+    benchmarks.append(("fetch_historical_data[cold]", fetch_cold))
+    benchmarks.append(("fetch_historical_data[warm]", fetch_warm))
+
+    results_df, depletion_prob, best_case, worst_case = run_retirement_simulation(simulation_params(10000, 30, 2))
+    benchmarks.append(("percentiles[pandas 10000x30]", lambda: results_df.quantile(list(PERCENTILES), axis=0)))
+
+    def sketch_percentiles():
+        sketch = PercentileSketch(results_df.shape[1], 1.5e6)
+        sketch.update(results_df.to_numpy())
+        return sketch.quantiles(PERCENTILES)
+
+    benchmarks.append(("percentiles[sketch 10000x30]", sketch_percentiles))
+
+    params = simulation_params(10000, 30, 2)
+
+    def render():
+        get_figure_cache().clear()
+        visualize_results(results_df, depletion_prob, params, best_case, worst_case)
+        plt.close('all')
+
+    benchmarks.append(("visualize_results[10000x30]", render))
+
+    summary = SimulationSummary.from_results(results_df, depletion_prob, best_case, worst_case)
+    benchmarks.append(("visualize_summary[cached]", lambda: visualize_summary(summary, params, ChartConfig.BACKEND_STATIC)))
+    return benchmarks
+
+def time_benchmark(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Time a callable after one warm-up call."""
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'repeat': repeat}
+
+def run(args: argparse.Namespace) -> int:
+    results = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+        },
+        'benchmarks': {},
+    }
+
+    for name, function in build_benchmarks(args.quick):
+        timing = time_benchmark(function, args.repeat)
+        results['benchmarks'][name] = timing
+        print(f"{name:40s} median {timing['median'] * 1000:10.2f} ms   min {timing['min'] * 1000:10.2f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)['benchmarks']
+    with open(args.results) as f:
+        results = json.load(f)['benchmarks']
+
+    regressions = 0
+    for name, timing in results.items():
+        if name not in baseline:
+            print(f"{name:40s} new")
+            continue
+        ratio = timing['median'] / baseline[name]['median']
+        if ratio > 1 + args.threshold:
+            status = 'REGRESSION'
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        print(f"{name:40s} {ratio:6.2f}x  {status}")
+
+    if regressions:
+        print(f"{regressions} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON file to write results to')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per benchmark')
+    run_parser.add_argument('--quick', action='store_true', help='Skip the largest simulation size')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare results against a baseline')
+    compare_parser.add_argument('baseline', help='Baseline results JSON')
+    compare_parser.add_argument('results', help='New results JSON')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='Relative slowdown that counts as a regression')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import logging
+import os
+import threading
+import numpy as np
+from flask import Flask, jsonify, request
+from .result_cache import (
+    cached_simulation_summary, run_cached_adaptive_simulation, get_result_cache, params_key
+)
+from .returns_store import get_returns_store
+from .summary import SimulationSummary, PERCENTILE_LABELS
+from .utils import SimulationConfig, SimulationParams, params_from_dict
+
+logger = logging.getLogger(__name__)
+
+class ApiConfig:
+    """Configuration for the HTTP simulation API."""
+    MAX_WORKERS: int = int(os.environ.get('RETIREMENT_TESTER_API_WORKERS', os.cpu_count() or 4))
+    MAX_PENDING: int = 256
+    MAX_SIMULATIONS: int = 1_000_000
+    MAX_BATCH_SCENARIOS: int = 1_000
+    REQUEST_TIMEOUT: float = 120.0
+    DECIMALS: int = 2
+
+class OverloadedError(RuntimeError):
+    """Raised when the worker pool has no room for another computation."""
+
+class CoalescingExecutor:
+    """
+    Bounded thread pool that runs each distinct computation once.
+
+    Requests with the same key that arrive while an earlier one is still
+    running share its future instead of recomputing. Workers are threads, so
+    every request shares the process-wide returns store and result caches.
+    """
+
+    def __init__(self, max_workers: int = ApiConfig.MAX_WORKERS, max_pending: int = ApiConfig.MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api-worker')
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, key: str, function: Callable[[], Any]) -> Future:
+        """
+        Run function on the pool, or join the identical computation already in flight.
+
+        Raises:
+            OverloadedError: If max_pending distinct computations are already queued or running.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self._in_flight) >= self.max_pending:
+                raise OverloadedError("Too many simulations in progress, retry later")
+            future = self._executor.submit(function)
+            self._in_flight[key] = future
+            self.submitted += 1
+        future.add_done_callback(lambda done: self._release(key, done))
+        return future
+
+    def _release(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """In-flight, submitted and coalesced computation counts."""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'in_flight': len(self._in_flight),
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and cancel queued computations."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def _rounded(values: Any) -> List[float]:
+    return np.round(np.asarray(values, dtype=np.float64), ApiConfig.DECIMALS).tolist()
+
+def summary_payload(summary: SimulationSummary, include_bands: bool) -> Dict[str, Any]:
+    """
+    Compact JSON-ready view of a summary.
+
+    Args:
+        summary: Simulation summary to serialize.
+        include_bands: Add the per-year percentile bands and best/worst paths.
+
+    Returns:
+        Dictionary with the depletion probability and final-year figures, never the path matrix.
+    """
+    final = summary.percentiles.iloc[-1]
+    payload = {
+        'n_paths': summary.n_paths,
+        'depletion_prob': round(float(summary.depletion_prob), 6),
+        'final': dict(zip(PERCENTILE_LABELS, _rounded([final[label] for label in PERCENTILE_LABELS]))),
+        'best_final': round(float(summary.best_simulation[-1]), ApiConfig.DECIMALS),
+        'worst_final': round(float(summary.worst_simulation[-1]), ApiConfig.DECIMALS),
+    }
+    if summary.confidence is not None:
+        payload['precision'] = {
+            'confidence': summary.confidence,
+            'depletion_half_width': round(float(summary.depletion_half_width), 6),
+            'median_half_width': round(float(summary.median_half_width), ApiConfig.DECIMALS),
+            'converged': summary.converged,
+        }
+    if include_bands:
+        payload['percentiles'] = {label: _rounded(summary.percentiles[label]) for label in PERCENTILE_LABELS}
+        payload['best_path'] = _rounded(summary.best_simulation)
+        payload['worst_path'] = _rounded(summary.worst_simulation)
+    return payload
+
+def parse_request(spec: Any) -> Tuple[SimulationParams, Optional[float], str]:
+    """
+    Validate a simulation request body.
+
+    Besides the fields accepted by params_from_dict, a request may set
+    tolerance (and metric) to run adaptively until that precision is reached.
+
+    Returns:
+        Tuple of (params, tolerance or None, convergence metric).
+
+    Raises:
+        ValueError: If the request is malformed or exceeds the API limits.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("Request body must be a JSON object")
+    try:
+        params = params_from_dict(spec)
+    except KeyError as e:
+        raise ValueError(f"Missing or unknown field: {e}")
+    except TypeError as e:
+        raise ValueError(f"Invalid request: {e}")
+    if not 0 < params.n_simulations <= ApiConfig.MAX_SIMULATIONS:
+        raise ValueError(f"n_simulations must be between 1 and {ApiConfig.MAX_SIMULATIONS}")
+    tolerance = float(spec['tolerance']) if spec.get('tolerance') is not None else None
+    metric = spec.get('metric', SimulationConfig.ADAPTIVE_METRIC_DEPLETION)
+    return params, tolerance, metric
+
+def compute_summary(params: SimulationParams, tolerance: Optional[float], metric: str) -> SimulationSummary:
+    """Run (or fetch from the result cache) the summary for a parsed request."""
+    if tolerance is not None:
+        return run_cached_adaptive_simulation(params, tolerance, metric)
+    return cached_simulation_summary(params)
+
+def submit_summary(
+    executor: CoalescingExecutor,
+    params: SimulationParams,
+    tolerance: Optional[float],
+    metric: str
+) -> Future:
+    """Queue a summary computation, merging it with an identical one already in flight."""
+    version = get_returns_store(params.periods_per_year).version
+    key = params_key(params, version, kind=f"api:{metric}:{tolerance!r}")
+    return executor.submit(key, lambda: compute_summary(params, tolerance, metric))
+
+def scenario_error(error: Exception) -> str:
+    """Message for a failed batch scenario; unexpected errors are logged with their traceback."""
+    if isinstance(error, FutureTimeoutError):
+        return "Simulation did not finish in time"
+    if not isinstance(error, (ValueError, OverloadedError)):
+        logger.exception(f"Batch scenario failed: {error}")
+        return f"Simulation failed: {error}"
+    return str(error)
+
+def create_app(executor: Optional[CoalescingExecutor] = None) -> Flask:
+    """
+    Create the Flask application serving the simulation API.
+
+    Endpoints:
+        POST /api/simulate: summary with per-year percentile bands and best/worst paths.
+        POST /api/summary: depletion probability and final-year figures only.
+        POST /api/batch: summaries for {"scenarios": [...]}, one record per scenario.
+        GET /api/health: data and worker pool status.
+
+    Args:
+        executor: Worker pool to run simulations on. Defaults to a new
+            CoalescingExecutor sized by ApiConfig.
+    """
+    app = Flask(__name__)
+    app.json.compact = True
+    try:
+        from flask_cors import CORS
+
+        CORS(app)
+    except ImportError:
+        logger.info("flask_cors not installed; CORS headers disabled")
+
+    executor = executor or CoalescingExecutor()
+    app.extensions['simulation_executor'] = executor
+    get_returns_store().load_in_background()
+
+    @app.errorhandler(ValueError)
+    def bad_request(error: ValueError):
+        return jsonify(error=str(error)), 400
+
+    @app.errorhandler(OverloadedError)
+    def overloaded(error: OverloadedError):
+        return jsonify(error=str(error)), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(FutureTimeoutError)
+    def timed_out(error: FutureTimeoutError):
+        return jsonify(error="Simulation did not finish in time; retry to collect the result"), 504
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify(error="Internal server error"), 500
+
+    def run(include_bands: bool):
+        params, tolerance, metric = parse_request(request.get_json(silent=True))
+        summary = submit_summary(executor, params, tolerance, metric).result(timeout=ApiConfig.REQUEST_TIMEOUT)
+        return jsonify(summary_payload(summary, include_bands))
+
+    @app.post('/api/simulate')
+    def simulate():
+        return run(include_bands=True)
+
+    @app.post('/api/summary')
+    def summary():
+        return run(include_bands=False)
+
+    @app.post('/api/batch')
+    def batch():
+        body = request.get_json(silent=True)
+        scenarios = body.get('scenarios') if isinstance(body, dict) else None
+        if not isinstance(scenarios, list):
+            raise ValueError("Request body must be a JSON object with a 'scenarios' list")
+        if len(scenarios) > ApiConfig.MAX_BATCH_SCENARIOS:
+            raise ValueError(f"At most {ApiConfig.MAX_BATCH_SCENARIOS} scenarios per batch")
+
+        # Queue every scenario first so they run concurrently, then collect in order. A failing
+        # scenario (invalid, rejected by a full pool, timed out or crashed) only fails its own record.
+        pending = []
+        for i, scenario in enumerate(scenarios):
+            scenario_id = str(scenario.get('id', i)) if isinstance(scenario, dict) else str(i)
+            try:
+                pending.append((scenario_id, submit_summary(executor, *parse_request(scenario)), None))
+            except Exception as e:
+                pending.append((scenario_id, None, scenario_error(e)))
+
+        records = []
+        for scenario_id, future, error in pending:
+            if future is not None:
+                try:
+                    payload = summary_payload(future.result(timeout=ApiConfig.REQUEST_TIMEOUT), False)
+                    records.append({'id': scenario_id, 'status': 'ok', **payload})
+                    continue
+                except Exception as e:
+                    error = scenario_error(e)
+            records.append({'id': scenario_id, 'status': 'failed', 'error': error})
+        return jsonify(results=records)
+
+    @app.get('/api/health')
+    def health():
+        store = get_returns_store()
+        return jsonify(
+            data_loaded=store.is_loaded,
+            data_version=store.version,
+            data_error=store.load_error,
+            workers=executor.stats(),
+            cache=get_result_cache().stats(),
+        )
+
+    return app
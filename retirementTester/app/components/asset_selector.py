@@ -1,13 +1,25 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
+import io
+from functools import lru_cache
+from typing import Tuple
 from retirementTester.app.utils import SimulationConfig
+from retirementTester.app.visualization import chart_style
 
 __all__ = ['asset_allocation_selector']
 
 def create_allocation_pie_chart(allocations: dict):
-    """Create a pie chart using matplotlib."""
-    fig, ax = plt.subplots(figsize=(6, 6))
+    """
+    Create a pie chart using matplotlib.
+
+    The figure is not attached to pyplot, so it needs no closing. Build and
+    save it inside chart_style(None), which keeps other sessions' chart styles out.
+    """
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 6))
+    ax = fig.subplots()
     values = [v * 100 for v in allocations.values()]
     labels = list(allocations.keys())
     
@@ -17,16 +29,26 @@ def create_allocation_pie_chart(allocations: dict):
             labels=labels,
             autopct='%1.1f%%',
             textprops={'size': 'smaller'},
-            colors=plt.cm.Pastel1(np.linspace(0, 1, len(labels)))
+            colors=matplotlib.colormaps['Pastel1'](np.linspace(0, 1, len(labels)))
         )
-        plt.setp(autotexts, size=8, weight="bold")
-        plt.setp(texts, size=8)
+        for text in autotexts:
+            text.set(size=8, weight="bold")
+        for text in texts:
+            text.set(size=8)
     else:
         ax.text(0.5, 0.5, 'No allocations yet', ha='center', va='center')
     
     ax.set_title("Portfolio Allocation", pad=20)
     return fig
 
+@lru_cache(maxsize=128)
+def allocation_pie_png(allocations: Tuple[Tuple[str, float], ...]) -> bytes:
+    """PNG of the allocation pie chart, rendered once per distinct allocation."""
+    buffer = io.BytesIO()
+    with chart_style(None):
+        create_allocation_pie_chart(dict(allocations)).savefig(buffer, format='png')
+    return buffer.getvalue()
+
 def asset_allocation_selector():
     """Component for selecting and allocating assets."""
     st.subheader("Asset Allocation")
@@ -87,10 +109,8 @@ def asset_allocation_selector():
                     st.rerun()
     
     with col2:
-        # Show pie chart
-        fig = create_allocation_pie_chart(new_allocations)
-        st.pyplot(fig)
-        plt.close(fig)
+        # Show pie chart; widget reruns with an unchanged allocation reuse the image
+        st.image(allocation_pie_png(tuple(new_allocations.items())), width='stretch')
 
     # Validation
     if total_allocation > 100:
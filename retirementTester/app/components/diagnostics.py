@@ -0,0 +1,33 @@
+import streamlit as st
+import pandas as pd
+from dataclasses import asdict
+from retirementTester.app.profiling import (
+    ProfilingConfig, enable_timing, disable_timing, get_stage_timings,
+    clear_stage_timings, export_stage_timings
+)
+
+def diagnostics_panel():
+    """Sidebar panel showing stage timings and profiling controls."""
+    with st.sidebar.expander("Diagnostics", expanded=False):
+        enabled = st.checkbox("Record stage timings", value=ProfilingConfig.ENABLED)
+        track_memory = st.checkbox("Track peak memory", value=ProfilingConfig.TRACK_MEMORY, disabled=not enabled)
+        if enabled and (not ProfilingConfig.ENABLED or track_memory != ProfilingConfig.TRACK_MEMORY):
+            enable_timing(track_memory)
+        elif not enabled and ProfilingConfig.ENABLED:
+            disable_timing()
+
+        st.checkbox("Profile simulation runs (cProfile, logged)", key="profile_runs")
+
+        timings = get_stage_timings()
+        if timings:
+            table = pd.DataFrame([asdict(record) for record in timings[-20:]])
+            table['wall_time'] = (table['wall_time'] * 1000).round(1)
+            table = table.rename(columns={'wall_time': 'ms'})[['stage', 'ms', 'peak_memory']]
+            st.dataframe(table, hide_index=True)
+            st.download_button("Export JSON", export_stage_timings(), file_name="stage_timings.json",
+                               mime="application/json")
+            if st.button("Clear timings"):
+                clear_stage_timings()
+                st.rerun()
+        else:
+            st.caption("No stage timings recorded.")
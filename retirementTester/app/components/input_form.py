@@ -1,20 +1,155 @@
 import streamlit as st
-from retirementTester.app.simulation import run_retirement_simulation
-from retirementTester.app.utils import setup_simulation_params
+import time
+from dataclasses import replace
+from retirementTester.app.simulation import find_max_withdrawal, run_allocation_sweep
+from retirementTester.app.result_cache import (
+    run_cached_adaptive_simulation, cached_simulation_summary, store_session_result, derived_seed
+)
+from retirementTester.app.jobs import submit_simulation, submit_adaptive_simulation
+from retirementTester.app.kernels import NUMBA_AVAILABLE
+from retirementTester.app.strategies import WITHDRAWAL_STRATEGIES
+from retirementTester.app.utils import setup_simulation_params, SimulationConfig
 from retirementTester.app.components.asset_selector import asset_allocation_selector
+from retirementTester.app.components.job_status import track_job
 from retirementTester.app.data_fetcher import get_data_start_date
+from retirementTester.app.returns_store import get_returns_store
+from retirementTester.app.visualization import visualize_allocation_sweep
+from retirementTester.app.profiling import profile_run
 
 def simulation_form():
-    initial_portfolio = st.number_input("Initial Portfolio ($)", value=1.5e6)
-    annual_withdrawal = st.number_input("Annual Withdrawal ($)", value=30000)
-    retirement_years = st.number_input("Retirement Duration (years)", value=30)
-    n_simulations = 1000  # Set number of simulations to 1000 internally
+    initial_portfolio = st.number_input("Initial Portfolio ($)", min_value=SimulationConfig.MIN_PORTFOLIO,
+                                        max_value=SimulationConfig.MAX_PORTFOLIO, value=1.5e6)
+    annual_withdrawal = st.number_input("Annual Withdrawal ($)", min_value=SimulationConfig.MIN_WITHDRAWAL,
+                                        max_value=SimulationConfig.MAX_WITHDRAWAL, value=30000.0)
+    retirement_years = st.number_input("Retirement Duration (years)", min_value=SimulationConfig.MIN_YEARS,
+                                       max_value=SimulationConfig.MAX_YEARS, value=30)
+    sampling_label = st.radio("Sampling", list(SimulationConfig.SAMPLING_MODES.keys()), horizontal=True)
+    sampling = SimulationConfig.SAMPLING_MODES[sampling_label]
+    time_step = st.selectbox("Time step", list(SimulationConfig.TIME_STEPS.keys()), index=0,
+                             help="Monthly steps spread the annual withdrawal over twelve payments")
+    periods_per_year = SimulationConfig.TIME_STEPS[time_step]
+    if not get_returns_store(periods_per_year).is_loaded:
+        st.info("Historical data is still loading; simulations start as soon as it is ready.")
+    if sampling == SimulationConfig.SAMPLING_HISTORICAL:
+        return_model = SimulationConfig.RETURN_MODEL_HISTORICAL
+    else:
+        return_model_label = st.selectbox("Return model", list(SimulationConfig.RETURN_MODELS.keys()), index=0,
+                                          help="Bootstrap and parametric models allow retirements longer than the history")
+        return_model = SimulationConfig.RETURN_MODELS[return_model_label]
+
+    # Only offer the variance reduction techniques that apply to the chosen model
+    variance_modes = {'None': SimulationConfig.VARIANCE_REDUCTION_NONE}
+    if sampling == SimulationConfig.SAMPLING_RANDOM and return_model == SimulationConfig.RETURN_MODEL_HISTORICAL:
+        variance_modes['Stratified start years'] = SimulationConfig.VARIANCE_REDUCTION_STRATIFIED
+    if return_model in (SimulationConfig.RETURN_MODEL_NORMAL, SimulationConfig.RETURN_MODEL_STUDENT_T):
+        variance_modes['Antithetic paths'] = SimulationConfig.VARIANCE_REDUCTION_ANTITHETIC
+    variance_reduction = variance_modes[st.selectbox("Variance reduction", list(variance_modes.keys()), index=0)]
+
+    strategy_label = st.selectbox("Withdrawal strategy", list(SimulationConfig.WITHDRAWAL_STRATEGIES.keys()), index=0,
+                                  help="The annual withdrawal above is the first year's amount")
+    withdrawal_strategy = SimulationConfig.WITHDRAWAL_STRATEGIES[strategy_label]
+    inflation_rate = SimulationConfig.INFLATION_RATE
+    if withdrawal_strategy in (SimulationConfig.WITHDRAWAL_INFLATION_INDEXED, SimulationConfig.WITHDRAWAL_GUARDRAILS):
+        inflation_rate = st.number_input("Inflation (% per year)", min_value=0.0, max_value=20.0,
+                                         value=SimulationConfig.INFLATION_RATE * 100, step=0.1) / 100
+
+    kernel = SimulationConfig.DEFAULT_KERNEL
+    if NUMBA_AVAILABLE:
+        kernels = list(SimulationConfig.KERNELS.values())
+        kernel_label = st.selectbox("Compute kernel", list(SimulationConfig.KERNELS.keys()),
+                                    index=kernels.index(kernel) if kernel in kernels else 0,
+                                    help="Same results as NumPy (checked when first used); faster on monthly steps")
+        kernel = SimulationConfig.KERNELS[kernel_label]
+
+    adaptive = sampling == SimulationConfig.SAMPLING_RANDOM and st.toggle(
+        "Run until precise", help="Add paths in batches until the confidence interval is tighter than the tolerance"
+    )
+    if adaptive:
+        metric_label = st.selectbox("Converge on", ["Depletion risk", "Median final value"], index=0)
+        if metric_label == "Depletion risk":
+            metric = SimulationConfig.ADAPTIVE_METRIC_DEPLETION
+            tolerance = st.number_input("Precision (± percentage points)", min_value=0.05, max_value=10.0,
+                                        value=SimulationConfig.ADAPTIVE_DEPLETION_TOLERANCE * 100, step=0.05) / 100
+        else:
+            metric = SimulationConfig.ADAPTIVE_METRIC_MEDIAN
+            tolerance = st.number_input("Precision (± % of initial portfolio)", min_value=0.1, max_value=20.0,
+                                        value=SimulationConfig.ADAPTIVE_MEDIAN_TOLERANCE * 100, step=0.1) / 100
+        n_simulations = SimulationConfig.ADAPTIVE_BATCH_SIZE
+    else:
+        n_simulations = int(st.number_input("Number of simulations", min_value=SimulationConfig.MIN_SIMS,
+                                            max_value=SimulationConfig.MAX_SIMS, value=1000, step=100))
 
     assets = asset_allocation_selector()
 
+    glide_path = None
+    if assets is not None and st.toggle("Glide path", help="Move the allocation linearly, year by year, "
+                                                          "to a target allocation in the final year"):
+        columns = st.columns(len(assets))
+        glide_path = {
+            name: column.number_input(f"{name} in final year (%)", min_value=0.0, max_value=100.0,
+                                      value=allocation * 100, step=5.0) / 100
+            for column, (name, allocation) in zip(columns, assets.items())
+        }
+        if abs(sum(glide_path.values()) - 1.0) > 1e-6:
+            st.error("Final-year allocations must sum to 100%")
+            assets = None
+
+    if (withdrawal_strategy == SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO
+            and annual_withdrawal >= max(initial_portfolio, 1.0)):
+        st.error("Percent-of-portfolio withdrawals must be less than the initial portfolio")
+        assets = None
+
     if assets is not None and st.button("Run Simulation"):
-        params = setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_years, n_simulations, assets)
-        results, depletion_risk, best_case, worst_case = run_retirement_simulation(params)
-        st.session_state["params"] = params
-        st.session_state["results"] = (results, depletion_risk, best_case, worst_case)
-        st.success("Simulation Complete! Go to the 'Results' tab.")
+        params = setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_years, n_simulations, assets,
+                                         sampling=sampling, periods_per_year=periods_per_year,
+                                         return_model=return_model, variance_reduction=variance_reduction,
+                                         withdrawal_strategy=withdrawal_strategy, inflation_rate=inflation_rate, kernel=kernel,
+                                         glide_path=glide_path)
+        # A seed derived from the inputs lets full paths be re-simulated on demand and keeps repeat runs cached
+        params = replace(params, seed=derived_seed(params))
+        if st.session_state.get("profile_runs"):
+            # cProfile only sees the calling thread, so profiled runs execute in the foreground
+            with profile_run():
+                if adaptive:
+                    summary = run_cached_adaptive_simulation(params, tolerance, metric)
+                    # Later what-if runs sample as many paths as the adaptive run needed, up to one block, since
+                    # they keep a dense paths x periods matrix
+                    what_if_paths = min(summary.n_paths, SimulationConfig.SIMULATION_CHUNK_SIZE)
+                    st.session_state["params"] = replace(params, n_simulations=what_if_paths)
+                else:
+                    summary = cached_simulation_summary(params)
+                    st.session_state["params"] = params
+                st.session_state["result_id"] = store_session_result(summary)
+                st.session_state["summary_created"] = time.time()
+            st.success("Simulation Complete! Go to the 'Results' tab.")
+        else:
+            # Runs in the background; progress and cancellation are in the sidebar
+            track_job(submit_adaptive_simulation(params, tolerance, metric) if adaptive else submit_simulation(params))
+            st.rerun()
+
+    # Withdrawing a share of the portfolio never depletes it, so there is nothing to solve for
+    if assets is not None and WITHDRAWAL_STRATEGIES[withdrawal_strategy].can_deplete:
+        st.subheader("Maximum Safe Withdrawal")
+        target_success = st.number_input("Target Success Rate (%)", min_value=0.0, max_value=100.0, value=95.0, step=1.0)
+        if st.button("Find Max Withdrawal"):
+            params = setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_years, n_simulations, assets,
+                                             sampling=sampling, periods_per_year=periods_per_year,
+                                             return_model=return_model, variance_reduction=variance_reduction,
+                                             withdrawal_strategy=withdrawal_strategy, inflation_rate=inflation_rate, kernel=kernel,
+                                             glide_path=glide_path)
+            max_withdrawal = find_max_withdrawal(params, 1 - target_success / 100)
+            st.success(f"Maximum withdrawal for a {target_success:.0f}% success rate: ${max_withdrawal:,.0f}/yr")
+
+    with st.expander("Allocation Sweep"):
+        sweep_assets = st.multiselect("Assets to sweep", list(SimulationConfig.ASSET_TICKERS.keys()),
+                                      default=st.session_state.get("selected_assets"))
+        step = st.selectbox("Allocation step (%)", [5, 10, 20, 25], index=0)
+        if sweep_assets and st.button("Run Sweep"):
+            params = setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_years, n_simulations,
+                                             {sweep_assets[0]: 1.0}, sampling=sampling,
+                                             periods_per_year=periods_per_year, return_model=return_model,
+                                             variance_reduction=variance_reduction,
+                                             withdrawal_strategy=withdrawal_strategy, inflation_rate=inflation_rate, kernel=kernel)
+            sweep = run_allocation_sweep(params, sweep_assets, step / 100)
+            st.dataframe(sweep.sort_values(['Depletion Risk', 'Median'], ascending=[True, False]).head(20))
+            visualize_allocation_sweep(sweep, sweep_assets)
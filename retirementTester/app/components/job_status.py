@@ -0,0 +1,64 @@
+import streamlit as st
+from retirementTester.app.jobs import Job, get_job_manager
+from retirementTester.app.result_cache import store_session_result
+
+JOB_POLL_INTERVAL = "1s"
+
+def track_job(job_id: str) -> None:
+    """Follow a submitted job from this session; its result replaces the current one when it finishes."""
+    st.session_state.setdefault("jobs", []).append(job_id)
+
+def running_jobs() -> list:
+    """This session's unfinished jobs, oldest first."""
+    manager = get_job_manager()
+    jobs = [manager.get(job_id) for job_id in st.session_state.get("jobs", [])]
+    return [job for job in jobs if job is not None and not job.is_finished]
+
+def collect_finished_jobs() -> None:
+    """
+    Move results of this session's finished jobs into the session result store.
+
+    The newest completed job wins, so overlapping runs never overwrite a later
+    result with an earlier one. Failures and cancellations are reported once.
+    """
+    manager = get_job_manager()
+    pending = []
+    for job_id in st.session_state.get("jobs", []):
+        job = manager.get(job_id)
+        if job is None:
+            continue
+        if not job.is_finished:
+            job.touch()
+            pending.append(job_id)
+        elif job.status == Job.DONE:
+            if job.created >= st.session_state.get("summary_created", 0.0):
+                st.session_state["params"] = job.params
+                st.session_state["result_id"] = store_session_result(job.result)
+                st.session_state["summary_created"] = job.created
+            st.toast(f"{job.description} complete. Go to the 'Results' tab.")
+        elif job.status == Job.FAILED:
+            st.toast(f"{job.description} failed: {job.error}")
+        else:
+            st.toast(f"{job.description} cancelled.")
+    st.session_state["jobs"] = pending
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _poll_jobs():
+    """Show progress of this session's running jobs and rerun the page once they all finish."""
+    jobs = running_jobs()
+    for job in jobs:
+        job.touch()
+        label = "queued" if job.status == Job.QUEUED else f"{job.completed_paths:,} paths simulated"
+        st.progress(job.progress, text=f"{job.description}: {label}")
+        if st.button("Cancel", key=f"cancel_{job.id}"):
+            job.cancel()
+    if len(jobs) < len(st.session_state.get("jobs", [])):
+        st.rerun()
+
+def job_status_panel():
+    """Sidebar panel with progress bars and cancel buttons for this session's running simulations."""
+    collect_finished_jobs()
+    if running_jobs():
+        with st.sidebar:
+            st.subheader("Running simulations")
+            _poll_jobs()
@@ -1,21 +1,49 @@
 import streamlit as st
-from retirementTester.app.visualization import visualize_results
+from retirementTester.app.result_cache import get_session_result, run_cached_simulation
+from retirementTester.app.visualization import visualize_summary, ChartConfig
+from retirementTester.app.components.what_if import what_if_panel
+from retirementTester.app.components.job_status import running_jobs
 
 def show_results():
-    if "results" in st.session_state:
-        results, depletion_risk, best_case, worst_case = st.session_state["results"]
-
-        # Calculate median using regular indexing since best_case and worst_case are lists
-        median_case = results.quantile(0.5, axis=0)
-        
-        st.write(f"**Depletion Risk:** {depletion_risk:.2%}")
-        st.write(f"**Best Case Scenario (Final Value):** ${best_case[-1]:,.2f}")
-        st.write(f"**Median Case Scenario (Final Value):** ${median_case.iloc[-1]:,.2f}")  # Using iloc for pandas Series
-        st.write(f"**Worst Case Scenario (Final Value):** ${worst_case[-1]:,.2f}")
-        
+    if running_jobs():
+        st.info("A simulation is running; its results appear here when it finishes. Progress is shown in the sidebar.")
+    summary = get_session_result(st.session_state.get("result_id"))
+    if summary is not None:
         params = st.session_state.get("params")
-        visualize_results(results, depletion_risk, params, best_case, worst_case)
-    else:
-        st.warning("No results to display. Please run a simulation first.")
 
+        # Everything below reads the precomputed bands, so reruns never touch the full path matrix
+        if summary.depletion_half_width is not None:
+            st.write(f"**Depletion Risk:** {summary.depletion_prob:.2%} "
+                     f"(± {summary.depletion_half_width:.2%} at {summary.confidence:.0%} confidence)")
+        else:
+            st.write(f"**Depletion Risk:** {summary.depletion_prob:.2%}")
+        st.write(f"**Best Case Scenario (Final Value):** ${summary.best_simulation[-1]:,.2f}")
+        if summary.median_half_width is not None:
+            st.write(f"**Median Case Scenario (Final Value):** ${summary.median_final_value:,.2f} "
+                     f"(± ${summary.median_half_width:,.0f})")
+        else:
+            st.write(f"**Median Case Scenario (Final Value):** ${summary.median_final_value:,.2f}")
+        st.write(f"**Worst Case Scenario (Final Value):** ${summary.worst_simulation[-1]:,.2f}")
+        if summary.converged is not None:
+            if summary.converged:
+                st.caption(f"Converged after {summary.n_paths:,} paths.")
+            else:
+                st.caption(f"Stopped at the limit of {summary.n_paths:,} paths before reaching the requested precision.")
+
+        backends = list(ChartConfig.BACKENDS.values())
+        backend = st.radio("Chart", list(ChartConfig.BACKENDS.keys()), horizontal=True,
+                           index=backends.index(ChartConfig.DEFAULT_BACKEND) if ChartConfig.DEFAULT_BACKEND in backends else 0)
+        visualize_summary(summary, params, ChartConfig.BACKENDS[backend])
 
+        # Full paths are never stored; they are re-simulated from the pinned seed when downloaded
+        if params is not None and params.seed is not None and summary.converged is None:
+            st.download_button("Download all paths (CSV)", lambda: run_cached_simulation(params)[0].to_csv(),
+                               file_name="simulation_paths.csv", mime="text/csv")
+
+        if params is not None:
+            what_if_panel(params)
+    elif "result_id" in st.session_state:
+        st.warning("These results were cleared from server memory after a period of inactivity. "
+                   "Please run the simulation again.")
+    elif not running_jobs():
+        st.warning("No results to display. Please run a simulation first.")
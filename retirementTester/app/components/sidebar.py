@@ -1,19 +1,29 @@
 import streamlit as st
-from retirementTester.app.data_fetcher import get_data_start_date
+from retirementTester.app.data_fetcher import get_data_status
+from retirementTester.app.returns_store import get_returns_store
+
+STATUS_POLL_INTERVAL = "1s"
 
 def is_data_fetched():
     return 'data_fetched' in st.session_state and st.session_state.data_fetched
 
+@st.fragment(run_every=STATUS_POLL_INTERVAL)
+def _poll_data_status():
+    """Refresh the data caption until the background load finishes, then rerun the page once."""
+    store = get_returns_store()
+    st.caption(f"📊 {get_data_status()}")
+    if store.is_loaded:
+        st.session_state.data_fetched = True
+        st.rerun()
+
 def sidebar():
     st.sidebar.title("Navigation")
     
     # Show data availability info
-    start_year_placeholder = st.sidebar.empty()
-    
-    if 'data_fetched' in st.session_state and st.session_state.data_fetched:
-        start_year = get_data_start_date()
-        start_year_placeholder.caption(f"📊 Historical data from: {start_year}")
-    else:
-        start_year_placeholder.caption("📊 Historical data: Loading...")
+    with st.sidebar:
+        if not get_returns_store().is_loading:
+            st.caption(f"📊 {get_data_status()}")
+        else:
+            _poll_data_status()
     
     return st.sidebar.radio("", ["Home", "Run Simulation", "Results"])
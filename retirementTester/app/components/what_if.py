@@ -0,0 +1,45 @@
+import streamlit as st
+from dataclasses import replace
+from retirementTester.app.result_cache import cached_portfolio_returns
+from retirementTester.app.simulation import simulate_what_if
+from retirementTester.app.strategies import get_withdrawal_strategy
+from retirementTester.app.utils import SimulationParams, SimulationConfig
+
+# A fragment reruns on its own, so moving a slider doesn't redraw the rest of the page
+@st.fragment
+def what_if_panel(params: SimulationParams):
+    """Sliders that re-evaluate the last simulation for a different portfolio size or withdrawal."""
+    st.subheader("What If?")
+    st.caption("Reuses the sampled market history of the last run; only the withdrawal math is recomputed.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        initial_portfolio = st.slider(
+            "Initial Portfolio ($)",
+            min_value=0.0,
+            max_value=float(min(max(params.initial_portfolio * 3, 1e5), SimulationConfig.MAX_PORTFOLIO)),
+            value=float(params.initial_portfolio),
+            step=10000.0
+        )
+    with col2:
+        annual_withdrawal = st.slider(
+            "Annual Withdrawal ($)",
+            min_value=0.0,
+            max_value=float(min(max(params.annual_withdrawal * 3, 1e4), SimulationConfig.MAX_WITHDRAWAL)),
+            value=float(params.annual_withdrawal),
+            step=1000.0
+        )
+
+    try:
+        what_if_params = replace(params, initial_portfolio=initial_portfolio, annual_withdrawal=annual_withdrawal)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    portfolio_returns = cached_portfolio_returns(params)
+    strategy = get_withdrawal_strategy(what_if_params)
+    summary = simulate_what_if(portfolio_returns, initial_portfolio, annual_withdrawal, params.periods_per_year,
+                               strategy, params.kernel)
+
+    st.write(f"**Depletion Risk:** {summary.depletion_prob:.2%}")
+    st.write(f"**Median Case Scenario (Final Value):** ${summary.median_final_value:,.2f}")
+    st.line_chart(summary.percentiles)
@@ -1,10 +1,17 @@
-from typing import List, Optional, Dict
-import yfinance as yf
+from typing import List, Optional, Dict, Sequence
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
 import pandas as pd
 from functools import lru_cache
 import logging
+import os
+import re
+import tempfile
+import time
 from datetime import datetime
 import numpy as np
+from .profiling import timed
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +22,93 @@ class MarketDataConfig:
     MIN_YEARS_DATA: int = 30
     CACHE_SIZE: int = 32
     DATE_FORMAT: str = '%Y-%m-%d'
+    CACHE_DIR: str = os.environ.get(
+        'RETIREMENT_TESTER_CACHE_DIR',
+        os.path.join(os.path.expanduser('~'), '.cache', 'retirementTester')
+    )
+    OFFLINE: bool = os.environ.get('RETIREMENT_TESTER_OFFLINE', '').lower() in ('1', 'true', 'yes')
+    REFRESH_INTERVAL_HOURS: float = 12.0
+    # Loaded returns are written to a memory-mapped segment that other processes attach to instead of fetching
+    SHARE_RETURNS: bool = os.environ.get('RETIREMENT_TESTER_SHARE_RETURNS', '1').lower() not in ('0', 'false', 'no')
+    SHARED_RETURNS_DIR: str = os.environ.get('RETIREMENT_TESTER_SHARED_RETURNS_DIR', os.path.join(CACHE_DIR, 'shared'))
+    MAX_WORKERS: int = 8
+    DOWNLOAD_TIMEOUT: float = 30.0
+    DOWNLOAD_RETRIES: int = 2
+    RETRY_BACKOFF: float = 1.0
+
+@dataclass
+class CachedPrices:
+    """Daily closes and derived annual returns stored on disk for one ticker."""
+    closes: pd.Series
+    annual_returns: pd.Series
+    fetched_from: str
+    fetched_at: float
+
+class PriceSource(ABC):
+    """Interface for a provider of daily price data."""
+
+    @abstractmethod
+    def fetch_prices(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Fetch daily prices for one ticker.
+
+        Args:
+            ticker: Ticker symbol
+            start_date: Start date in YYYY-MM-DD format (inclusive)
+            end_date: End date in YYYY-MM-DD format (exclusive)
+
+        Returns:
+            DataFrame indexed by date with an 'Adj Close' and/or 'Close' column,
+            empty if no data is available.
+        """
+
+class YahooPriceSource(PriceSource):
+    """Price source backed by Yahoo Finance."""
+
+    def fetch_prices(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        # Ticker.history keeps no shared module state, so it is safe to call from worker threads
+        # Imported on first use: yfinance is slow to import and not needed when serving from cache
+        import yfinance as yf
+
+        return yf.Ticker(ticker).history(
+            start=start_date, end=end_date, auto_adjust=False,
+            timeout=MarketDataConfig.DOWNLOAD_TIMEOUT
+        )
+
+class FixturePriceSource(PriceSource):
+    """Price source serving fixed price series, for tests and benchmarks."""
+
+    def __init__(self, prices: Dict[str, pd.Series]):
+        self.prices = prices
+
+    @classmethod
+    def from_directory(cls, path: str) -> 'FixturePriceSource':
+        """Load one '<ticker>.csv' file per ticker with a date index and a close price column."""
+        prices = {}
+        for filename in os.listdir(path):
+            if filename.endswith('.csv'):
+                frame = pd.read_csv(os.path.join(path, filename), index_col=0, parse_dates=True)
+                prices[filename[:-len('.csv')]] = frame.iloc[:, -1]
+        return cls(prices)
+
+    def fetch_prices(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        series = self.prices.get(ticker, self.prices.get(_safe_filename(ticker)))
+        if series is None:
+            return pd.DataFrame()
+        series = series[(series.index >= start_date) & (series.index < end_date)]
+        return pd.DataFrame({'Adj Close': series})
+
+_price_source: PriceSource = YahooPriceSource()
+
+def get_price_source() -> PriceSource:
+    """Return the price source used for downloads."""
+    return _price_source
+
+def set_price_source(source: PriceSource) -> None:
+    """Replace the price source used for downloads and drop memoized results."""
+    global _price_source
+    _price_source = source
+    fetch_historical_data.cache_clear()
 
 def validate_dates(start_date: str, end_date: str) -> tuple[str, str]:
     """
@@ -42,22 +136,225 @@ def validate_dates(start_date: str, end_date: str) -> tuple[str, str]:
         logger.error(f"Date validation failed: {e}")
         raise ValueError(f"Invalid date format. Use {MarketDataConfig.DATE_FORMAT}")
 
+def _safe_filename(ticker: str) -> str:
+    """Ticker symbol with characters unsafe for file names replaced."""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+
+def _cache_path(ticker: str) -> str:
+    """Path of the on-disk cache file for a ticker."""
+    return os.path.join(MarketDataConfig.CACHE_DIR, f"{_safe_filename(ticker)}.npz")
+
+def _to_naive_index(index: pd.Index) -> pd.DatetimeIndex:
+    """Normalize an index to timezone-naive timestamps."""
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+def load_cached_prices(ticker: str) -> Optional[CachedPrices]:
+    """
+    Load a ticker's cached daily closes and annual returns from disk.
+
+    Returns:
+        CachedPrices, or None if the ticker is not cached or the file is unreadable.
+    """
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as stored:
+            closes = pd.Series(stored['closes'], index=pd.to_datetime(stored['dates']), name=ticker)
+            annual_returns = pd.Series(
+                stored['annual_returns'], index=pd.to_datetime(stored['annual_dates']), name=ticker
+            )
+            return CachedPrices(closes, annual_returns, str(stored['fetched_from']), float(stored['fetched_at']))
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache for {ticker}: {e}")
+        return None
+
+def save_cached_prices(ticker: str, cached: CachedPrices) -> None:
+    """
+    Write a ticker's daily closes and annual returns to the disk cache.
+
+    The file is written to a temporary name and moved into place so concurrent
+    readers never see a partial file.
+    """
+    try:
+        os.makedirs(MarketDataConfig.CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=MarketDataConfig.CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(
+                f,
+                dates=cached.closes.index.values.astype('datetime64[ns]'),
+                closes=cached.closes.to_numpy(dtype=np.float64),
+                annual_dates=cached.annual_returns.index.values.astype('datetime64[ns]'),
+                annual_returns=cached.annual_returns.to_numpy(dtype=np.float64),
+                fetched_from=cached.fetched_from,
+                fetched_at=cached.fetched_at,
+            )
+        os.replace(tmp_path, _cache_path(ticker))
+    except OSError as e:
+        logger.warning(f"Failed to write cache for {ticker}: {e}")
+
+def download_close_prices(ticker: str, start_date: str, end_date: str) -> Optional[pd.Series]:
+    """
+    Download daily close prices for one ticker from the configured price source.
+
+    Failed requests are retried up to DOWNLOAD_RETRIES times with backoff.
+
+    Returns:
+        Series of close prices, or None if no usable prices were returned.
+
+    Raises:
+        Exception: The last download error if every attempt failed.
+    """
+    for attempt in range(MarketDataConfig.DOWNLOAD_RETRIES + 1):
+        try:
+            data = get_price_source().fetch_prices(ticker, start_date, end_date)
+            break
+        except Exception as e:
+            if attempt == MarketDataConfig.DOWNLOAD_RETRIES:
+                raise
+            logger.warning(f"Download of {ticker} failed (attempt {attempt + 1}): {e}")
+            time.sleep(MarketDataConfig.RETRY_BACKOFF * 2 ** attempt)
+
+    if data.empty:
+        return None
+
+    # Check for 'Adj Close' and fall back to 'Close' if necessary
+    if 'Adj Close' in data:
+        close_prices = data['Adj Close']
+    elif 'Close' in data:
+        close_prices = data['Close']
+        logger.warning(f"'Adj Close' prices not found for {ticker}, using 'Close' prices instead")
+    else:
+        available_cols = data.keys() if isinstance(data, pd.DataFrame) else "No columns"
+        logger.warning(f"Neither 'Adj Close' nor 'Close' prices found for {ticker}. Available columns: {available_cols}")
+        return None
+
+    # Recent yfinance versions return one column per ticker even for single downloads
+    if isinstance(close_prices, pd.DataFrame):
+        close_prices = close_prices.iloc[:, 0]
+
+    close_prices = close_prices.dropna()
+    close_prices.index = _to_naive_index(close_prices.index)
+    close_prices.name = ticker
+    return close_prices
+
+def compute_period_returns(
+    close_prices: pd.Series,
+    frequencies: Sequence[str] = ('YE',)
+) -> Dict[str, pd.Series]:
+    """
+    Convert daily close prices into compounded returns per calendar period.
+
+    Daily log returns are computed once and summed per period with a vectorized
+    resample, which equals compounding the daily simple returns.
+
+    Args:
+        close_prices: Daily close prices indexed by date
+        frequencies: Pandas period aliases, e.g. 'YE', 'QE', 'ME'
+
+    Returns:
+        Dictionary mapping each frequency to its Series of period returns.
+    """
+    log_returns = np.log(close_prices.astype(np.float64)).diff().dropna()
+    period_returns = {}
+    for frequency in frequencies:
+        returns = np.expm1(log_returns.resample(frequency).sum())
+        returns.name = close_prices.name
+        period_returns[frequency] = returns
+    return period_returns
+
+def compute_annual_returns(close_prices: pd.Series) -> pd.Series:
+    """Convert daily close prices into calendar-year returns."""
+    return compute_period_returns(close_prices, ('YE',))['YE']
+
+def load_period_returns(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    offline: bool = MarketDataConfig.OFFLINE,
+    frequency: str = 'YE'
+) -> Optional[pd.Series]:
+    """
+    Get a ticker's period returns from the disk cache, downloading only what is missing.
+
+    A cached ticker is refreshed incrementally: only dates after the last stored
+    close are downloaded, at most once per REFRESH_INTERVAL_HOURS. In offline
+    mode the cache is served as-is and nothing is downloaded.
+
+    Args:
+        ticker: Ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        offline: Serve only from the disk cache
+        frequency: Pandas period alias of the returns, 'YE' for annual
+
+    Returns:
+        Series of period returns, or None if no data is available.
+    """
+    cached = load_cached_prices(ticker)
+    if cached is not None and (cached.fetched_from <= start_date or offline):
+        closes = cached.closes
+        stale = time.time() - cached.fetched_at > MarketDataConfig.REFRESH_INTERVAL_HOURS * 3600
+        last_date = closes.index[-1].strftime(MarketDataConfig.DATE_FORMAT)
+
+        if not offline and stale and last_date < end_date:
+            next_date = (closes.index[-1] + pd.Timedelta(days=1)).strftime(MarketDataConfig.DATE_FORMAT)
+            try:
+                new_closes = download_close_prices(ticker, next_date, end_date)
+                if new_closes is not None:
+                    closes = pd.concat([closes, new_closes[new_closes.index > closes.index[-1]]])
+                    logger.info(f"Appended {len(closes) - len(cached.closes)} new closes for {ticker}")
+                cached = CachedPrices(closes, compute_annual_returns(closes), cached.fetched_from, time.time())
+                save_cached_prices(ticker, cached)
+            except Exception as e:
+                logger.warning(f"Refresh of {ticker} failed, serving cached data: {e}")
+    elif offline:
+        logger.warning(f"No cached data for {ticker} in offline mode")
+        return None
+    else:
+        closes = download_close_prices(ticker, start_date, end_date)
+        if closes is None:
+            logger.warning(f"No data retrieved for ticker: {ticker}")
+            return None
+        cached = CachedPrices(closes, compute_annual_returns(closes), start_date, time.time())
+        save_cached_prices(ticker, cached)
+
+    closes = cached.closes
+    covers_range = closes.index[0] >= pd.Timestamp(start_date) and closes.index[-1] < pd.Timestamp(end_date)
+    if covers_range and frequency == 'YE':
+        # The stored annual returns already cover exactly the requested range
+        return cached.annual_returns
+    if not covers_range:
+        closes = closes[(closes.index >= start_date) & (closes.index < end_date)]
+    return compute_period_returns(closes, (frequency,))[frequency]
+
 @lru_cache(maxsize=MarketDataConfig.CACHE_SIZE)
+@timed('fetch_historical_data')
 def fetch_historical_data(
     tickers: tuple[str, ...],
     start_date: str = MarketDataConfig.DEFAULT_START_DATE,
-    end_date: str = MarketDataConfig.DEFAULT_END_DATE
+    end_date: str = MarketDataConfig.DEFAULT_END_DATE,
+    offline: bool = MarketDataConfig.OFFLINE,
+    frequency: str = 'YE'
 ) -> pd.DataFrame:
     """
-    Fetch and process historical market data using yfinance.
+    Fetch and process historical market data from the configured price source.
+
+    Prices are read from the on-disk cache when available and only the missing
+    recent dates are downloaded. Tickers are fetched concurrently; a ticker that
+    fails or exceeds its timeout is logged and skipped.
     
     Args:
         tickers: Tuple of ticker symbols (immutable for caching)
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
+        offline: Serve only from the disk cache without network access
+        frequency: Pandas period alias of the returns: 'YE', 'QE' or 'ME'
     
     Returns:
-        DataFrame with annual returns for each ticker
+        DataFrame with period (by default annual) returns for each ticker
         
     Raises:
         RuntimeError: If data fetch fails or processing errors occur
@@ -73,38 +370,36 @@ def fetch_historical_data(
             raise ValueError("No tickers provided")
         start_date, end_date = validate_dates(start_date, end_date)
         
-        for ticker in tickers:
+        # Fetch all tickers concurrently, each with its own timeout covering retries
+        ticker_timeout = (MarketDataConfig.DOWNLOAD_TIMEOUT + MarketDataConfig.RETRY_BACKOFF) * (
+            MarketDataConfig.DOWNLOAD_RETRIES + 1
+        )
+        executor = ThreadPoolExecutor(max_workers=min(MarketDataConfig.MAX_WORKERS, len(tickers)))
+        futures = {
+            ticker: executor.submit(load_period_returns, ticker, start_date, end_date, offline, frequency)
+            for ticker in tickers
+        }
+
+        for ticker, future in futures.items():
             try:
-                # Fetch data for each ticker individually
-                data = yf.download(ticker, start=start_date, end=end_date, progress=False)
-                if data.empty:
-                    logger.warning(f"No data retrieved for ticker: {ticker}")
+                period_returns = future.result(timeout=ticker_timeout)
+                if period_returns is None:
                     continue
                 
-                # Check for 'Adj Close' and fall back to 'Close' if necessary
-                if 'Adj Close' in data:
-                    close_prices = data['Adj Close']
-                elif 'Close' in data:
-                    close_prices = data['Close']
-                    logger.warning(f"'Adj Close' prices not found for {ticker}, using 'Close' prices instead")
-                else:
-                    available_cols = data.keys() if isinstance(data, pd.DataFrame) else "No columns"
-                    logger.warning(f"Neither 'Adj Close' nor 'Close' prices found for {ticker}. Available columns: {available_cols}")
-                    continue
-
-                # Process data
-                daily_returns = close_prices.pct_change(fill_method=None).dropna()
-                annual_returns = daily_returns.resample('YE').apply(lambda x: (1 + x).prod() - 1)
-                
-                if annual_returns.empty:
-                    logger.warning(f"No annual returns calculated for ticker: {ticker}")
+                if period_returns.empty:
+                    logger.warning(f"No returns calculated for ticker: {ticker}")
                     continue
                 
-                annual_returns.name = ticker
-                all_data.append(annual_returns)
+                period_returns.name = ticker
+                all_data.append(period_returns)
             
+            except FutureTimeoutError:
+                logger.warning(f"Timed out fetching {ticker}")
             except Exception as e:
                 logger.warning(f"Failed to fetch {ticker}: {str(e)}")
+
+        # Don't wait for timed-out downloads; they finish in the background
+        executor.shutdown(wait=False)
         
         if not all_data:
             raise RuntimeError("No data retrieved for any ticker")
@@ -117,7 +412,7 @@ def fetch_historical_data(
             logger.warning("NaN values present in combined annual returns")
             
         # Ensure minimum years of data
-        if len(combined_data) < MarketDataConfig.MIN_YEARS_DATA:
+        if combined_data.index[-1].year - combined_data.index[0].year + 1 < MarketDataConfig.MIN_YEARS_DATA:
             logger.warning(f"Less than {MarketDataConfig.MIN_YEARS_DATA} years of data available")
             
         logger.info(f"Successfully processed data for {len(tickers)} tickers")
@@ -1,49 +1,44 @@
 import streamlit as st
 import pandas as pd
 import logging
-from .data import fetch_historical_data
+from .returns_store import get_returns_store
 from .utils import SimulationConfig
 
 logger = logging.getLogger(__name__)
 
 def get_data_start_date() -> str:
     """Get the earliest available date from the fetched data."""
-    if 'all_asset_data' in st.session_state:
-        data = st.session_state.all_asset_data
-        if isinstance(data, pd.DataFrame) and not data.empty:
-            logger.debug(f"Data start date: {data.index[0].year}")
-            return str(data.index[0].year)
+    store = get_returns_store()
+    if store.is_loaded and len(store.index) > 0:
+        logger.debug(f"Data start date: {store.index[0].year}")
+        return str(store.index[0].year)
     logger.debug("Data not available")
     return "Not available"
 
 def initialize_all_assets():
-    """Silently initialize data for all possible assets when the app starts."""
-    if 'all_asset_data' not in st.session_state:
-        logger.info("Initializing all asset data")
-        # Get all unique tickers
-        tickers = tuple(SimulationConfig.ASSET_TICKERS.values())
-        
-        try:
-            # Fetch all data at once and store the DataFrame directly
-            data = fetch_historical_data(tickers)
-            if isinstance(data, pd.DataFrame) and not data.empty:
-                st.session_state.all_asset_data = data
-                st.session_state.data_fetched = True
-                logger.info("Successfully fetched all asset data")
-            else:
-                logger.error("Failed to fetch data: empty result")
-                st.session_state.all_asset_data = pd.DataFrame()
-                st.session_state.data_fetched = False
-        except Exception as e:
-            logger.error(f"Failed to fetch initial data: {e}")
-            st.session_state.all_asset_data = pd.DataFrame()
-            st.session_state.data_fetched = False
-    else:
-        logger.info("All asset data already initialized")
-        st.session_state.data_fetched = True
+    """
+    Start loading data for all possible assets without blocking the page.
+
+    The load runs once in a background thread shared by every session;
+    st.session_state.data_fetched reflects whether it has finished.
+    """
+    store = get_returns_store()
+    if not store.is_loaded:
+        if not store.is_loading:
+            logger.info("Initializing all asset data in the background")
+        # Fetch all data once into the process-wide store shared by every session
+        store.load_in_background(tuple(SimulationConfig.ASSET_TICKERS.values()))
+    st.session_state.data_fetched = store.is_loaded
+
+def get_data_status() -> str:
+    """Short description of the shared data load for status captions."""
+    store = get_returns_store()
+    if store.is_loaded:
+        return f"Historical data from: {get_data_start_date()}"
+    if store.load_error is not None and not store.is_loading:
+        return "Historical data: unavailable"
+    return "Historical data: Loading..."
 
 def get_asset_data(tickers: tuple[str, ...]) -> pd.DataFrame:
-    """Get asset data from session state or fetch if needed."""
-    if 'all_asset_data' not in st.session_state:
-        initialize_all_assets()
-    return st.session_state.all_asset_data
+    """Get annual returns for the requested tickers from the shared store."""
+    return get_returns_store().frame(tickers)
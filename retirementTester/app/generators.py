@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Type
+import numpy as np
+from .utils import SimulationConfig
+
+class ReturnGenerator(ABC):
+    """
+    Produces asset return paths from a historical (periods x assets) returns matrix.
+
+    Generators draw every path of a batch at once and return a
+    (paths x periods x assets) array, so there are no per-path Python loops.
+    The historical return model has no generator: its contiguous windows are
+    chosen by start period in simulation.iter_start_blocks, which also covers
+    stratified and all-windows sampling.
+    """
+
+    @abstractmethod
+    def generate(self, returns: np.ndarray, n_paths: int, n_periods: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Generate asset return paths.
+
+        Args:
+            returns: Historical returns of shape (periods, assets) without missing values.
+            n_paths: Number of paths to generate.
+            n_periods: Number of periods per path.
+            rng: Random generator to draw from.
+
+        Returns:
+            Array of shape (n_paths, n_periods, assets).
+
+        Raises:
+            ValueError: If the history is too short for the model.
+        """
+
+class StationaryBootstrapGenerator(ReturnGenerator):
+    """
+    Stationary bootstrap (Politis and Romano): blocks of random, geometrically
+    distributed length starting at random periods, wrapping around the history.
+
+    Resampling whole rows keeps the cross-asset correlation of each period,
+    and blocks keep short-term serial dependence. Paths may be longer than the history.
+    """
+
+    def __init__(self, mean_block_length: float):
+        if mean_block_length < 1:
+            raise ValueError("Mean block length must be at least one period")
+        self.mean_block_length = mean_block_length
+
+    def generate(self, returns: np.ndarray, n_paths: int, n_periods: int, rng: np.random.Generator) -> np.ndarray:
+        n_rows = len(returns)
+        if n_rows == 0:
+            raise ValueError("Insufficient historical data for simulation period")
+        periods = np.arange(n_periods)
+        new_block = rng.random((n_paths, n_periods)) < 1 / self.mean_block_length
+        new_block[:, 0] = True
+        block_starts = rng.integers(0, n_rows, size=(n_paths, n_periods))
+
+        # Period at which each position's block began, carried forward along the path
+        block_begin = np.maximum.accumulate(np.where(new_block, periods, 0), axis=1)
+        start = np.take_along_axis(block_starts, block_begin, axis=1)
+        return returns[(start + periods - block_begin) % n_rows]
+
+class BlockBootstrapGenerator(ReturnGenerator):
+    """Circular block bootstrap with fixed-length blocks starting at random periods."""
+
+    def __init__(self, block_length: int):
+        if block_length < 1:
+            raise ValueError("Block length must be at least one period")
+        self.block_length = int(block_length)
+
+    def generate(self, returns: np.ndarray, n_paths: int, n_periods: int, rng: np.random.Generator) -> np.ndarray:
+        n_rows = len(returns)
+        if n_rows == 0:
+            raise ValueError("Insufficient historical data for simulation period")
+        periods = np.arange(n_periods)
+        n_blocks = -(-n_periods // self.block_length)
+        block_starts = rng.integers(0, n_rows, size=(n_paths, n_blocks))
+        start = block_starts[:, periods // self.block_length]
+        return returns[(start + periods % self.block_length) % n_rows]
+
+def _fit_log_returns(returns: np.ndarray) -> tuple:
+    """Mean vector and covariance matrix of log returns."""
+    if len(returns) < 2:
+        raise ValueError("Insufficient historical data to fit a return model")
+    log_returns = np.log1p(returns)
+    return log_returns.mean(axis=0), np.atleast_2d(np.cov(log_returns, rowvar=False))
+
+def _mirror(shocks: np.ndarray, n_paths: int) -> np.ndarray:
+    """Stack shocks for half the paths with their negation (antithetic variates)."""
+    return np.concatenate([shocks, -shocks])[:n_paths]
+
+class MultivariateNormalGenerator(ReturnGenerator):
+    """
+    Correlated normal log returns with the historical mean and covariance.
+
+    Working in log space keeps every generated return above -100%. With
+    antithetic set, every path is paired with its mirror image about the mean.
+    """
+
+    def __init__(self, antithetic: bool = False):
+        self.antithetic = antithetic
+
+    def generate(self, returns: np.ndarray, n_paths: int, n_periods: int, rng: np.random.Generator) -> np.ndarray:
+        mean, cov = _fit_log_returns(returns)
+        n_draws = -(-n_paths // 2) if self.antithetic else n_paths
+        shocks = rng.multivariate_normal(np.zeros(len(mean)), cov, size=(n_draws, n_periods), method='eigh')
+        if self.antithetic:
+            shocks = _mirror(shocks, n_paths)
+        return np.expm1(mean + shocks)
+
+class StudentTGenerator(ReturnGenerator):
+    """
+    Correlated Student-t log returns with the historical mean and covariance.
+
+    Heavier tails than the normal model; the scale matrix is shrunk so the
+    generated covariance matches the historical one.
+    """
+
+    def __init__(self, degrees_of_freedom: float, antithetic: bool = False):
+        if degrees_of_freedom <= 2:
+            raise ValueError("Degrees of freedom must be greater than 2")
+        self.degrees_of_freedom = degrees_of_freedom
+        self.antithetic = antithetic
+
+    def generate(self, returns: np.ndarray, n_paths: int, n_periods: int, rng: np.random.Generator) -> np.ndarray:
+        mean, cov = _fit_log_returns(returns)
+        dof = self.degrees_of_freedom
+        scale = cov * (dof - 2) / dof
+        n_draws = -(-n_paths // 2) if self.antithetic else n_paths
+        normal = rng.multivariate_normal(np.zeros(len(mean)), scale, size=(n_draws, n_periods), method='eigh')
+        shocks = normal / np.sqrt(rng.chisquare(dof, size=(n_draws, n_periods, 1)) / dof)
+        if self.antithetic:
+            shocks = _mirror(shocks, n_paths)
+        return np.expm1(mean + shocks)
+
+RETURN_GENERATORS: Dict[str, Type[ReturnGenerator]] = {
+    SimulationConfig.RETURN_MODEL_STATIONARY_BOOTSTRAP: StationaryBootstrapGenerator,
+    SimulationConfig.RETURN_MODEL_BLOCK_BOOTSTRAP: BlockBootstrapGenerator,
+    SimulationConfig.RETURN_MODEL_NORMAL: MultivariateNormalGenerator,
+    SimulationConfig.RETURN_MODEL_STUDENT_T: StudentTGenerator,
+}
+
+def get_return_generator(return_model: str, periods_per_year: int = 1, antithetic: bool = False) -> ReturnGenerator:
+    """
+    Create the generator for a return model with the configured settings.
+
+    Block lengths are configured in years and converted to periods. Antithetic
+    variates are only supported by the parametric models.
+
+    Raises:
+        ValueError: If the return model is unknown or is the historical model,
+            which has no generator.
+    """
+    if return_model == SimulationConfig.RETURN_MODEL_HISTORICAL:
+        raise ValueError("Historical windows are selected by start period, not generated")
+    if return_model not in RETURN_GENERATORS:
+        raise ValueError(f"Return model must be one of {list(RETURN_GENERATORS)}")
+    if return_model == SimulationConfig.RETURN_MODEL_STATIONARY_BOOTSTRAP:
+        return StationaryBootstrapGenerator(SimulationConfig.BOOTSTRAP_BLOCK_YEARS * periods_per_year)
+    if return_model == SimulationConfig.RETURN_MODEL_BLOCK_BOOTSTRAP:
+        return BlockBootstrapGenerator(SimulationConfig.BOOTSTRAP_BLOCK_YEARS * periods_per_year)
+    if return_model == SimulationConfig.RETURN_MODEL_STUDENT_T:
+        return StudentTGenerator(SimulationConfig.STUDENT_T_DOF, antithetic)
+    if return_model == SimulationConfig.RETURN_MODEL_NORMAL:
+        return MultivariateNormalGenerator(antithetic)
+    return RETURN_GENERATORS[return_model]()
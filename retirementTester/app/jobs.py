@@ -0,0 +1,206 @@
+from typing import Callable, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+import logging
+import os
+import threading
+import time
+import uuid
+from .result_cache import cached_simulation_summary, run_cached_adaptive_simulation
+from .simulation import SimulationCancelled
+from .summary import SimulationSummary
+from .utils import SimulationConfig, SimulationParams
+
+logger = logging.getLogger(__name__)
+
+class JobConfig:
+    """Configuration for background simulation jobs."""
+    MAX_WORKERS: int = int(os.environ.get('RETIREMENT_TESTER_JOB_WORKERS', 2))
+    PROCESSES_PER_JOB: int = int(os.environ.get('RETIREMENT_TESTER_JOB_PROCESSES', 1))  # 1 runs in the job thread
+    MAX_FINISHED_JOBS: int = 200
+    ABANDON_AFTER: float = 60.0  # seconds without a poll before a running job is cancelled
+
+class JobCancelled(SimulationCancelled):
+    """Raised inside a job's progress callback to stop a cancelled or abandoned run."""
+
+class Job:
+    """
+    A simulation submitted to the background executor.
+
+    The run reports completed paths every PROGRESS_STEP paths through
+    report(), which is also where cancellation takes effect, so a cancelled
+    job stops within one step. Sessions call touch() whenever they poll; a
+    job nobody has polled for JobConfig.ABANDON_AFTER seconds cancels itself.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, params: SimulationParams, total_paths: int, description: str):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.total_paths = total_paths
+        self.description = description
+        self.status = Job.QUEUED
+        self.completed_paths = 0
+        self.result: Optional[SimulationSummary] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.last_polled = time.monotonic()
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the expected paths completed, between 0 and 1."""
+        if self.status == Job.DONE:
+            return 1.0
+        return min(self.completed_paths / max(self.total_paths, 1), 1.0)
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has completed, failed or been cancelled."""
+        return self.status in (Job.DONE, Job.FAILED, Job.CANCELLED)
+
+    def touch(self) -> None:
+        """Record that a session is still waiting for this job."""
+        self.last_polled = time.monotonic()
+
+    def cancel(self) -> None:
+        """Stop the job: a queued job never starts, a running one stops after its current step."""
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(Job.CANCELLED)
+
+    def report(self, completed_paths: int) -> None:
+        """
+        Progress callback for the simulation functions.
+
+        Raises:
+            JobCancelled: If the job was cancelled or abandoned.
+        """
+        if time.monotonic() - self.last_polled > JobConfig.ABANDON_AFTER:
+            logger.info(f"Cancelling abandoned job {self.id}")
+            self._cancelled.set()
+        if self._cancelled.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        self.completed_paths = completed_paths
+
+    def run(self, compute: Callable[['Job'], SimulationSummary]) -> None:
+        """Execute compute on the current thread, recording the outcome on the job."""
+        if self._cancelled.is_set():
+            self._finish(Job.CANCELLED)
+            return
+        self.status = Job.RUNNING
+        try:
+            self.result = compute(self)
+            self._finish(Job.DONE)
+        except JobCancelled:
+            logger.info(f"Job {self.id} cancelled after {self.completed_paths:,} paths")
+            self._finish(Job.CANCELLED)
+        except Exception as e:
+            logger.error(f"Job {self.id} failed: {e}")
+            self.error = str(e)
+            self._finish(Job.FAILED)
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished = time.time()
+
+class JobManager:
+    """
+    Bounded pool of background simulation jobs shared by every session.
+
+    Jobs run on threads, so they share the process-wide returns store and
+    result caches; finished results also land in the result cache. Only the
+    most recent JobConfig.MAX_FINISHED_JOBS finished jobs are kept.
+    """
+
+    def __init__(self, max_workers: int = JobConfig.MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='simulation-job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job: Job, compute: Callable[[Job], SimulationSummary]) -> str:
+        """Queue a job and return its ID."""
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            job.future = self._executor.submit(job.run, compute)
+        logger.info(f"Submitted job {job.id}: {job.description}")
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID; None if unknown or pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job. Returns False if the job is unknown."""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def jobs(self) -> List[Job]:
+        """All tracked jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(len(finished) - JobConfig.MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of tracked jobs per status."""
+        counts: Dict[str, int] = {}
+        for job in self.jobs():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+_job_manager = JobManager()
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager."""
+    return _job_manager
+
+def submit_simulation(params: SimulationParams) -> str:
+    """
+    Run a fixed-size simulation in the background.
+
+    Returns:
+        Job ID; the job's result is the simulation summary.
+    """
+    def compute(job: Job) -> SimulationSummary:
+        return cached_simulation_summary(params, JobConfig.PROCESSES_PER_JOB, job.report)
+
+    job = Job(params, params.n_simulations, f"Simulation of {params.n_simulations:,} paths")
+    return get_job_manager().submit(job, compute)
+
+def submit_adaptive_simulation(params: SimulationParams, tolerance: float, metric: str) -> str:
+    """
+    Run an adaptive simulation in the background.
+
+    Progress is measured against ADAPTIVE_MAX_PATHS, so it is an upper bound
+    and the job usually finishes early. On completion job.params records the
+    number of paths the run needed, capped at SIMULATION_CHUNK_SIZE, for the
+    what-if panel.
+
+    Returns:
+        Job ID; the job's result is the simulation summary.
+    """
+    def compute(job: Job) -> SimulationSummary:
+        summary = run_cached_adaptive_simulation(params, tolerance, metric, JobConfig.PROCESSES_PER_JOB, job.report)
+        # Later what-if runs sample as many paths as the adaptive run needed, up to one block, since
+        # they keep a dense paths x periods matrix
+        job.params = replace(params, n_simulations=min(summary.n_paths, SimulationConfig.SIMULATION_CHUNK_SIZE))
+        return summary
+
+    job = Job(params, SimulationConfig.ADAPTIVE_MAX_PATHS, f"Adaptive run to ±{tolerance:g} {metric}")
+    return get_job_manager().submit(job, compute)
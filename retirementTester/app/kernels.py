@@ -0,0 +1,206 @@
+from typing import Callable, Optional, Tuple
+from functools import lru_cache
+import importlib.util
+import logging
+import threading
+import numpy as np
+from .strategies import (
+    WithdrawalStrategy, FixedWithdrawal, InflationIndexedWithdrawal, PercentOfPortfolioWithdrawal, GuardrailWithdrawal
+)
+from .utils import SimulationConfig
+
+logger = logging.getLogger(__name__)
+
+# numba is optional and only imported when the compiled kernel is first used
+NUMBA_AVAILABLE: bool = importlib.util.find_spec('numba') is not None
+
+# Withdrawal rules understood by the compiled kernel
+RULE_FIXED = 0
+RULE_INFLATION_INDEXED = 1
+RULE_PERCENT_OF_PORTFOLIO = 2
+RULE_GUARDRAILS = 3
+
+def _recurrence(returns, initial_portfolio, rule, annual_withdrawal, periods_per_year, inflation_rate,
+                initial_rate, band, adjustment, histories, final_values, depleted):
+    """
+    Withdrawal/growth recurrence one path at a time, compiled with numba.
+
+    Mirrors simulate_portfolios and the strategies operation for operation,
+    so results match the NumPy implementation. Every rule sets the withdrawal
+    once a year, so the loop runs year by year with a tight inner loop over
+    the year's periods. A path stops as soon as it is depleted; its remaining
+    history stays zero.
+    """
+    n_paths, n_periods = returns.shape
+    keep_history = histories.shape[0] > 0
+    growth = 1.0 + inflation_rate
+    for path in range(n_paths):
+        value = initial_portfolio
+        yearly = annual_withdrawal
+        alive = value > 0
+        period = 0
+        year = 0
+        while alive and period < n_periods:
+            if rule == RULE_INFLATION_INDEXED:
+                withdrawal = annual_withdrawal * growth ** year / periods_per_year
+            elif rule == RULE_PERCENT_OF_PORTFOLIO:
+                withdrawal = initial_rate * value / periods_per_year
+            elif rule == RULE_GUARDRAILS:
+                if year > 0:
+                    yearly = yearly * growth
+                    rate = yearly / value
+                    if rate > initial_rate * (1 + band):
+                        yearly = yearly * (1 - adjustment)
+                    if rate < initial_rate * (1 - band):
+                        yearly = yearly * (1 + adjustment)
+                withdrawal = yearly / periods_per_year
+            else:
+                withdrawal = annual_withdrawal / periods_per_year
+
+            end = min(period + periods_per_year, n_periods)
+            while period < end:
+                value = (value - withdrawal) * (1.0 + returns[path, period])
+                if not value > 0:
+                    alive = False
+                    value = 0.0
+                    break
+                if keep_history:
+                    histories[path, period] = value
+                period += 1
+            year += 1
+        final_values[path] = value
+        depleted[path] = not alive
+
+@lru_cache(maxsize=1)
+def _compiled_recurrence() -> Callable:
+    import numba
+
+    return numba.njit(cache=True, nogil=True)(_recurrence)
+
+def _rule_arguments(
+    strategy: Optional[WithdrawalStrategy],
+    period_withdrawal: float
+) -> Optional[Tuple[int, float, int, float, float, float, float]]:
+    """Kernel arguments (rule, annual amount, periods per year, inflation, initial rate, band, adjustment)."""
+    if strategy is None:
+        return RULE_FIXED, float(period_withdrawal), 1, 0.0, 0.0, 0.0, 0.0
+    # Exact types only: a subclass may change the rule, so it runs on the NumPy reference instead
+    kind = type(strategy)
+    common = (float(strategy.annual_withdrawal), int(strategy.periods_per_year))
+    if kind is FixedWithdrawal:
+        return (RULE_FIXED, *common, 0.0, 0.0, 0.0, 0.0)
+    if kind is InflationIndexedWithdrawal:
+        return (RULE_INFLATION_INDEXED, *common, float(strategy.inflation_rate), 0.0, 0.0, 0.0)
+    if kind is PercentOfPortfolioWithdrawal:
+        return (RULE_PERCENT_OF_PORTFOLIO, *common, 0.0, float(strategy.rate), 0.0, 0.0)
+    if kind is GuardrailWithdrawal:
+        return (RULE_GUARDRAILS, *common, float(strategy.inflation_rate), float(strategy.initial_rate),
+                float(strategy.band), float(strategy.adjustment))
+    return None
+
+def run_compiled_recurrence(
+    portfolio_returns: np.ndarray,
+    initial_portfolio: float,
+    period_withdrawal: float,
+    keep_history: bool,
+    strategy: Optional[WithdrawalStrategy]
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Run simulate_portfolios with the compiled kernel.
+
+    Returns:
+        The same tuple as simulate_portfolios, or None if numba is not
+        installed, failed its equivalence check, or the strategy has no
+        compiled rule; callers then use the NumPy implementation.
+    """
+    arguments = _rule_arguments(strategy, period_withdrawal)
+    if arguments is None or not kernel_verified():
+        return None
+    return _run_kernel(portfolio_returns, initial_portfolio, arguments, keep_history)
+
+def _run_kernel(
+    portfolio_returns: np.ndarray,
+    initial_portfolio: float,
+    arguments: Tuple[int, float, int, float, float, float, float],
+    keep_history: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Call the compiled recurrence on (paths, periods, ...) returns and restore their shape."""
+    # Trailing dimensions (e.g. one per allocation) become extra paths
+    n_periods = portfolio_returns.shape[1]
+    trailing = portfolio_returns.shape[2:]
+    returns = np.ascontiguousarray(np.moveaxis(portfolio_returns, 1, -1).reshape(-1, n_periods), dtype=np.float64)
+    histories = np.zeros(returns.shape if keep_history else (0, 0))
+    final_values = np.empty(len(returns))
+    depleted = np.empty(len(returns), dtype=np.bool_)
+    _compiled_recurrence()(returns, float(initial_portfolio), *arguments, histories, final_values, depleted)
+
+    path_shape = portfolio_returns.shape[:1] + trailing
+    depleted = depleted.reshape(path_shape)
+    if not keep_history:
+        return final_values.reshape(path_shape), depleted
+    return np.moveaxis(histories.reshape(path_shape + (n_periods,)), -1, 1), depleted
+
+_verify_lock = threading.Lock()
+_verified: Optional[bool] = None
+
+def kernel_verified() -> bool:
+    """
+    Whether the compiled kernel is usable in this process.
+
+    On first use the kernel is compiled and checked against the NumPy
+    implementation with check_kernel_equivalence; a kernel that fails is
+    disabled for the life of the process.
+    """
+    global _verified
+    if _verified is None:
+        with _verify_lock:
+            if _verified is None:
+                if not NUMBA_AVAILABLE:
+                    logger.warning("numba is not installed; using the NumPy kernel")
+                    _verified = False
+                else:
+                    try:
+                        error = check_kernel_equivalence()
+                        _verified = error <= SimulationConfig.KERNEL_RTOL
+                        if not _verified:
+                            logger.error(f"Compiled kernel differs from NumPy by {error:.2e}; using the NumPy kernel")
+                    except Exception as e:
+                        logger.error(f"Compiled kernel unavailable, using the NumPy kernel: {e}")
+                        _verified = False
+    return _verified
+
+def check_kernel_equivalence(n_paths: int = 500, n_periods: int = 48, seed: int = 0) -> float:
+    """
+    Compare the compiled kernel with the NumPy implementation on random returns.
+
+    Every withdrawal strategy is run at annual and monthly steps, with and
+    without history, including paths that deplete and a trailing allocation
+    dimension.
+
+    Returns:
+        Largest relative difference in any path value; depletion masks must match exactly.
+
+    Raises:
+        AssertionError: If the depletion masks differ.
+    """
+    from .simulation import simulate_portfolios
+    from .strategies import WITHDRAWAL_STRATEGIES
+
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.004, 0.05, (n_paths, n_periods, 2))
+    worst = 0.0
+    for periods_per_year in (1, 12):
+        for strategy_class in WITHDRAWAL_STRATEGIES.values():
+            for portfolio_returns in (returns[:, :, 0], returns):
+                # Withdrawals around the break-even rate, so some paths deplete and some grow
+                strategy = strategy_class(1e6, 5e4 * periods_per_year ** 0.5, periods_per_year)
+                reference = simulate_portfolios(portfolio_returns, 1e6, 0.0, strategy=strategy)
+                strategy = strategy_class(1e6, 5e4 * periods_per_year ** 0.5, periods_per_year)
+                compiled = _run_kernel(portfolio_returns, 1e6, _rule_arguments(strategy, 0.0), True)
+                strategy = strategy_class(1e6, 5e4 * periods_per_year ** 0.5, periods_per_year)
+                final_values, _ = _run_kernel(portfolio_returns, 1e6, _rule_arguments(strategy, 0.0), False)
+                assert np.array_equal(reference[1], compiled[1]), f"Depletion differs for {strategy_class.__name__}"
+                scale = np.maximum(np.abs(reference[0]), 1.0)
+                worst = max(worst, float(np.max(np.abs(compiled[0] - reference[0]) / scale)),
+                            float(np.max(np.abs(final_values - reference[0][:, -1]) / scale[:, -1])))
+    return worst
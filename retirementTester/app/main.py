@@ -2,6 +2,8 @@ import streamlit as st
 import logging
 from retirementTester.app.pages import home, simulation, results
 from retirementTester.app.components.sidebar import sidebar
+from retirementTester.app.components.diagnostics import diagnostics_panel
+from retirementTester.app.components.job_status import job_status_panel
 from retirementTester.app.data_fetcher import initialize_all_assets
 
 # Configure logging
@@ -11,13 +13,14 @@ logger = logging.getLogger(__name__)
 def main():
     st.set_page_config(page_title="Retirement Simulator", layout="wide")
     
-    # Initialize data with a spinner
-    with st.spinner("Initializing all assets..."):
-        logger.debug("Initializing all assets")
-        initialize_all_assets()
+    # Start the shared data load in the background; pages render immediately
+    logger.debug("Initializing all assets")
+    initialize_all_assets()
     
     # Use the new sidebar component
     choice = sidebar()
+    job_status_panel()
+    diagnostics_panel()
     
     pages = {
         "Home": home.show,
@@ -0,0 +1,164 @@
+from typing import Callable, Deque, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from functools import wraps
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+class ProfilingConfig:
+    """Configuration for stage timing instrumentation."""
+    ENABLED: bool = os.environ.get('RETIREMENT_TESTER_PROFILE', '').lower() in ('1', 'true', 'yes')
+    TRACK_MEMORY: bool = os.environ.get('RETIREMENT_TESTER_PROFILE_MEMORY', '').lower() in ('1', 'true', 'yes')
+    MAX_RECORDS: int = 500
+    PROFILE_TOP_N: int = 30
+
+@dataclass
+class StageTiming:
+    """Wall time and peak traced memory of one instrumented stage."""
+    stage: str
+    wall_time: float
+    peak_memory: Optional[int]
+    started_at: float
+    thread: str
+
+_records: Deque[StageTiming] = deque(maxlen=ProfilingConfig.MAX_RECORDS)
+_records_lock = threading.Lock()
+
+def enable_timing(track_memory: bool = False) -> None:
+    """Turn on stage timing, optionally tracking peak memory with tracemalloc."""
+    ProfilingConfig.ENABLED = True
+    ProfilingConfig.TRACK_MEMORY = track_memory
+
+def disable_timing() -> None:
+    """Turn off stage timing and memory tracking."""
+    ProfilingConfig.ENABLED = False
+    ProfilingConfig.TRACK_MEMORY = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+@contextmanager
+def stage(name: str):
+    """
+    Record the wall time (and optionally peak memory) of a block of code.
+
+    Does nothing beyond a flag check when timing is disabled. Peak memory is
+    the tracemalloc high-water mark since the stage started; nested stages
+    reset it, so outer stages report the peak after their last nested stage.
+    """
+    if not ProfilingConfig.ENABLED:
+        yield
+        return
+
+    track_memory = ProfilingConfig.TRACK_MEMORY
+    if track_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if track_memory and tracemalloc.is_tracing() else None
+        record = StageTiming(name, wall_time, peak_memory, started_at, threading.current_thread().name)
+        with _records_lock:
+            _records.append(record)
+
+        message = f"Stage '{name}' took {wall_time * 1000:.1f} ms"
+        if peak_memory is not None:
+            message += f", peak memory {peak_memory / 1e6:.1f} MB"
+        logger.info(message)
+
+def timed(name: str) -> Callable:
+    """Decorator recording every call of a function as a stage."""
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ProfilingConfig.ENABLED:
+                return function(*args, **kwargs)
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_stage_timings() -> List[StageTiming]:
+    """Recorded stage timings, oldest first."""
+    with _records_lock:
+        return list(_records)
+
+def clear_stage_timings() -> None:
+    """Discard all recorded stage timings."""
+    with _records_lock:
+        _records.clear()
+
+def export_stage_timings(path: Optional[str] = None) -> str:
+    """
+    Serialize recorded stage timings to JSON.
+
+    Args:
+        path: Optional file to write the JSON to.
+
+    Returns:
+        The JSON document.
+    """
+    document = json.dumps([asdict(record) for record in get_stage_timings()], indent=2)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(document)
+    return document
+
+@contextmanager
+def profile_run(output_path: Optional[str] = None, backend: str = 'cprofile'):
+    """
+    Profile a single run with cProfile or pyinstrument.
+
+    The report is logged and, if output_path is given, written to that file
+    (a .prof stats file for cProfile, an HTML report for pyinstrument).
+
+    Args:
+        output_path: Optional file to save the profile to.
+        backend: 'cprofile' or 'pyinstrument'.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If pyinstrument is requested but not installed.
+    """
+    if backend == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            logger.info(profiler.output_text(unicode=False, color=False))
+            if output_path is not None:
+                with open(output_path, 'w') as f:
+                    f.write(profiler.output_html())
+    elif backend == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(ProfilingConfig.PROFILE_TOP_N)
+            logger.info(report.getvalue())
+            if output_path is not None:
+                profiler.dump_stats(output_path)
+    else:
+        raise ValueError(f"Unknown profiler backend: {backend}")
@@ -0,0 +1,346 @@
+from typing import Any, Callable, Dict, Optional, Tuple, List
+from collections import OrderedDict
+from dataclasses import asdict, replace
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from .returns_store import get_returns_store
+from .simulation import (
+    run_retirement_simulation, run_streaming_simulation, run_adaptive_simulation, sample_portfolio_returns
+)
+from .summary import SimulationSummary
+from .utils import SimulationParams, SimulationConfig
+
+logger = logging.getLogger(__name__)
+
+def params_key(params: SimulationParams, data_version: Optional[str], kind: str = 'simulation') -> str:
+    """
+    Canonical hash of simulation parameters, returns-data version and seed.
+
+    Numbers are normalized to floats and assets are sorted by name, so
+    equivalent parameter sets map to the same key. Settings that cannot change
+    the result are left out: the kernel, whose results are equivalent, and in
+    historical sampling mode the path count and seed, since every window is
+    evaluated exactly once.
+    """
+    canonical = asdict(params)
+    del canonical['kernel']
+    if params.sampling == SimulationConfig.SAMPLING_HISTORICAL:
+        canonical['n_simulations'] = canonical['seed'] = None
+    canonical['initial_portfolio'] = float(params.initial_portfolio)
+    canonical['annual_withdrawal'] = float(params.annual_withdrawal)
+    canonical['assets'] = sorted(
+        (name, info['ticker'], float(info['allocation'])) for name, info in params.assets.items()
+    )
+    document = json.dumps({'kind': kind, 'params': canonical, 'data_version': data_version},
+                          sort_keys=True, default=str)
+    return hashlib.sha256(document.encode()).hexdigest()
+
+# Parameters that decide which market paths are sampled; the rest only change what is done with them
+_PATH_FIELDS = ('retirement_years', 'periods_per_year', 'sampling', 'return_model', 'variance_reduction',
+                'n_simulations')
+
+def derived_seed(params: SimulationParams) -> int:
+    """
+    Seed determined by the parameters that shape the sampled paths, for runs that did not set one.
+
+    Identical inputs draw identical paths, so results stay reproducible from
+    the inputs alone and keep hitting the result cache across reruns,
+    sessions and restarts. The portfolio size, withdrawal and kernel are left
+    out: runs that differ only in those see the same market paths, so their
+    differences are not sampling noise and they share cached portfolio returns.
+    """
+    canonical = {field: getattr(params, field) for field in _PATH_FIELDS}
+    canonical['assets'] = sorted(
+        (name, info['ticker'], float(info['allocation'])) for name, info in params.assets.items()
+    )
+    canonical['glide_path'] = sorted((name, float(weight)) for name, weight in (params.glide_path or {}).items())
+    document = json.dumps({'kind': 'seed', 'params': canonical}, sort_keys=True)
+    return int(hashlib.sha256(document.encode()).hexdigest()[:16], 16)
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value) + 8 * len(value)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return 64
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of simulation results bounded by a memory budget.
+
+    An optional disk tier keeps pickled results across restarts and serves
+    entries evicted from memory; it is pruned oldest-first to its own budget.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, max_disk_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _store_memory(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if self.disk_dir is None or not os.path.exists(self._disk_path(key)):
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                value = pickle.load(f)
+            os.utime(self._disk_path(key))
+            return value
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached result {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if self.disk_dir is None:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+            self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write cached result {key}: {e}")
+
+    def _prune_disk(self) -> None:
+        entries = [
+            os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith('.pkl')
+        ]
+        entries.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in entries)
+        for path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a result in memory, then on disk. Returns None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store_memory(key, value, estimate_size(value))
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a result in memory and, if configured, on disk."""
+        with self._lock:
+            self._store_memory(key, value, estimate_size(value))
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for key, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counts and current memory usage."""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'hits': self.hits, 'misses': self.misses}
+
+_result_cache = ResultCache(
+    SimulationConfig.RESULT_CACHE_BYTES,
+    SimulationConfig.RESULT_CACHE_DIR,
+    SimulationConfig.RESULT_CACHE_DISK_BYTES
+)
+
+_growth_cache = ResultCache(SimulationConfig.GROWTH_CACHE_BYTES)
+
+_figure_cache = ResultCache(SimulationConfig.FIGURE_CACHE_BYTES)
+
+_session_cache = ResultCache(SimulationConfig.SESSION_RESULTS_BYTES)
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide simulation result cache."""
+    return _result_cache
+
+def get_growth_cache() -> ResultCache:
+    """Return the process-wide cache of sampled portfolio return matrices."""
+    return _growth_cache
+
+def get_figure_cache() -> ResultCache:
+    """Return the process-wide cache of rendered chart images."""
+    return _figure_cache
+
+def get_session_cache() -> ResultCache:
+    """Return the process-wide store of the results sessions are showing."""
+    return _session_cache
+
+def store_session_result(summary: SimulationSummary) -> str:
+    """
+    Keep a compact copy of a session's latest result in the server-wide session store.
+
+    Sessions keep only the returned ID, so their own state stays a few hundred
+    bytes. The store is bounded by SESSION_RESULTS_BYTES and evicts the
+    results least recently viewed, i.e. those of idle sessions, first.
+
+    Returns:
+        ID to look the result up with get_session_result.
+    """
+    result_id = uuid.uuid4().hex
+    get_session_cache().put(result_id, summary.compact())
+    return result_id
+
+def get_session_result(result_id: Optional[str]) -> Optional[SimulationSummary]:
+    """Look up a session's result; None if there is none or it has been evicted."""
+    if result_id is None:
+        return None
+    return get_session_cache().get(result_id)
+
+def run_cached_simulation(
+    params: SimulationParams,
+    n_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> Tuple[pd.DataFrame, float, List[float], List[float]]:
+    """
+    Run a simulation, reusing an earlier result for identical parameters.
+
+    The key covers every parameter including the seed and the returns-data
+    version, so a data refresh invalidates earlier results. Results are shared
+    between sessions and must not be modified by callers.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        n_workers: Number of worker processes used on a cache miss.
+        progress: Progress callback for a cache miss, see run_retirement_simulation.
+
+    Returns:
+        Same tuple as run_retirement_simulation.
+    """
+    store = get_returns_store(params.periods_per_year)
+    store.load()
+    key = params_key(params, store.version)
+    return get_result_cache().get_or_compute(key, lambda: run_retirement_simulation(params, n_workers, progress))
+
+def cached_simulation_summary(
+    params: SimulationParams,
+    n_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> SimulationSummary:
+    """
+    Percentile bands and headline figures of a simulation, computed once per result.
+
+    Pages render from this compact summary, so reruns never rescan the full
+    (paths x years) matrix. Runs larger than one simulation block are
+    streamed and never materialize their paths.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        n_workers: Number of worker processes used if the simulation itself is not cached.
+        progress: Progress callback for a cache miss, see run_retirement_simulation.
+
+    Returns:
+        SimulationSummary with exact percentiles, or sketch percentiles for streamed runs.
+    """
+    store = get_returns_store(params.periods_per_year)
+    store.load()
+    key = params_key(params, store.version, kind='summary')
+
+    def compute() -> SimulationSummary:
+        if params.n_simulations > SimulationConfig.SIMULATION_CHUNK_SIZE:
+            return run_streaming_simulation(params, n_workers, progress)
+        return SimulationSummary.from_results(*run_cached_simulation(params, n_workers, progress))
+
+    return get_result_cache().get_or_compute(key, compute)
+
+def run_cached_adaptive_simulation(
+    params: SimulationParams,
+    tolerance: float,
+    metric: str = SimulationConfig.ADAPTIVE_METRIC_DEPLETION,
+    n_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> SimulationSummary:
+    """
+    Run an adaptive simulation, reusing an earlier result for identical settings.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        tolerance: Target confidence interval half-width, see run_adaptive_simulation.
+        metric: 'depletion' or 'median'.
+        n_workers: Number of worker processes used on a cache miss.
+        progress: Progress callback for a cache miss, see run_adaptive_simulation.
+
+    Returns:
+        Same summary as run_adaptive_simulation.
+    """
+    store = get_returns_store(params.periods_per_year)
+    store.load()
+    key = params_key(replace(params, n_simulations=0), store.version, kind=f"adaptive:{metric}:{float(tolerance)!r}")
+    return get_result_cache().get_or_compute(
+        key, lambda: run_adaptive_simulation(params, tolerance, metric, n_workers=n_workers, progress=progress)
+    )
+
+def cached_portfolio_returns(params: SimulationParams) -> np.ndarray:
+    """
+    Sampled blended portfolio returns for an allocation, cached across calls.
+
+    The matrix depends on the allocation, duration, sampling settings, seed and
+    returns-data version but not on the portfolio size or withdrawal strategy, so
+    what-if changes to those only re-run the cheap recurrence.
+
+    Returns:
+        Read-only array of shape (paths, n_periods).
+    """
+    store = get_returns_store(params.periods_per_year)
+    store.load()
+    growth_params = replace(params, initial_portfolio=0.0, annual_withdrawal=0.0,
+                            withdrawal_strategy=SimulationConfig.WITHDRAWAL_FIXED,
+                            inflation_rate=SimulationConfig.INFLATION_RATE)
+    key = params_key(growth_params, store.version, kind='growth')
+
+    def compute() -> np.ndarray:
+        portfolio_returns = sample_portfolio_returns(params)
+        portfolio_returns.flags.writeable = False
+        return portfolio_returns
+
+    return get_growth_cache().get_or_compute(key, compute)
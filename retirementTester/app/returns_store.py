@@ -0,0 +1,361 @@
+from typing import Dict, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from .data import MarketDataConfig, fetch_historical_data
+from .utils import SimulationConfig
+
+logger = logging.getLogger(__name__)
+
+class ReturnsStore:
+    """
+    Process-wide store of aligned period returns shared by every session.
+
+    Returns are kept as one dense, read-only (periods x tickers) matrix in column-major
+    order with a ticker -> column index, so single-ticker columns are zero-copy views.
+
+    The matrix can be shared between processes: share() writes it to a
+    memory-mapped segment described by a small JSON manifest, and attach()
+    maps that segment read-only without copying, so every process reads the
+    same pages. load() attaches to a fresh shared segment before fetching.
+    Only load() writes to the user-wide MarketDataConfig.SHARED_RETURNS_DIR,
+    and only data it fetched itself, so returns published by a test or a
+    notebook never reach other processes.
+    """
+    SOURCE_FETCHED = 'fetched'
+    SOURCE_PUBLISHED = 'published'
+
+    def __init__(self, frequency: str = 'YE'):
+        self.frequency = frequency
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None
+        self._index: Optional[pd.DatetimeIndex] = None
+        self._columns: Dict[str, int] = {}
+        self._version: Optional[str] = None
+        self._source: Optional[str] = None
+        self._loader: Optional[threading.Thread] = None
+        self._loader_lock = threading.Lock()
+        self._load_error: Optional[str] = None
+        self._shared_version: Optional[str] = None
+        self._shared_manifest: Optional[str] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether returns data has been published to the store."""
+        return self._matrix is not None
+
+    @property
+    def is_loading(self) -> bool:
+        """Whether a background load started by load_in_background is still running."""
+        return self._loader is not None and self._loader.is_alive()
+
+    @property
+    def load_error(self) -> Optional[str]:
+        """Error message of the last failed background load, None otherwise."""
+        return self._load_error
+
+    @property
+    def version(self) -> Optional[str]:
+        """Content hash of the published returns, None until loaded."""
+        return self._version
+
+    @property
+    def index(self) -> Optional[pd.DatetimeIndex]:
+        """Period-end dates of the matrix rows."""
+        return self._index
+
+    @property
+    def tickers(self) -> Tuple[str, ...]:
+        """Tickers available in the store, in column order."""
+        return tuple(self._columns)
+
+    def publish(self, data: pd.DataFrame, source: str = SOURCE_PUBLISHED) -> None:
+        """
+        Replace the stored returns with a DataFrame of period returns.
+
+        Args:
+            data: DataFrame indexed by period end with one column per ticker.
+            source: Where the data came from; SOURCE_FETCHED only for market
+                data fetched by load().
+        """
+        matrix = np.asfortranarray(data.to_numpy(dtype=np.float64))
+        matrix.flags.writeable = False
+        digest = hashlib.sha1(matrix.tobytes(order='F'))
+        digest.update(','.join(map(str, data.columns)).encode())
+        digest.update(np.asarray(data.index.values).tobytes())
+
+        with self._lock:
+            self._matrix = matrix
+            self._index = pd.DatetimeIndex(data.index)
+            self._columns = {ticker: i for i, ticker in enumerate(data.columns)}
+            self._version = digest.hexdigest()[:16]
+            self._source = source
+        logger.info(f"Published returns for {len(self._columns)} tickers ({self._version})")
+
+    def load(self, tickers: Optional[Sequence[str]] = None) -> None:
+        """
+        Fetch and publish returns unless already loaded.
+
+        With MarketDataConfig.SHARE_RETURNS, a shared segment written by another
+        process within the refresh interval is attached instead of fetching,
+        and freshly fetched returns are shared for the next process.
+
+        Args:
+            tickers: Tickers to load. Defaults to every ticker in SimulationConfig.ASSET_TICKERS.
+
+        Raises:
+            RuntimeError: If the data fetch fails.
+        """
+        with self._lock:
+            if self._matrix is not None:
+                return
+            tickers = tuple(tickers or SimulationConfig.ASSET_TICKERS.values())
+            if MarketDataConfig.SHARE_RETURNS and self._attach_fresh(tickers):
+                return
+            self.publish(fetch_historical_data(tickers, frequency=self.frequency), source=ReturnsStore.SOURCE_FETCHED)
+            if MarketDataConfig.SHARE_RETURNS:
+                try:
+                    self.share(MarketDataConfig.SHARED_RETURNS_DIR)
+                except OSError as e:
+                    logger.warning(f"Could not share returns with other processes: {e}")
+
+    def manifest_path(self, directory: Optional[str] = None) -> str:
+        """Location of the manifest describing this time step's shared segment."""
+        return os.path.join(directory or MarketDataConfig.SHARED_RETURNS_DIR, f"returns-{self.frequency}.json")
+
+    def share(self, directory: str) -> str:
+        """
+        Write the published returns to a memory-mappable segment for other processes.
+
+        The segment is written once per data version; the manifest is replaced
+        atomically, so attaching processes never see a partial segment. The
+        manifest records where the data came from and the dates it covers.
+
+        Args:
+            directory: Directory for the segment. Callers sharing with their own
+                workers should use a private directory; load() alone writes to
+                MarketDataConfig.SHARED_RETURNS_DIR.
+
+        Returns:
+            Path of the manifest to pass to attach().
+
+        Raises:
+            OSError: If the segment cannot be written.
+        """
+        self._require()
+        manifest_path = self.manifest_path(directory)
+        with self._lock:
+            if self._shared_version == self._version and self._shared_manifest == manifest_path \
+                    and os.path.exists(manifest_path):
+                return manifest_path
+            directory = os.path.dirname(manifest_path)
+            os.makedirs(directory, exist_ok=True)
+            segment = f"returns-{self.frequency}-{self._version}.npy"
+            if not os.path.exists(os.path.join(directory, segment)):
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    np.lib.format.write_array(f, self._matrix)
+                os.replace(tmp_path, os.path.join(directory, segment))
+
+            manifest = {
+                'version': self._version,
+                'segment': segment,
+                'source': self._source,
+                'frequency': self.frequency,
+                'requested_start': MarketDataConfig.DEFAULT_START_DATE,
+                'start': self._index[0].isoformat() if len(self._index) else None,
+                'end': self._index[-1].isoformat() if len(self._index) else None,
+                'tickers': list(self._columns),
+                'index': [timestamp.isoformat() for timestamp in self._index],
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, manifest_path)
+            self._shared_version, self._shared_manifest = self._version, manifest_path
+            self._prune_segments(directory, segment)
+        logger.info(f"Shared returns {self._version} at {manifest_path}")
+        return manifest_path
+
+    def _prune_segments(self, directory: str, current: str) -> None:
+        """Delete segments of older versions; processes still mapping them keep their pages."""
+        prefix = f"returns-{self.frequency}-"
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.npy') and name != current:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError as e:
+                    logger.debug(f"Keeping shared returns segment {name}: {e}")
+
+    def attach(self, manifest_path: str) -> None:
+        """
+        Map a segment written by share() into this store, replacing its returns.
+
+        The matrix is a read-only memory map, so attaching costs no copy and
+        the pages are shared with every other attached process.
+
+        Raises:
+            OSError: If the manifest or segment cannot be read.
+            ValueError: If the segment does not match its manifest.
+        """
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        matrix = np.load(os.path.join(os.path.dirname(manifest_path), manifest['segment']), mmap_mode='r')
+        if matrix.shape != (len(manifest['index']), len(manifest['tickers'])):
+            raise ValueError(f"Shared returns segment does not match {manifest_path}")
+
+        with self._lock:
+            self._matrix = matrix
+            self._index = pd.DatetimeIndex(manifest['index'])
+            self._columns = {ticker: i for i, ticker in enumerate(manifest['tickers'])}
+            self._version = manifest['version']
+            self._source = manifest.get('source', ReturnsStore.SOURCE_PUBLISHED)
+            self._shared_version, self._shared_manifest = self._version, manifest_path
+        logger.info(f"Attached shared returns for {len(self._columns)} tickers ({self._version})")
+
+    def _attach_fresh(self, tickers: Sequence[str]) -> bool:
+        """
+        Attach the user-wide shared segment if it can stand in for a fetch; False otherwise.
+
+        The segment must hold fetched market data for this time step and the
+        configured start date, be recent, and cover tickers.
+        """
+        manifest_path = self.manifest_path()
+        try:
+            age = time.time() - os.path.getmtime(manifest_path)
+            if age > MarketDataConfig.REFRESH_INTERVAL_HOURS * 3600:
+                return False
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('source') != ReturnsStore.SOURCE_FETCHED or manifest.get('frequency') != self.frequency \
+                    or manifest.get('requested_start') != MarketDataConfig.DEFAULT_START_DATE:
+                logger.info(f"Ignoring shared returns {manifest_path} from another source or date range")
+                return False
+            if not set(tickers) <= set(manifest['tickers']):
+                return False
+            self.attach(manifest_path)
+            logger.info(f"Using shared market data from {manifest['start']} to {manifest['end']}")
+            return True
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable shared returns {manifest_path}: {e}")
+            return False
+
+    def load_in_background(self, tickers: Optional[Sequence[str]] = None) -> None:
+        """
+        Start loading returns in a daemon thread and return immediately.
+
+        At most one load runs per store, however many sessions ask for it. A
+        failed load is recorded in load_error and retried on the next call.
+        Callers that need the data before it is ready block in load().
+        """
+        with self._loader_lock:
+            if self.is_loaded or self.is_loading:
+                return
+
+            def run() -> None:
+                try:
+                    self.load(tickers)
+                    self._load_error = None
+                except Exception as e:
+                    logger.error(f"Background returns load failed: {e}")
+                    self._load_error = str(e)
+
+            self._loader = threading.Thread(target=run, name=f"returns-loader-{self.frequency}", daemon=True)
+            self._loader.start()
+
+    def _require(self) -> None:
+        if self._matrix is None:
+            self.load()
+
+    def column(self, ticker: str) -> np.ndarray:
+        """Zero-copy read-only view of one ticker's period returns."""
+        self._require()
+        if ticker not in self._columns:
+            raise ValueError(f"No historical data available for: {ticker}")
+        return self._matrix[:, self._columns[ticker]]
+
+    def matrix(self, tickers: Sequence[str]) -> np.ndarray:
+        """
+        Dense (periods x tickers) returns matrix for the requested tickers.
+
+        Only the longest run of consecutive periods with data for every ticker
+        is kept, so historical windows never span a gap in the data; a warning
+        is logged when complete periods outside that run are dropped. When the
+        tickers are adjacent columns in store order the result is a view
+        rather than a copy.
+
+        Raises:
+            ValueError: If a ticker is not present in the store.
+        """
+        self._require()
+        missing = [ticker for ticker in tickers if ticker not in self._columns]
+        if missing:
+            raise ValueError(f"No historical data available for: {', '.join(missing)}")
+
+        positions = [self._columns[ticker] for ticker in tickers]
+        if positions == list(range(positions[0], positions[0] + len(positions))):
+            selected = self._matrix[:, positions[0]:positions[0] + len(positions)]
+        else:
+            selected = self._matrix[:, positions]
+
+        complete = ~np.isnan(selected).any(axis=1)
+        if not complete.any():
+            return selected[:0]
+        # Runs of complete rows start where complete switches on and end where it switches off
+        edges = np.diff(np.concatenate(([0], complete.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        longest = int(np.argmax(ends - starts))
+        start, end = int(starts[longest]), int(ends[longest])
+        if len(starts) > 1:
+            logger.warning(f"Returns for {', '.join(tickers)} have gaps; using the longest complete run "
+                           f"{self._index[start].date()} to {self._index[end - 1].date()}")
+        return selected[start:end]
+
+    def frame(self, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Period returns for the requested tickers (all tickers by default) as a DataFrame."""
+        self._require()
+        tickers = list(tickers or self._columns)
+        missing = [ticker for ticker in tickers if ticker not in self._columns]
+        if missing:
+            raise ValueError(f"No historical data available for: {', '.join(missing)}")
+        return pd.DataFrame(
+            {ticker: self._matrix[:, self._columns[ticker]] for ticker in tickers},
+            index=self._index
+        )
+
+_stores: Dict[int, ReturnsStore] = {
+    periods_per_year: ReturnsStore(frequency)
+    for periods_per_year, frequency in SimulationConfig.PERIOD_FREQUENCIES.items()
+}
+
+def get_returns_store(periods_per_year: int = 1) -> ReturnsStore:
+    """
+    Return the process-wide returns store for a simulation time step.
+
+    Raises:
+        ValueError: If periods_per_year is not in SimulationConfig.PERIOD_FREQUENCIES.
+    """
+    if periods_per_year not in _stores:
+        raise ValueError(f"Periods per year must be one of {list(_stores)}")
+    return _stores[periods_per_year]
+
+def attach_shared_returns(manifests: Dict[int, str]) -> None:
+    """
+    Attach every time step's store to the segments shared by a parent process.
+
+    Used as a process pool initializer, so workers start without fetching or
+    unpickling market data.
+
+    Args:
+        manifests: Manifest path from ReturnsStore.share() per periods_per_year.
+    """
+    for periods_per_year, manifest_path in manifests.items():
+        get_returns_store(periods_per_year).attach(manifest_path)
@@ -1,87 +1,845 @@
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Sequence, Iterator, Callable, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import replace
+from itertools import combinations
 import numpy as np
 import pandas as pd
 import logging
-from .data_fetcher import get_asset_data
-from .utils import SimulationParams
+import shutil
+import tempfile
+from .data import MarketDataConfig
+from .returns_store import attach_shared_returns, get_returns_store
+from .generators import get_return_generator
+from .strategies import WITHDRAWAL_STRATEGIES, WithdrawalStrategy, allocation_schedule, get_withdrawal_strategy
+from .kernels import run_compiled_recurrence
+from .utils import SimulationParams, SimulationConfig
+from .profiling import timed
+from .summary import (
+    PercentileSketch, SimulationSummary, PERCENTILES, PERCENTILE_LABELS, depletion_half_width, median_half_width
+)
 
 logger = logging.getLogger(__name__)
 
-def run_retirement_simulation(
+class SimulationCancelled(Exception):
+    """Raised by a progress callback to stop a run; a normal outcome, not a failure."""
+
+def prepare_returns(params: SimulationParams) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the returns matrix and allocation weights for the selected assets.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+
+    Returns:
+        Tuple of (periods x assets) returns matrix at the params.periods_per_year
+        time step and the matching weight vector. Periods missing data for any
+        selected asset are dropped.
+
+    Raises:
+        ValueError: If a selected ticker is not present in the returns data.
+    """
+    tickers = [asset['ticker'] for asset in params.assets.values()]
+    # Use the process-wide pre-fetched data
+    returns = get_returns_store(params.periods_per_year).matrix(tickers)
+    weights = np.array([asset['allocation'] for asset in params.assets.values()], dtype=np.float64)
+    return returns, weights
+
+def draw_start_indices(n_windows: int, size: int, rng: np.random.Generator, stratified: bool = False) -> np.ndarray:
+    """
+    Draw random historical start years for a block of paths.
+
+    Stratified draws split the windows into size equal strata and take one
+    uniform draw from each, so every part of the history is represented and
+    the estimates vary less than with independent draws.
+    """
+    if not stratified:
+        return rng.integers(0, n_windows, size=size)
+    strata = (np.arange(size) + rng.random(size)) / size
+    return np.minimum((strata * n_windows).astype(np.int64), n_windows - 1)
+
+def iter_start_index_blocks(
+    n_windows: int,
+    n_simulations: int,
+    seed: Optional[int] = None,
+    stratified: bool = False
+) -> Iterator[np.ndarray]:
+    """
+    Draw random historical start years in blocks of SIMULATION_CHUNK_SIZE paths.
+
+    Every block draws from its own child of the master seed, so the sequence
+    depends only on the seed and not on how blocks are spread over workers.
+    """
+    if n_windows <= 0:
+        raise ValueError("Insufficient historical data for simulation period")
+    for size, child_seed in iter_seed_blocks(n_simulations, seed):
+        yield draw_start_indices(n_windows, size, np.random.default_rng(child_seed), stratified)
+
+def iter_seed_blocks(n_simulations: int, seed: Optional[int] = None) -> Iterator[Tuple[int, np.random.SeedSequence]]:
+    """Split n_simulations paths into blocks of SIMULATION_CHUNK_SIZE, each with a child of the master seed."""
+    block_size = SimulationConfig.SIMULATION_CHUNK_SIZE
+    n_blocks = -(-n_simulations // block_size)
+    for i, child_seed in enumerate(np.random.SeedSequence(seed).spawn(n_blocks)):
+        yield min(block_size, n_simulations - i * block_size), child_seed
+
+def sample_start_indices(n_windows: int, n_simulations: int, seed: Optional[int] = None) -> np.ndarray:
+    """Draw a random historical start year for every simulated path."""
+    blocks = list(iter_start_index_blocks(n_windows, n_simulations, seed))
+    return np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+
+def iter_start_blocks(n_windows: int, params: SimulationParams) -> Iterator[np.ndarray]:
+    """
+    Yield the historical start year of every path, in blocks, according to the sampling mode.
+
+    In historical mode each of the n_windows windows is evaluated exactly once,
+    so depletion probability and percentiles are exact and deterministic.
+    Otherwise params.n_simulations start years are drawn from params.seed.
+    """
+    if n_windows <= 0:
+        raise ValueError("Insufficient historical data for simulation period")
+    if params.sampling == SimulationConfig.SAMPLING_HISTORICAL:
+        for begin in range(0, n_windows, SimulationConfig.SIMULATION_CHUNK_SIZE):
+            yield np.arange(begin, min(begin + SimulationConfig.SIMULATION_CHUNK_SIZE, n_windows))
+    else:
+        stratified = params.variance_reduction == SimulationConfig.VARIANCE_REDUCTION_STRATIFIED
+        yield from iter_start_index_blocks(n_windows, params.n_simulations, params.seed, stratified)
+
+def iter_path_blocks(n_rows: int, params: SimulationParams) -> Iterator[Any]:
+    """
+    Yield the blocks of paths to simulate for the return model.
+
+    Historical windows are described by their start periods. Other return
+    models are described by a (size, seed) pair per block, and the paths are
+    generated where the block is simulated, possibly in a worker process.
+    """
+    if params.return_model == SimulationConfig.RETURN_MODEL_HISTORICAL:
+        yield from iter_start_blocks(n_rows - params.n_periods, params)
+    else:
+        yield from iter_seed_blocks(params.n_simulations, params.seed)
+
+def iter_adaptive_blocks(n_rows: int, params: SimulationParams, batch_size: int, max_paths: int) -> Iterator[Any]:
+    """
+    Yield batches of random paths, each seeded from the next child of params.seed, up to max_paths.
+
+    Batches use the same block description as iter_path_blocks, so they can be
+    simulated by the same block functions.
+    """
+    n_windows = n_rows - params.n_periods
+    if params.return_model == SimulationConfig.RETURN_MODEL_HISTORICAL and n_windows <= 0:
+        raise ValueError("Insufficient historical data for simulation period")
+    stratified = params.variance_reduction == SimulationConfig.VARIANCE_REDUCTION_STRATIFIED
+    seed_sequence = np.random.SeedSequence(params.seed)
+    for begin in range(0, max_paths, batch_size):
+        size = min(batch_size, max_paths - begin)
+        child_seed = seed_sequence.spawn(1)[0]
+        if params.return_model == SimulationConfig.RETURN_MODEL_HISTORICAL:
+            yield draw_start_indices(n_windows, size, np.random.default_rng(child_seed), stratified)
+        else:
+            yield size, child_seed
+
+def block_portfolio_returns(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    block: Any,
     params: SimulationParams
+) -> np.ndarray:
+    """
+    Blended portfolio returns for one block from iter_path_blocks.
+
+    Args:
+        returns: Historical (periods x assets) returns matrix.
+        weights: Allocation weights of shape (assets,), or (assets, portfolios)
+            for several allocations at once.
+        block: Start periods or a (size, seed) pair.
+        params: SimulationParams object containing simulation parameters.
+
+    Returns:
+        Array of shape (paths, n_periods) or (paths, n_periods, portfolios).
+        With a glide path, weights is ignored and every period is blended with
+        its own target weights from allocation_schedule.
+    """
+    if params.return_model == SimulationConfig.RETURN_MODEL_HISTORICAL:
+        if params.glide_path is None:
+            # Blend once per historical period, then gather every path's window at once
+            return build_portfolio_returns(returns @ weights, block, params.n_periods)
+        asset_returns = build_portfolio_returns(returns, block, params.n_periods)
+    else:
+        size, seed_sequence = block
+        antithetic = params.variance_reduction == SimulationConfig.VARIANCE_REDUCTION_ANTITHETIC
+        generator = get_return_generator(params.return_model, params.periods_per_year, antithetic)
+        asset_returns = generator.generate(returns, size, params.n_periods, np.random.default_rng(seed_sequence))
+    if params.glide_path is None:
+        return asset_returns @ weights
+    return np.einsum('pta,ta->pt', asset_returns, allocation_schedule(params), optimize=True)
+
+def select_start_indices(n_windows: int, params: SimulationParams) -> np.ndarray:
+    """Choose the historical start year of every path according to the sampling mode."""
+    blocks = list(iter_start_blocks(n_windows, params))
+    return np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+
+def build_portfolio_returns(
+    blended_returns: np.ndarray,
+    start_indices: np.ndarray,
+    retirement_years: int
+) -> np.ndarray:
+    """
+    Gather the blended portfolio return of every path and year in one shot.
+
+    Args:
+        blended_returns: Portfolio return per historical year, shape (years,)
+            or (years, portfolios) for several allocations at once.
+        start_indices: Start year of each path, shape (paths,).
+        retirement_years: Number of periods per path (years for annual steps).
+
+    Returns:
+        Array of shape (paths, retirement_years) or (paths, retirement_years, portfolios).
+    """
+    offsets = start_indices[:, None] + np.arange(retirement_years)
+    return blended_returns[offsets]
+
+def to_yearly(histories: np.ndarray, periods_per_year: int) -> np.ndarray:
+    """
+    Keep only the year-end values of (paths, periods, ...) histories.
+
+    Returns:
+        View of shape (paths, years, ...); histories itself for annual steps.
+    """
+    if periods_per_year == 1:
+        return histories
+    return histories[:, periods_per_year - 1::periods_per_year]
+
+def simulate_portfolios(
+    portfolio_returns: np.ndarray,
+    initial_portfolio: float,
+    annual_withdrawal: float,
+    keep_history: bool = True,
+    strategy: Optional[WithdrawalStrategy] = None,
+    kernel: str = SimulationConfig.KERNEL_NUMPY
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the withdrawal/growth recurrence for all paths at once.
+
+    Each period the withdrawal is taken at the start of the period and the
+    remainder grows with that period's portfolio return. Once a path hits zero it stays
+    depleted and its remaining values are zero.
+
+    Args:
+        portfolio_returns: Blended portfolio returns, shape (paths, years, ...).
+            Trailing dimensions are broadcast, e.g. one per allocation.
+        initial_portfolio: Starting portfolio value.
+        annual_withdrawal: Amount withdrawn at the start of every period.
+        keep_history: If False, only final values are returned, avoiding the
+            (paths x years) history allocation.
+        strategy: Withdrawal strategy deciding each period's withdrawal from
+            the current portfolio values; overrides annual_withdrawal.
+        kernel: 'numba' runs the recurrence path by path in compiled code,
+            stopping each path once it is depleted. The NumPy loop below is
+            the reference and is used whenever the compiled kernel cannot be.
+
+    Returns:
+        Tuple of (path histories with the same shape as portfolio_returns, or
+        final values of shape (paths, ...) when keep_history is False,
+        boolean depletion mask of shape (paths, ...)).
+    """
+    if kernel == SimulationConfig.KERNEL_NUMBA:
+        result = run_compiled_recurrence(portfolio_returns, initial_portfolio, annual_withdrawal, keep_history, strategy)
+        if result is not None:
+            return result
+
+    n_years = portfolio_returns.shape[1]
+    path_shape = portfolio_returns.shape[:1] + portfolio_returns.shape[2:]
+    histories = np.zeros(portfolio_returns.shape, dtype=np.float64) if keep_history else None
+    portfolio = np.full(path_shape, float(initial_portfolio))
+    alive = portfolio > 0
+
+    for year in range(n_years):
+        withdrawal = annual_withdrawal if strategy is None else strategy.withdrawal(year, portfolio)
+        portfolio = (portfolio - withdrawal) * (1.0 + portfolio_returns[:, year])
+        alive &= portfolio > 0
+        portfolio = np.where(alive, portfolio, 0.0)
+        if keep_history:
+            histories[:, year] = portfolio
+
+    if not keep_history:
+        return portfolio, ~alive
+    return histories, ~alive
+
+def sample_portfolio_returns(params: SimulationParams) -> np.ndarray:
+    """
+    Sample return paths with the configured return model and blend them into portfolio returns.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+
+    Returns:
+        Array of blended portfolio returns with shape (paths, n_periods).
+
+    Raises:
+        ValueError: If historical data is insufficient for the simulation period.
+    """
+    returns, weights = prepare_returns(params)
+    return np.concatenate([
+        block_portfolio_returns(returns, weights, block, params)
+        for block in iter_path_blocks(len(returns), params)
+    ])
+
+@timed('withdrawal_search')
+def find_max_withdrawal(
+    params: SimulationParams,
+    target_depletion_prob: float,
+    tolerance: float = SimulationConfig.WITHDRAWAL_TOLERANCE
+) -> float:
+    """
+    Find the largest annual withdrawal whose depletion probability meets a target.
+
+    Return paths are sampled and blended once; the search then only re-runs the
+    withdrawal recurrence over those cached paths. params.annual_withdrawal is ignored.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        target_depletion_prob: Maximum acceptable probability of depletion (0-1).
+        tolerance: Precision of the returned withdrawal amount.
+
+    Returns:
+        Maximum annual withdrawal meeting the target, accurate to within tolerance,
+        and at most SimulationConfig.MAX_WITHDRAWAL.
+
+    Raises:
+        ValueError: If the target is outside [0, 1], the withdrawal strategy
+            never depletes the portfolio, or historical data is insufficient.
+    """
+    if not 0.0 <= target_depletion_prob <= 1.0:
+        raise ValueError("Target depletion probability must be between 0 and 1")
+    if not WITHDRAWAL_STRATEGIES[params.withdrawal_strategy].can_deplete:
+        raise ValueError(f"The {params.withdrawal_strategy} strategy never depletes the portfolio, "
+                         "so it has no maximum safe withdrawal")
+
+    try:
+        portfolio_returns = sample_portfolio_returns(params)
+
+        def depletion_prob(withdrawal: float) -> float:
+            _, depleted = simulate_portfolios(
+                portfolio_returns, params.initial_portfolio, withdrawal / params.periods_per_year,
+                keep_history=False, strategy=get_withdrawal_strategy(replace(params, annual_withdrawal=withdrawal)),
+                kernel=params.kernel
+            )
+            return float(depleted.mean())
+
+        # Depletion risk only grows with the withdrawal, so bisect between a safe lower
+        # bound and withdrawing the whole portfolio in the first step, or the largest
+        # withdrawal the parameters accept if that is less.
+        low = 0.0
+        high = min(float(params.initial_portfolio) * params.periods_per_year, SimulationConfig.MAX_WITHDRAWAL)
+        if depletion_prob(low) > target_depletion_prob:
+            return 0.0
+        if depletion_prob(high) <= target_depletion_prob:
+            return high
+
+        while high - low > tolerance:
+            mid = (low + high) / 2
+            if depletion_prob(mid) <= target_depletion_prob:
+                low = mid
+            else:
+                high = mid
+
+        logger.info(f"Max withdrawal for {target_depletion_prob:.1%} depletion risk: {low:,.2f}")
+        return low
+
+    except Exception as e:
+        logger.error(f"Withdrawal search failed: {e}")
+        raise
+
+def allocation_grid(n_assets: int, step: float = SimulationConfig.SWEEP_STEP) -> np.ndarray:
+    """
+    Enumerate every allocation of n_assets on a regular grid summing to 1.
+
+    Args:
+        n_assets: Number of assets to allocate between.
+        step: Grid spacing, e.g. 0.05 for 5% steps. Must divide 1 evenly.
+
+    Returns:
+        Array of shape (allocations, n_assets) with one weight vector per row.
+
+    Raises:
+        ValueError: If step does not divide 1 evenly or n_assets is not positive.
+    """
+    n_steps = int(round(1 / step))
+    if n_assets <= 0 or n_steps <= 0 or not np.isclose(n_steps * step, 1.0):
+        raise ValueError("Allocation step must divide 100% evenly")
+
+    # Stars and bars: choose n_assets - 1 divider positions among the slots
+    positions = list(combinations(range(n_steps + n_assets - 1), n_assets - 1))
+    dividers = np.array(positions, dtype=np.int64).reshape(len(positions), n_assets - 1)
+    edges = np.hstack([
+        np.full((len(dividers), 1), -1),
+        dividers,
+        np.full((len(dividers), 1), n_steps + n_assets - 1),
+    ])
+    return (np.diff(edges, axis=1) - 1) / n_steps
+
+@timed('allocation_sweep')
+def run_allocation_sweep(
+    params: SimulationParams,
+    asset_names: Optional[Sequence[str]] = None,
+    step: float = SimulationConfig.SWEEP_STEP
+) -> pd.DataFrame:
+    """
+    Evaluate a grid of allocations in one batched computation.
+
+    All allocations share the same sampled return paths. Only the
+    portfolio size, withdrawal strategy, duration and sampling settings of
+    params are used; params.assets and params.glide_path are ignored in favour
+    of the swept grid of static allocations.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        asset_names: Assets to sweep over. Defaults to every asset in
+            SimulationConfig.ASSET_TICKERS.
+        step: Allocation grid spacing.
+
+    Returns:
+        DataFrame with one row per allocation: a weight column per asset, the
+        depletion risk and the 5th, median and 95th percentile final values.
+
+    Raises:
+        ValueError: If historical data is insufficient or the grid is invalid.
+    """
+    try:
+        asset_names = list(asset_names or SimulationConfig.ASSET_TICKERS.keys())
+        params = replace(params, glide_path=None)
+        tickers = tuple(SimulationConfig.ASSET_TICKERS[name] for name in asset_names)
+        returns = get_returns_store(params.periods_per_year).matrix(tickers)
+        grid = allocation_grid(len(asset_names), step)
+
+        blocks = list(iter_path_blocks(len(returns), params))
+        n_paths = sum(len(block) if isinstance(block, np.ndarray) else block[0] for block in blocks)
+
+        # One blended series per allocation, simulated in memory-bounded chunks.
+        # Blocks are seeded, so every chunk sees the same paths.
+        chunk = max(1, SimulationConfig.SWEEP_CHUNK_ELEMENTS // (n_paths * params.n_periods))
+        depletion = np.empty(len(grid))
+        final_percentiles = np.empty((3, len(grid)))
+
+        for begin in range(0, len(grid), chunk):
+            end = min(begin + chunk, len(grid))
+            portfolio_returns = np.concatenate([
+                block_portfolio_returns(returns, grid[begin:end].T, block, params) for block in blocks
+            ])
+            final_values, depleted = simulate_portfolios(
+                portfolio_returns, params.initial_portfolio, params.period_withdrawal, keep_history=False,
+                strategy=get_withdrawal_strategy(params), kernel=params.kernel
+            )
+            depletion[begin:end] = depleted.mean(axis=0)
+            final_percentiles[:, begin:end] = np.percentile(final_values, [5, 50, 95], axis=0)
+
+        sweep = pd.DataFrame(grid, columns=asset_names)
+        sweep['Depletion Risk'] = depletion
+        sweep['5th'] = final_percentiles[0]
+        sweep['Median'] = final_percentiles[1]
+        sweep['95th'] = final_percentiles[2]
+        logger.info(f"Evaluated {len(grid)} allocations over {n_paths} paths")
+        return sweep
+
+    except Exception as e:
+        logger.error(f"Allocation sweep failed: {e}")
+        raise
+
+def _simulate_block(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    block: Any,
+    params: SimulationParams,
+    progress: Optional[Callable[[int], None]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate one block of paths and keep year-end values; runs in a worker process when parallel.
+
+    With a progress callback the recurrence runs PROGRESS_STEP paths at a time
+    and reports the paths of the block completed so far after each step.
+    Paths are independent, so the result is the same either way.
+    """
+    portfolio_returns = block_portfolio_returns(returns, weights, block, params)
+    step = len(portfolio_returns) if progress is None else SimulationConfig.PROGRESS_STEP
+    results = []
+    for begin in range(0, len(portfolio_returns), max(step, 1)):
+        results.append(simulate_portfolios(
+            portfolio_returns[begin:begin + step], params.initial_portfolio, params.period_withdrawal,
+            strategy=get_withdrawal_strategy(params), kernel=params.kernel
+        ))
+        if progress is not None:
+            progress(begin + len(results[-1][1]))
+    histories = np.concatenate([histories for histories, _ in results])
+    depleted = np.concatenate([depleted for _, depleted in results])
+    return to_yearly(histories, params.periods_per_year), depleted
+
+def _summarize_block(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    block: Any,
+    params: SimulationParams,
+    progress: Optional[Callable[[int], None]] = None
+) -> Tuple[PercentileSketch, int, np.ndarray, np.ndarray]:
+    """Simulate one block of paths and reduce it to a sketch, depletion count and best/worst paths."""
+    histories, depleted = _simulate_block(returns, weights, block, params, progress)
+    sketch = PercentileSketch(params.retirement_years, max(params.initial_portfolio, params.annual_withdrawal))
+    sketch.update(histories)
+    final_values = histories[:, -1]
+    return sketch, int(depleted.sum()), histories[np.argmax(final_values)], histories[np.argmin(final_values)]
+
+def _run_attached_block(
+    function: Callable[[np.ndarray, np.ndarray, Any, SimulationParams], Any],
+    weights: np.ndarray,
+    block: Any,
+    params: SimulationParams
+) -> Any:
+    """Run a block function in a worker against the attached shared returns."""
+    returns, _ = prepare_returns(params)
+    return function(returns, weights, block, params)
+
+def _map_blocks(
+    function: Callable[[np.ndarray, np.ndarray, Any, SimulationParams], Any],
+    returns: np.ndarray,
+    weights: np.ndarray,
+    blocks: Iterator[Any],
+    params: SimulationParams,
+    n_workers: Optional[int],
+    progress: Optional[Callable[[int], None]] = None
+) -> Iterator[Any]:
+    """
+    Apply a block function to every block of paths, in order.
+
+    In-process runs pass progress to the block function, which reports the
+    paths of the current block completed so far; worker processes cannot
+    call back, so parallel runs only report between blocks.
+
+    With n_workers > 1 the blocks run on a process pool, keeping at most two
+    blocks per worker in flight so memory stays bounded. Workers attach to the
+    shared returns segment and rebuild the matrix with prepare_returns, so the
+    returns are never pickled per block; if the store cannot be shared they
+    are sent with every block instead. Blocks still queued when the consumer
+    stops early (or raises) are cancelled.
+    """
+    if not n_workers or n_workers <= 1:
+        for block in blocks:
+            yield function(returns, weights, block, params, progress)
+        return
+
+    manifest_path, shared_dir = None, None
+    if MarketDataConfig.SHARE_RETURNS:
+        try:
+            # A private directory per run, so returns published in this process never replace the user-wide segment
+            shared_dir = tempfile.mkdtemp(prefix='retirement-returns-')
+            manifest_path = get_returns_store(params.periods_per_year).share(shared_dir)
+        except OSError as e:
+            logger.warning(f"Sending returns to workers with every block: {e}")
+
+    if manifest_path is not None:
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=attach_shared_returns,
+                                       initargs=({params.periods_per_year: manifest_path},))
+        task, task_args = _run_attached_block, (function, weights)
+    else:
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+        task, task_args = function, (returns, weights)
+
+    try:
+        with executor:
+            pending = deque()
+            try:
+                for block in blocks:
+                    pending.append(executor.submit(task, *task_args, block, params))
+                    if len(pending) >= 2 * n_workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+    finally:
+        if shared_dir is not None:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+class _SummaryAccumulator:
+    """Per-year percentile sketches, depletion count and best/worst paths folded from summarized blocks."""
+
+    def __init__(self, params: SimulationParams):
+        self.sketch = PercentileSketch(params.retirement_years, max(params.initial_portfolio, params.annual_withdrawal))
+        self.depletion_count = 0
+        self.best_simulation: Optional[np.ndarray] = None
+        self.worst_simulation: Optional[np.ndarray] = None
+        self.stopped = False
+
+    @property
+    def n_paths(self) -> int:
+        return self.sketch.n_paths
+
+    def add(self, block_sketch: PercentileSketch, block_depleted: int, block_best: np.ndarray,
+            block_worst: np.ndarray) -> None:
+        """Fold in the result of one _summarize_block call."""
+        self.sketch.merge(block_sketch)
+        self.depletion_count += block_depleted
+        if self.best_simulation is None or block_best[-1] > self.best_simulation[-1]:
+            self.best_simulation = block_best
+        if self.worst_simulation is None or block_worst[-1] < self.worst_simulation[-1]:
+            self.worst_simulation = block_worst
+
+    def summary(self, **kwargs: Any) -> SimulationSummary:
+        """SimulationSummary of every path folded in so far; kwargs set the remaining fields."""
+        return SimulationSummary(
+            percentiles=pd.DataFrame(self.sketch.quantiles(PERCENTILES).T, columns=PERCENTILE_LABELS),
+            depletion_prob=self.depletion_count / self.n_paths,
+            best_simulation=self.best_simulation.tolist(),
+            worst_simulation=self.worst_simulation.tolist(),
+            n_paths=self.n_paths,
+            **kwargs
+        )
+
+def _accumulate_summaries(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    blocks: Iterator[Any],
+    params: SimulationParams,
+    n_workers: Optional[int],
+    progress: Optional[Callable[[int], None]] = None,
+    stop: Optional[Callable[[_SummaryAccumulator], bool]] = None
+) -> _SummaryAccumulator:
+    """
+    Summarize blocks of paths and fold them together, reporting progress after every block.
+
+    Args:
+        stop: Checked after every block; returning True skips the remaining
+            blocks and marks the accumulator as stopped.
+    """
+    summaries = _SummaryAccumulator(params)
+    block_progress = None if progress is None else (lambda paths: progress(summaries.n_paths + paths))
+    with closing(_map_blocks(_summarize_block, returns, weights, blocks, params, n_workers,
+                             block_progress)) as results:
+        for result in results:
+            summaries.add(*result)
+            if progress is not None:
+                progress(summaries.n_paths)
+            if stop is not None and stop(summaries):
+                summaries.stopped = True
+                break
+    return summaries
+
+@timed('simulation')
+def run_retirement_simulation(
+    params: SimulationParams,
+    n_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
 ) -> Tuple[pd.DataFrame, float, List[float], List[float]]:
     """
     Run a Monte Carlo simulation for retirement portfolio analysis.
-    
+
+    Paths are simulated in fixed-size blocks, each seeded from params.seed, so
+    the same seed gives bit-identical results for any number of workers.
+
     Args:
         params: SimulationParams object containing simulation parameters.
-    
+        n_workers: Number of worker processes. None or 1 runs in-process.
+        progress: Called with the number of paths completed, every
+            PROGRESS_STEP paths in-process and after every block with workers.
+            A SimulationCancelled raised by the callback stops the run.
+
     Returns:
         Tuple containing:
             - DataFrame with simulation results
             - Probability of portfolio depletion
             - Best case simulation history
             - Worst case simulation history
-            
+
     Raises:
         ValueError: If historical data is insufficient or other validation fails.
     """
     try:
-        tickers = tuple(asset['ticker'] for asset in params.assets.values())  # Convert to tuple
-        # Use pre-fetched data
-        returns_data = get_asset_data(tickers)
-        
-        simulations = []
-        depletion_count = 0
-        best_simulation = None
-        worst_simulation = None
-        best_final_value = float('-inf')
-        worst_final_value = float('inf')
-
-        for _ in range(params.n_simulations):
-            portfolio = params.initial_portfolio
-            history = []
-            depleted = False
-            
-            max_start = len(returns_data) - params.retirement_years
-            if max_start <= 0:
-                raise ValueError("Insufficient historical data for simulation period")
-            
-            start_idx = np.random.randint(0, max_start)
-            selected_returns = returns_data.iloc[start_idx:start_idx+params.retirement_years]
-            
-            for year in range(params.retirement_years):
-                if portfolio <= 0:
-                    depleted = True
-                    break
-                
-                portfolio -= params.annual_withdrawal
-
-                for _, asset_info in params.assets.items():
-                    ticker = asset_info['ticker']
-                    allocation = asset_info['allocation']
-                    asset_return = selected_returns.iloc[year][ticker]
-                    portfolio += portfolio * allocation * asset_return
-
-                history.append(portfolio)
-            
-            if depleted or portfolio <= 0:
-                depletion_count += 1
-                history += [0] * (params.retirement_years - len(history))
-                
-            final_value = history[-1] if history else 0
-            if final_value > best_final_value:
-                best_final_value = final_value
-                best_simulation = history.copy()
-            if final_value < worst_final_value:
-                worst_final_value = final_value
-                worst_simulation = history.copy()
-                
-            simulations.append(history)
-
-        results_df = pd.DataFrame(simulations)
-        return results_df, depletion_count / params.n_simulations, best_simulation, worst_simulation
+        returns, weights = prepare_returns(params)
+        blocks = iter_path_blocks(len(returns), params)
+        results = []
+        completed = 0
+        block_progress = None if progress is None else (lambda paths: progress(completed + paths))
+        with closing(_map_blocks(_simulate_block, returns, weights, blocks, params, n_workers,
+                                 block_progress)) as blocks_done:
+            for block_histories, block_depleted in blocks_done:
+                results.append((block_histories, block_depleted))
+                completed += len(block_depleted)
+                if progress is not None:
+                    progress(completed)
+        histories = np.concatenate([block_histories for block_histories, _ in results])
+        depleted = np.concatenate([block_depleted for _, block_depleted in results])
+
+        final_values = histories[:, -1]
+        best_simulation = histories[np.argmax(final_values)].tolist()
+        worst_simulation = histories[np.argmin(final_values)].tolist()
 
+        results_df = pd.DataFrame(histories)
+        return results_df, float(depleted.mean()), best_simulation, worst_simulation
+
+    except SimulationCancelled:
+        raise
     except Exception as e:
         logger.error(f"Simulation failed: {e}")
         raise
+
+@timed('streaming_simulation')
+def run_streaming_simulation(
+    params: SimulationParams,
+    n_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> SimulationSummary:
+    """
+    Run a Monte Carlo simulation in chunks without materializing every path.
+
+    Each block of paths is simulated, folded into per-year percentile sketches,
+    depletion counts and the running best/worst paths, then discarded, so
+    memory stays bounded regardless of params.n_simulations. Blocks and seeds
+    match run_retirement_simulation, so both see the same paths.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        n_workers: Number of worker processes. None or 1 runs in-process.
+        progress: Called with the number of paths completed, every
+            PROGRESS_STEP paths in-process and after every block with workers.
+            A SimulationCancelled raised by the callback stops the run.
+
+    Returns:
+        SimulationSummary with per-year percentiles, depletion probability and
+        best/worst case histories.
+
+    Raises:
+        ValueError: If historical data is insufficient or other validation fails.
+    """
+    try:
+        returns, weights = prepare_returns(params)
+        blocks = iter_path_blocks(len(returns), params)
+        return _accumulate_summaries(returns, weights, blocks, params, n_workers, progress).summary()
+
+    except SimulationCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Streaming simulation failed: {e}")
+        raise
+
+@timed('adaptive_simulation')
+def run_adaptive_simulation(
+    params: SimulationParams,
+    tolerance: float,
+    metric: str = SimulationConfig.ADAPTIVE_METRIC_DEPLETION,
+    confidence: float = SimulationConfig.ADAPTIVE_CONFIDENCE,
+    max_paths: int = SimulationConfig.ADAPTIVE_MAX_PATHS,
+    n_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> SimulationSummary:
+    """
+    Add batches of paths until the estimate of interest is precise enough.
+
+    After every batch of ADAPTIVE_BATCH_SIZE paths (and at least
+    ADAPTIVE_MIN_PATHS in total) the confidence interval half-width is compared
+    with the tolerance. params.n_simulations is ignored. With variance
+    reduction the intervals assume independent paths and are conservative.
+
+    Args:
+        params: SimulationParams object containing simulation parameters.
+        tolerance: Target half-width: an absolute probability for 'depletion',
+            or a fraction of the initial portfolio for 'median'.
+        metric: 'depletion' for the depletion probability or 'median' for the
+            final-year median portfolio value.
+        confidence: Confidence level of the interval.
+        max_paths: Upper bound on the number of paths.
+        n_workers: Number of worker processes. None or 1 runs in-process.
+        progress: Called with the number of paths completed, every
+            PROGRESS_STEP paths in-process and after every block with workers.
+            A SimulationCancelled raised by the callback stops the run.
+
+    Returns:
+        SimulationSummary including the achieved half-widths and whether the
+        tolerance was met before max_paths.
+
+    Raises:
+        ValueError: If the settings are invalid or historical data is insufficient.
+    """
+    if metric not in (SimulationConfig.ADAPTIVE_METRIC_DEPLETION, SimulationConfig.ADAPTIVE_METRIC_MEDIAN):
+        raise ValueError(f"Unknown convergence metric: {metric}")
+    if tolerance <= 0 or not 0 < confidence < 1:
+        raise ValueError("Tolerance must be positive and confidence between 0 and 1")
+    if params.sampling == SimulationConfig.SAMPLING_HISTORICAL:
+        raise ValueError("Adaptive runs need random sampling; all historical windows is already exact")
+
+    try:
+        returns, weights = prepare_returns(params)
+        blocks = iter_adaptive_blocks(len(returns), params, SimulationConfig.ADAPTIVE_BATCH_SIZE, max_paths)
+
+        def precise_enough(summaries: _SummaryAccumulator) -> bool:
+            if summaries.n_paths < SimulationConfig.ADAPTIVE_MIN_PATHS:
+                return False
+            if metric == SimulationConfig.ADAPTIVE_METRIC_DEPLETION:
+                precision = depletion_half_width(summaries.depletion_count, summaries.n_paths, confidence)
+            else:
+                precision = median_half_width(summaries.sketch, confidence) / max(params.initial_portfolio, 1.0)
+            return precision <= tolerance
+
+        summaries = _accumulate_summaries(returns, weights, blocks, params, n_workers, progress, precise_enough)
+        n_paths = summaries.n_paths
+        logger.info(f"Adaptive run {'converged' if summaries.stopped else 'stopped'} after {n_paths} paths")
+        return summaries.summary(
+            confidence=confidence,
+            depletion_half_width=depletion_half_width(summaries.depletion_count, n_paths, confidence),
+            median_half_width=median_half_width(summaries.sketch, confidence),
+            converged=summaries.stopped
+        )
+
+    except SimulationCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Adaptive simulation failed: {e}")
+        raise
+
+def summarize_histories(histories: np.ndarray, depleted: np.ndarray) -> SimulationSummary:
+    """
+    Build an exact SimulationSummary from fully materialized paths.
+
+    Args:
+        histories: Path histories of shape (paths, years).
+        depleted: Boolean depletion mask of shape (paths,).
+
+    Returns:
+        SimulationSummary with exact per-year percentiles.
+    """
+    percentiles = pd.DataFrame(np.quantile(histories, PERCENTILES, axis=0).T, columns=PERCENTILE_LABELS)
+    final_values = histories[:, -1]
+    return SimulationSummary(
+        percentiles=percentiles,
+        depletion_prob=float(depleted.mean()),
+        best_simulation=histories[np.argmax(final_values)].tolist(),
+        worst_simulation=histories[np.argmin(final_values)].tolist(),
+        n_paths=len(histories)
+    )
+
+@timed('what_if')
+def simulate_what_if(
+    portfolio_returns: np.ndarray,
+    initial_portfolio: float,
+    annual_withdrawal: float,
+    periods_per_year: int = 1,
+    strategy: Optional[WithdrawalStrategy] = None,
+    kernel: str = SimulationConfig.KERNEL_NUMPY
+) -> SimulationSummary:
+    """
+    Re-run only the withdrawal recurrence over previously sampled portfolio returns.
+
+    Args:
+        portfolio_returns: Cached blended returns of shape (paths, periods).
+        initial_portfolio: Starting portfolio value.
+        annual_withdrawal: Amount withdrawn per year, spread evenly over its periods.
+        periods_per_year: Simulation steps per year of portfolio_returns.
+        strategy: Withdrawal strategy for the new portfolio size and withdrawal;
+            None withdraws the same amount every year.
+        kernel: Recurrence implementation, see simulate_portfolios.
+
+    Returns:
+        SimulationSummary for the new portfolio size and withdrawal.
+    """
+    histories, depleted = simulate_portfolios(
+        portfolio_returns, initial_portfolio, annual_withdrawal / periods_per_year, strategy=strategy, kernel=kernel
+    )
+    return summarize_histories(to_yearly(histories, periods_per_year), depleted)
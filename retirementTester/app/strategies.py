@@ -0,0 +1,148 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Type, Union
+import numpy as np
+from .utils import SimulationConfig, SimulationParams
+
+class WithdrawalStrategy(ABC):
+    """
+    Rule for the amount withdrawn at the start of every simulation period.
+
+    A strategy instance serves one batch of paths and may keep per-path state
+    between periods. Each call handles every path at once as an array
+    operation, so there are no per-path Python loops.
+
+    can_deplete is False for rules whose depletion risk does not grow with the
+    withdrawal amount, which therefore have no maximum safe withdrawal.
+    """
+    can_deplete: bool = True
+
+    def __init__(self, initial_portfolio: float, annual_withdrawal: float, periods_per_year: int = 1):
+        self.initial_portfolio = float(initial_portfolio)
+        self.annual_withdrawal = float(annual_withdrawal)
+        self.periods_per_year = periods_per_year
+
+    @abstractmethod
+    def withdrawal(self, period: int, portfolio: np.ndarray) -> Union[float, np.ndarray]:
+        """
+        Amount to withdraw at the start of a period.
+
+        Args:
+            period: Index of the period, starting at 0.
+            portfolio: Value of every path before the withdrawal, shape (paths, ...).
+
+        Returns:
+            A scalar applied to every path, or an array broadcastable to portfolio.
+        """
+
+class FixedWithdrawal(WithdrawalStrategy):
+    """The same nominal amount every year."""
+
+    def withdrawal(self, period: int, portfolio: np.ndarray) -> float:
+        return self.annual_withdrawal / self.periods_per_year
+
+class InflationIndexedWithdrawal(WithdrawalStrategy):
+    """The initial withdrawal raised every year by a constant inflation rate."""
+
+    def __init__(self, initial_portfolio: float, annual_withdrawal: float, periods_per_year: int = 1,
+                 inflation_rate: float = SimulationConfig.INFLATION_RATE):
+        super().__init__(initial_portfolio, annual_withdrawal, periods_per_year)
+        self.inflation_rate = inflation_rate
+
+    def withdrawal(self, period: int, portfolio: np.ndarray) -> float:
+        year = period // self.periods_per_year
+        return self.annual_withdrawal * (1.0 + self.inflation_rate) ** year / self.periods_per_year
+
+class PercentOfPortfolioWithdrawal(WithdrawalStrategy):
+    """
+    A fixed fraction of the portfolio at the start of each year.
+
+    The fraction is the initial withdrawal rate (annual_withdrawal /
+    initial_portfolio), which SimulationParams keeps below 1. The yearly amount
+    is set at the start of the year and spread evenly over its periods, so
+    portfolios never fully deplete.
+    """
+    can_deplete = False
+
+    def __init__(self, initial_portfolio: float, annual_withdrawal: float, periods_per_year: int = 1):
+        super().__init__(initial_portfolio, annual_withdrawal, periods_per_year)
+        self.rate = self.annual_withdrawal / max(self.initial_portfolio, 1.0)
+        self._yearly = None
+
+    def withdrawal(self, period: int, portfolio: np.ndarray) -> np.ndarray:
+        if period % self.periods_per_year == 0:
+            self._yearly = self.rate * portfolio
+        return self._yearly / self.periods_per_year
+
+class GuardrailWithdrawal(WithdrawalStrategy):
+    """
+    Guyton-Klinger style guardrails around the initial withdrawal rate.
+
+    Every year the withdrawal is raised by inflation, then cut by
+    GUARDRAIL_ADJUSTMENT if the current withdrawal rate is more than
+    GUARDRAIL_BAND above the initial rate, or raised by the same step if it
+    is more than GUARDRAIL_BAND below it. Each path tracks its own withdrawal.
+    """
+
+    def __init__(self, initial_portfolio: float, annual_withdrawal: float, periods_per_year: int = 1,
+                 inflation_rate: float = SimulationConfig.INFLATION_RATE,
+                 band: float = SimulationConfig.GUARDRAIL_BAND,
+                 adjustment: float = SimulationConfig.GUARDRAIL_ADJUSTMENT):
+        super().__init__(initial_portfolio, annual_withdrawal, periods_per_year)
+        self.inflation_rate = inflation_rate
+        self.initial_rate = self.annual_withdrawal / max(self.initial_portfolio, 1.0)
+        self.band = band
+        self.adjustment = adjustment
+        self._yearly = None
+
+    def withdrawal(self, period: int, portfolio: np.ndarray) -> np.ndarray:
+        if period % self.periods_per_year == 0:
+            if self._yearly is None:
+                self._yearly = np.full(portfolio.shape, self.annual_withdrawal)
+            else:
+                self._yearly = self._yearly * (1.0 + self.inflation_rate)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    rate = self._yearly / portfolio
+                self._yearly = np.where(rate > self.initial_rate * (1 + self.band),
+                                        self._yearly * (1 - self.adjustment), self._yearly)
+                self._yearly = np.where(rate < self.initial_rate * (1 - self.band),
+                                        self._yearly * (1 + self.adjustment), self._yearly)
+        return self._yearly / self.periods_per_year
+
+WITHDRAWAL_STRATEGIES: Dict[str, Type[WithdrawalStrategy]] = {
+    SimulationConfig.WITHDRAWAL_FIXED: FixedWithdrawal,
+    SimulationConfig.WITHDRAWAL_INFLATION_INDEXED: InflationIndexedWithdrawal,
+    SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO: PercentOfPortfolioWithdrawal,
+    SimulationConfig.WITHDRAWAL_GUARDRAILS: GuardrailWithdrawal,
+}
+
+def get_withdrawal_strategy(params: SimulationParams) -> WithdrawalStrategy:
+    """
+    Create a fresh withdrawal strategy for one batch of paths.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+    """
+    if params.withdrawal_strategy not in WITHDRAWAL_STRATEGIES:
+        raise ValueError(f"Withdrawal strategy must be one of {list(WITHDRAWAL_STRATEGIES)}")
+    strategy = WITHDRAWAL_STRATEGIES[params.withdrawal_strategy]
+    if strategy in (InflationIndexedWithdrawal, GuardrailWithdrawal):
+        return strategy(params.initial_portfolio, params.annual_withdrawal, params.periods_per_year,
+                        inflation_rate=params.inflation_rate)
+    return strategy(params.initial_portfolio, params.annual_withdrawal, params.periods_per_year)
+
+def allocation_schedule(params: SimulationParams) -> np.ndarray:
+    """
+    Target weights of every period for a glide path.
+
+    Weights move linearly, once a year, from the initial allocation in the
+    first year to params.glide_path in the last year, and the portfolio is
+    rebalanced to them every period.
+
+    Returns:
+        Array of shape (n_periods, assets), columns in params.assets order.
+    """
+    start = np.array([asset['allocation'] for asset in params.assets.values()], dtype=np.float64)
+    end = np.array([params.glide_path.get(name, 0.0) for name in params.assets], dtype=np.float64)
+    years = np.arange(params.n_periods) // params.periods_per_year
+    progress = years / max(params.retirement_years - 1, 1)
+    return start + progress[:, None] * (end - start)
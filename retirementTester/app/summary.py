@@ -0,0 +1,165 @@
+from dataclasses import dataclass, replace
+from statistics import NormalDist
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+from .utils import SimulationConfig
+
+PERCENTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+PERCENTILE_LABELS = ['5th', '25th', 'Median', '75th', '95th']
+
+class PercentileSketch:
+    """
+    Mergeable per-year histogram of portfolio values on a log scale.
+
+    Bins span SKETCH_DECADES decades either side of a reference scale, so
+    percentiles are accurate to a fraction of a percent while memory stays
+    fixed at (years x bins) counters no matter how many paths are added.
+    Depleted (non-positive) values are counted exactly in a separate bin.
+    """
+
+    def __init__(
+        self,
+        n_years: int,
+        scale: float,
+        bins_per_decade: int = SimulationConfig.SKETCH_BINS_PER_DECADE,
+        decades: int = SimulationConfig.SKETCH_DECADES
+    ):
+        center = np.log10(max(scale, 1.0))
+        self.n_years = n_years
+        self.n_bins = 2 * decades * bins_per_decade
+        self.log_edges = np.linspace(center - decades, center + decades, self.n_bins + 1)
+        # Column 0 holds depleted paths, columns 1..n_bins the log-spaced bins
+        self.counts = np.zeros((n_years, self.n_bins + 1), dtype=np.int64)
+
+    @property
+    def n_paths(self) -> int:
+        """Number of paths added to the sketch."""
+        return int(self.counts[0].sum()) if self.n_years else 0
+
+    def update(self, histories: np.ndarray) -> None:
+        """Add a (paths x years) block of portfolio values to the sketch."""
+        positive = histories > 0
+        logs = np.log10(np.where(positive, histories, 1.0))
+        bins = np.clip(np.searchsorted(self.log_edges, logs, side='right'), 1, self.n_bins)
+        bins = np.where(positive, bins, 0)
+        flat = bins + np.arange(self.n_years) * (self.n_bins + 1)
+        self.counts += np.bincount(flat.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other: 'PercentileSketch') -> None:
+        """Add the counts of a sketch built with the same bins."""
+        self.counts += other.counts
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """
+        Estimate quantiles for every year.
+
+        Returns:
+            Array of shape (len(qs), years), interpolated geometrically within bins.
+        """
+        result = np.zeros((len(qs), self.n_years))
+        cumulative = np.cumsum(self.counts, axis=1)
+        total = cumulative[:, -1]
+        years = np.arange(self.n_years)
+        for i, q in enumerate(qs):
+            target = q * total
+            # First bin whose cumulative count reaches the target; bin 0 means depleted
+            k = np.minimum((cumulative < target[:, None]).sum(axis=1), self.n_bins)
+            inside = (k > 0) & (total > 0)
+            k = np.maximum(k, 1)
+            counts = np.maximum(self.counts[years, k], 1)
+            fraction = (target - cumulative[years, k - 1]) / counts
+            lower, upper = self.log_edges[k - 1], self.log_edges[k]
+            result[i] = np.where(inside, 10 ** (lower + fraction * (upper - lower)), 0.0)
+        return result
+
+def z_score(confidence: float) -> float:
+    """Two-sided standard normal critical value for a confidence level."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+def depletion_half_width(n_depleted: int, n_paths: int, confidence: float) -> float:
+    """
+    Half-width of the Agresti-Coull confidence interval on the depletion probability.
+
+    Unlike the plain normal interval it stays positive when no path (or every
+    path) is depleted, so a handful of paths cannot look converged.
+    """
+    z = z_score(confidence)
+    n = n_paths + z ** 2
+    p = (n_depleted + z ** 2 / 2) / n
+    return float(z * np.sqrt(p * (1 - p) / n))
+
+def median_half_width(sketch: PercentileSketch, confidence: float) -> float:
+    """
+    Half-width of the distribution-free confidence interval on the final-year median.
+
+    The interval spans the order statistics at ranks n/2 -/+ z*sqrt(n)/2,
+    read from the sketch.
+    """
+    offset = z_score(confidence) * 0.5 / np.sqrt(max(sketch.n_paths, 1))
+    lower, upper = sketch.quantiles([max(0.5 - offset, 0.0), min(0.5 + offset, 1.0)])[:, -1]
+    return float(upper - lower) / 2
+
+@dataclass
+class SimulationSummary:
+    """
+    Compact summary of a simulation run, independent of the number of paths.
+
+    Adaptive runs also report the achieved precision: confidence interval
+    half-widths on the depletion probability and on the final median value.
+    """
+    percentiles: pd.DataFrame
+    depletion_prob: float
+    best_simulation: Sequence[float]
+    worst_simulation: Sequence[float]
+    n_paths: int
+    confidence: Optional[float] = None
+    depletion_half_width: Optional[float] = None
+    median_half_width: Optional[float] = None
+    converged: Optional[bool] = None
+
+    @classmethod
+    def from_results(
+        cls,
+        results_df: pd.DataFrame,
+        depletion_prob: float,
+        best_simulation: Sequence[float],
+        worst_simulation: Sequence[float]
+    ) -> 'SimulationSummary':
+        """Summarize a full (paths x years) results DataFrame with exact percentile bands."""
+        percentiles = np.quantile(results_df.to_numpy(), PERCENTILES, axis=0).T
+        return cls(
+            percentiles=pd.DataFrame(percentiles, columns=PERCENTILE_LABELS),
+            depletion_prob=depletion_prob,
+            best_simulation=list(best_simulation),
+            worst_simulation=list(worst_simulation),
+            n_paths=len(results_df)
+        )
+
+    @property
+    def median_final_value(self) -> float:
+        """Median portfolio value in the final year."""
+        return float(self.percentiles['Median'].iloc[-1])
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the bands and paths, for cache budgets."""
+        paths = sum(
+            path.nbytes if isinstance(path, np.ndarray) else 32 * len(path)
+            for path in (self.best_simulation, self.worst_simulation)
+        )
+        return int(self.percentiles.memory_usage(index=True, deep=False).sum()) + paths
+
+    def compact(self) -> 'SimulationSummary':
+        """
+        Copy of the summary with float32 bands and best/worst paths.
+
+        Used for results kept per session; float32 keeps about seven
+        significant digits, well within what the charts and headline figures show.
+        """
+        return replace(
+            self,
+            percentiles=self.percentiles.astype(np.float32),
+            best_simulation=np.asarray(self.best_simulation, dtype=np.float32),
+            worst_simulation=np.asarray(self.worst_simulation, dtype=np.float32)
+        )
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, Optional, TypedDict
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -32,6 +33,92 @@ class SimulationConfig:
     MIN_SIMS: int = 100
     MAX_SIMS: int = 10000
 
+    WITHDRAWAL_TOLERANCE: float = 1.0
+    SWEEP_STEP: float = 0.05
+    SWEEP_CHUNK_ELEMENTS: int = 5_000_000
+    SIMULATION_CHUNK_SIZE: int = 10_000
+    PROGRESS_STEP: int = 1_000  # paths between progress reports (and cancellation checks) inside a block
+    SKETCH_BINS_PER_DECADE: int = 400
+    SKETCH_DECADES: int = 6
+
+    RESULT_CACHE_BYTES: int = 256 * 1024 ** 2
+    RESULT_CACHE_DIR: Optional[str] = os.environ.get('RETIREMENT_TESTER_RESULT_CACHE_DIR')
+    RESULT_CACHE_DISK_BYTES: int = 2 * 1024 ** 3
+    GROWTH_CACHE_BYTES: int = 128 * 1024 ** 2
+    FIGURE_CACHE_BYTES: int = 64 * 1024 ** 2
+    SESSION_RESULTS_BYTES: int = 32 * 1024 ** 2  # compact results shown by sessions, least recently viewed evicted first
+
+    SAMPLING_RANDOM: str = 'random'
+    SAMPLING_HISTORICAL: str = 'historical'
+    SAMPLING_MODES: Dict[str, str] = {
+        'Random start years': SAMPLING_RANDOM,
+        'All historical windows': SAMPLING_HISTORICAL,
+    }
+
+    # Simulation steps per year and the matching pandas resampling alias
+    PERIOD_FREQUENCIES: Dict[int, str] = {1: 'YE', 4: 'QE', 12: 'ME'}
+    TIME_STEPS: Dict[str, int] = {'Annual': 1, 'Quarterly': 4, 'Monthly': 12}
+
+    RETURN_MODEL_HISTORICAL: str = 'historical'
+    RETURN_MODEL_STATIONARY_BOOTSTRAP: str = 'stationary_bootstrap'
+    RETURN_MODEL_BLOCK_BOOTSTRAP: str = 'block_bootstrap'
+    RETURN_MODEL_NORMAL: str = 'normal'
+    RETURN_MODEL_STUDENT_T: str = 'student_t'
+    RETURN_MODELS: Dict[str, str] = {
+        'Historical windows': RETURN_MODEL_HISTORICAL,
+        'Stationary bootstrap': RETURN_MODEL_STATIONARY_BOOTSTRAP,
+        'Block bootstrap': RETURN_MODEL_BLOCK_BOOTSTRAP,
+        'Multivariate normal': RETURN_MODEL_NORMAL,
+        'Multivariate Student-t': RETURN_MODEL_STUDENT_T,
+    }
+    BOOTSTRAP_BLOCK_YEARS: int = 5
+    STUDENT_T_DOF: float = 5.0
+
+    VARIANCE_REDUCTION_NONE: str = 'none'
+    VARIANCE_REDUCTION_STRATIFIED: str = 'stratified'
+    VARIANCE_REDUCTION_ANTITHETIC: str = 'antithetic'
+    VARIANCE_REDUCTION_MODES: Dict[str, str] = {
+        'None': VARIANCE_REDUCTION_NONE,
+        'Stratified start years': VARIANCE_REDUCTION_STRATIFIED,
+        'Antithetic paths': VARIANCE_REDUCTION_ANTITHETIC,
+    }
+
+    # Adaptive runs add batches until the confidence interval is tight enough
+    ADAPTIVE_METRIC_DEPLETION: str = 'depletion'
+    ADAPTIVE_METRIC_MEDIAN: str = 'median'
+    ADAPTIVE_BATCH_SIZE: int = 2_000
+    ADAPTIVE_MIN_PATHS: int = 2_000
+    ADAPTIVE_MAX_PATHS: int = 1_000_000
+    ADAPTIVE_CONFIDENCE: float = 0.95
+    ADAPTIVE_DEPLETION_TOLERANCE: float = 0.005
+    ADAPTIVE_MEDIAN_TOLERANCE: float = 0.02
+
+    WITHDRAWAL_FIXED: str = 'fixed'
+    WITHDRAWAL_INFLATION_INDEXED: str = 'inflation_indexed'
+    WITHDRAWAL_PERCENT_OF_PORTFOLIO: str = 'percent_of_portfolio'
+    WITHDRAWAL_GUARDRAILS: str = 'guardrails'
+    WITHDRAWAL_STRATEGIES: Dict[str, str] = {
+        'Fixed amount': WITHDRAWAL_FIXED,
+        'Inflation-indexed': WITHDRAWAL_INFLATION_INDEXED,
+        'Percent of portfolio': WITHDRAWAL_PERCENT_OF_PORTFOLIO,
+        'Guardrails': WITHDRAWAL_GUARDRAILS,
+    }
+    INFLATION_RATE: float = 0.025
+    MAX_INFLATION_RATE: float = 0.5
+    # Guardrails cut or raise the withdrawal by ADJUSTMENT when its rate drifts BAND from the initial rate
+    GUARDRAIL_BAND: float = 0.20
+    GUARDRAIL_ADJUSTMENT: float = 0.10
+
+    # The compiled kernel needs numba and falls back to NumPy without it
+    KERNEL_NUMPY: str = 'numpy'
+    KERNEL_NUMBA: str = 'numba'
+    KERNELS: Dict[str, str] = {
+        'NumPy': KERNEL_NUMPY,
+        'Compiled (numba)': KERNEL_NUMBA,
+    }
+    DEFAULT_KERNEL: str = os.environ.get('RETIREMENT_TESTER_KERNEL', KERNEL_NUMPY)
+    KERNEL_RTOL: float = 1e-9
+
 @dataclass
 class SimulationParams:
     """Data class for simulation parameters with validation."""
@@ -40,15 +127,77 @@ class SimulationParams:
     retirement_years: int
     n_simulations: int
     assets: Dict[str, AssetInfo]
+    sampling: str = SimulationConfig.SAMPLING_RANDOM
+    seed: Optional[int] = None
+    periods_per_year: int = 1
+    return_model: str = SimulationConfig.RETURN_MODEL_HISTORICAL
+    variance_reduction: str = SimulationConfig.VARIANCE_REDUCTION_NONE
+    withdrawal_strategy: str = SimulationConfig.WITHDRAWAL_FIXED
+    inflation_rate: float = SimulationConfig.INFLATION_RATE
+    glide_path: Optional[Dict[str, float]] = None
+    kernel: str = SimulationConfig.DEFAULT_KERNEL
 
     def __post_init__(self) -> None:
         """Validate parameters after initialization."""
         self._validate_parameters()
 
+    @property
+    def n_periods(self) -> int:
+        """Number of simulation steps over the whole retirement."""
+        return self.retirement_years * self.periods_per_year
+
+    @property
+    def period_withdrawal(self) -> float:
+        """Amount withdrawn at the start of every simulation step."""
+        return self.annual_withdrawal / self.periods_per_year
+
     def _validate_parameters(self) -> None:
         """Validate all simulation parameters."""
         if not SimulationConfig.MIN_PORTFOLIO <= self.initial_portfolio <= SimulationConfig.MAX_PORTFOLIO:
             raise ValueError(f"Initial portfolio must be between {SimulationConfig.MIN_PORTFOLIO} and {SimulationConfig.MAX_PORTFOLIO}")
+        # Chained comparisons are False for NaN, so non-finite amounts fail these range checks too
+        if not SimulationConfig.MIN_WITHDRAWAL <= self.annual_withdrawal <= SimulationConfig.MAX_WITHDRAWAL:
+            raise ValueError(f"Annual withdrawal must be between {SimulationConfig.MIN_WITHDRAWAL} and {SimulationConfig.MAX_WITHDRAWAL}")
+        if not SimulationConfig.MIN_YEARS <= self.retirement_years <= SimulationConfig.MAX_YEARS:
+            raise ValueError(f"Retirement duration must be between {SimulationConfig.MIN_YEARS} and {SimulationConfig.MAX_YEARS} years")
+        if self.sampling not in SimulationConfig.SAMPLING_MODES.values():
+            raise ValueError(f"Sampling mode must be one of {list(SimulationConfig.SAMPLING_MODES.values())}")
+        if self.periods_per_year not in SimulationConfig.PERIOD_FREQUENCIES:
+            raise ValueError(f"Periods per year must be one of {list(SimulationConfig.PERIOD_FREQUENCIES)}")
+        if self.return_model not in SimulationConfig.RETURN_MODELS.values():
+            raise ValueError(f"Return model must be one of {list(SimulationConfig.RETURN_MODELS.values())}")
+        if (self.sampling == SimulationConfig.SAMPLING_HISTORICAL
+                and self.return_model != SimulationConfig.RETURN_MODEL_HISTORICAL):
+            raise ValueError("Evaluating all historical windows requires the historical return model")
+        if self.variance_reduction not in SimulationConfig.VARIANCE_REDUCTION_MODES.values():
+            raise ValueError(
+                f"Variance reduction must be one of {list(SimulationConfig.VARIANCE_REDUCTION_MODES.values())}"
+            )
+        if (self.variance_reduction == SimulationConfig.VARIANCE_REDUCTION_STRATIFIED
+                and self.return_model != SimulationConfig.RETURN_MODEL_HISTORICAL):
+            raise ValueError("Stratified sampling applies to historical start years only")
+        if (self.variance_reduction == SimulationConfig.VARIANCE_REDUCTION_ANTITHETIC
+                and self.return_model not in (SimulationConfig.RETURN_MODEL_NORMAL,
+                                              SimulationConfig.RETURN_MODEL_STUDENT_T)):
+            raise ValueError("Antithetic paths require a parametric return model")
+        if self.withdrawal_strategy not in SimulationConfig.WITHDRAWAL_STRATEGIES.values():
+            raise ValueError(
+                f"Withdrawal strategy must be one of {list(SimulationConfig.WITHDRAWAL_STRATEGIES.values())}"
+            )
+        # A rate of 100% or more empties the portfolio in the first year
+        if (self.withdrawal_strategy == SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO
+                and self.annual_withdrawal >= max(self.initial_portfolio, 1.0)):
+            raise ValueError("Percent-of-portfolio withdrawals must be less than the initial portfolio")
+        if not abs(self.inflation_rate) <= SimulationConfig.MAX_INFLATION_RATE:
+            raise ValueError(f"Inflation rate must be between -{SimulationConfig.MAX_INFLATION_RATE} "
+                             f"and {SimulationConfig.MAX_INFLATION_RATE}")
+        if self.glide_path is not None:
+            if not set(self.glide_path) <= set(self.assets):
+                raise ValueError("Glide path may only allocate to the portfolio's assets")
+            if min(self.glide_path.values(), default=0.0) < 0 or not abs(sum(self.glide_path.values()) - 1.0) < 1e-6:
+                raise ValueError("Glide path allocations must be non-negative and sum to 1.0")
+        if self.kernel not in SimulationConfig.KERNELS.values():
+            raise ValueError(f"Kernel must be one of {list(SimulationConfig.KERNELS.values())}")
         # Add more validation as needed
 
 def convert_assets_to_tickers(assets: Dict[str, float]) -> Dict[str, AssetInfo]:
@@ -80,7 +229,13 @@ def convert_assets_to_tickers(assets: Dict[str, float]) -> Dict[str, AssetInfo]:
         logger.error(f"Invalid asset name: {e}")
         raise KeyError(f"Asset {e} not found in available assets")
 
-def setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_years, n_simulations, assets):
+def setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_years, n_simulations, assets,
+                            sampling=SimulationConfig.SAMPLING_RANDOM, seed=None, periods_per_year=1,
+                            return_model=SimulationConfig.RETURN_MODEL_HISTORICAL,
+                            variance_reduction=SimulationConfig.VARIANCE_REDUCTION_NONE,
+                            withdrawal_strategy=SimulationConfig.WITHDRAWAL_FIXED,
+                            inflation_rate=SimulationConfig.INFLATION_RATE, glide_path=None,
+                            kernel=SimulationConfig.DEFAULT_KERNEL):
     """
     Set up and validate simulation parameters.
     
@@ -90,6 +245,23 @@ def setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_yea
         retirement_years: Number of retirement years.
         n_simulations: Number of simulations.
         assets: Dictionary of asset allocations.
+        sampling: 'random' to draw n_simulations start years, or 'historical'
+            to evaluate every historical window exactly once.
+        seed: Master random seed; None draws fresh entropy.
+        periods_per_year: Simulation steps per year (1, 4 or 12). The annual
+            withdrawal is spread evenly over the steps.
+        return_model: How return paths are produced: contiguous historical
+            windows, a bootstrap of historical periods or a fitted parametric model.
+        variance_reduction: 'stratified' spreads random start years evenly over
+            the history; 'antithetic' pairs every parametric path with its mirror.
+        withdrawal_strategy: How the withdrawal evolves: 'fixed', 'inflation_indexed',
+            'percent_of_portfolio' or 'guardrails'. The annual withdrawal is the
+            first year's amount.
+        inflation_rate: Yearly increase of inflation-indexed and guardrail withdrawals.
+        glide_path: Allocation by asset name in the final year; weights move
+            linearly from assets to it. None keeps the allocation static.
+        kernel: 'numpy' or 'numba' for the compiled withdrawal recurrence,
+            which falls back to NumPy when numba is not installed.
     
     Returns:
         SimulationParams object with validated parameters.
@@ -101,8 +273,51 @@ def setup_simulation_params(initial_portfolio, annual_withdrawal, retirement_yea
             annual_withdrawal=annual_withdrawal,
             retirement_years=retirement_years,
             n_simulations=n_simulations,
-            assets=assets_with_tickers
+            assets=assets_with_tickers,
+            sampling=sampling,
+            seed=seed,
+            periods_per_year=periods_per_year,
+            return_model=return_model,
+            variance_reduction=variance_reduction,
+            withdrawal_strategy=withdrawal_strategy,
+            inflation_rate=inflation_rate,
+            glide_path=glide_path,
+            kernel=kernel
         )
     except (KeyError, ValueError) as e:
         logger.error(f"Error setting up simulation parameters: {e}")
         raise
+
+def params_from_dict(spec: Dict[str, Any], default_simulations: int = 1000) -> SimulationParams:
+    """
+    Build simulation parameters from a plain dictionary, e.g. a parsed JSON request or scenario row.
+
+    The spec needs initial_portfolio, annual_withdrawal, retirement_years and an
+    allocation mapping asset names to weights; n_simulations, sampling, seed,
+    periods_per_year, return_model, variance_reduction, withdrawal_strategy,
+    inflation_rate, glide_path (final-year allocation) and kernel are optional.
+
+    Raises:
+        KeyError: If a required field or an asset name is missing.
+        ValueError: If a value is invalid.
+    """
+    for field in ('allocation', 'glide_path'):
+        if spec.get(field) is not None and not isinstance(spec[field], dict):
+            raise ValueError(f"{field} must map asset names to weights")
+    return setup_simulation_params(
+        initial_portfolio=float(spec['initial_portfolio']),
+        annual_withdrawal=float(spec['annual_withdrawal']),
+        retirement_years=int(spec['retirement_years']),
+        n_simulations=int(spec.get('n_simulations', default_simulations)),
+        assets={name: float(weight) for name, weight in spec['allocation'].items()},
+        sampling=spec.get('sampling', SimulationConfig.SAMPLING_RANDOM),
+        seed=int(spec['seed']) if spec.get('seed') is not None else None,
+        periods_per_year=int(spec.get('periods_per_year', 1)),
+        return_model=spec.get('return_model', SimulationConfig.RETURN_MODEL_HISTORICAL),
+        variance_reduction=spec.get('variance_reduction', SimulationConfig.VARIANCE_REDUCTION_NONE),
+        withdrawal_strategy=spec.get('withdrawal_strategy', SimulationConfig.WITHDRAWAL_FIXED),
+        inflation_rate=float(spec.get('inflation_rate', SimulationConfig.INFLATION_RATE)),
+        glide_path={name: float(weight) for name, weight in spec['glide_path'].items()}
+        if spec.get('glide_path') else None,
+        kernel=spec.get('kernel', SimulationConfig.DEFAULT_KERNEL)
+    )
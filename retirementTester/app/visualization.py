@@ -1,57 +1,253 @@
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
+from contextlib import contextmanager
+import hashlib
+import io
+import os
+import threading
+import numpy as np
 import pandas as pd
 import streamlit as st
+from .profiling import stage
+from .result_cache import get_figure_cache, params_key
+from .summary import SimulationSummary
 from .utils import SimulationParams
 
+# matplotlib is imported by the functions that draw with it, keeping it off the app's startup path
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+class ChartConfig:
+    """Configuration for result charts."""
+    BACKEND_INTERACTIVE: str = 'interactive'
+    BACKEND_STATIC: str = 'static'
+    BACKENDS = {
+        'Interactive': BACKEND_INTERACTIVE,
+        'Static image': BACKEND_STATIC,
+    }
+    DEFAULT_BACKEND: str = os.environ.get('RETIREMENT_TESTER_CHART_BACKEND', BACKEND_INTERACTIVE)
+    MAX_POINTS: int = 200
+    DPI: int = 100
+    STYLE: str = 'seaborn-v0_8'
+
+# matplotlib styles live in the process-wide rcParams, so figures are built and saved one at a time
+_style_lock = threading.RLock()
+
+@contextmanager
+def chart_style(style: Optional[str] = ChartConfig.STYLE) -> Iterator[None]:
+    """
+    Hold the chart lock with a matplotlib style applied.
+
+    Build and save a figure inside one chart_style block: artists read
+    rcParams both when they are created and when they are drawn, and without
+    the lock concurrent session threads would see each other's style. None
+    holds the lock without changing the style.
+    """
+    import matplotlib.pyplot as plt
+
+    with _style_lock, plt.style.context(style or {}):
+        yield
+
 def visualize_results(
-    results_df: pd.DataFrame, 
-    depletion_prob: float, 
-    params: SimulationParams, 
-    best_sim: List[float], 
+    results_df: pd.DataFrame,
+    depletion_prob: float,
+    params: SimulationParams,
+    best_sim: List[float],
     worst_sim: List[float]
 ) -> None:
     """
     Generate professional visualizations of simulation results.
     """
-    plt.style.use('seaborn-v0_8')
-
-    fig, ax = plt.subplots(figsize=(12, 7))
-    
-    percentiles = results_df.quantile([0.05, 0.25, 0.5, 0.75, 0.95], axis=0).T
-    percentiles.columns = ['5th', '25th', 'Median', '75th', '95th']
-
-    usd_formatter = FuncFormatter(lambda x, _: f'${x:,.0f}')
-    
-    ax.fill_between(percentiles.index, percentiles['5th'], percentiles['95th'], alpha=0.15, color='blue', label='90% Confidence Band')
-    ax.fill_between(percentiles.index, percentiles['25th'], percentiles['75th'], alpha=0.3, color='green', label='50% Confidence Band')
-    
-    ax.plot(percentiles['Median'], color='black', linewidth=2, label='Median Path')
-    ax.plot(worst_sim, color='red', linewidth=2, linestyle=':', label='Worst Case')
-    ax.plot(best_sim, color='green', linewidth=2, linestyle=':', label='Best Case')
-    
+    with stage('percentiles'):
+        summary = SimulationSummary.from_results(results_df, depletion_prob, best_sim, worst_sim)
+    visualize_summary(summary, params, ChartConfig.BACKEND_STATIC)
+
+def visualize_summary(
+    summary: SimulationSummary,
+    params: SimulationParams,
+    backend: str = ChartConfig.DEFAULT_BACKEND
+) -> None:
+    """
+    Visualize a simulation summary from its percentile bands alone.
+
+    The static backend serves a PNG rendered once per result and parameters;
+    the interactive backend sends only the compact band arrays to the browser.
+    """
+    if backend == ChartConfig.BACKEND_STATIC:
+        st.image(projection_png(summary, params), width='stretch')
+    else:
+        with stage('render'):
+            st.vega_lite_chart(band_frame(summary), projection_spec(summary, params), width='stretch')
+
+def band_frame(summary: SimulationSummary, max_points: int = ChartConfig.MAX_POINTS) -> pd.DataFrame:
+    """
+    Per-year percentile bands with the best and worst paths, downsampled to at most max_points rows.
+
+    The final year is always kept.
+    """
+    frame = summary.percentiles.copy()
+    frame['Best Case'] = summary.best_simulation
+    frame['Worst Case'] = summary.worst_simulation
+    frame.insert(0, 'Year', np.arange(len(frame)))
+    if len(frame) > max_points:
+        rows = np.unique(np.append(np.linspace(0, len(frame) - 1, max_points).astype(int), len(frame) - 1))
+        frame = frame.iloc[rows]
+    return frame.reset_index(drop=True)
+
+def projection_title(depletion_prob: float, params: Optional[SimulationParams]) -> str:
+    """Chart title describing the scenario and its depletion risk."""
     title = "Retirement Portfolio Projection"
     if params is not None:
         title += f" ({params.retirement_years} Years)\n"
         title += f"Initial: ${params.initial_portfolio:,.0f} | "
         title += f"Withdrawal: ${params.annual_withdrawal:,.0f}/yr | "
-        
+
         if hasattr(params, 'assets'):
             asset_allocation_str = " / ".join(
-                [f"{asset_name}: {asset_info['allocation']:.0%}" 
+                [f"{asset_name}: {asset_info['allocation']:.0%}"
                 for asset_name, asset_info in params.assets.items()]
             )
             title += f"\n{asset_allocation_str}"
-    
+
     title += f"\nDepletion Risk: {depletion_prob:.1%}"
-    ax.set_title(title, pad=20)
-    
-    ax.set_xlabel("Years Into Retirement")
-    ax.set_ylabel("Portfolio Value")
-    ax.yaxis.set_major_formatter(usd_formatter)
-    ax.grid(True, alpha=0.3)
-    ax.legend()
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+    return title
+
+def projection_spec(summary: SimulationSummary, params: Optional[SimulationParams]) -> dict:
+    """Vega-Lite specification layering the bands and paths of band_frame."""
+    x = {'field': 'Year', 'type': 'quantitative', 'title': 'Years Into Retirement'}
+    usd = {'type': 'quantitative', 'axis': {'format': '$,.0f'}}
+
+    def band(lower: str, upper: str, color: str, opacity: float) -> dict:
+        return {
+            'mark': {'type': 'area', 'color': color, 'opacity': opacity},
+            'encoding': {'x': x, 'y': {'field': lower, **usd, 'title': 'Portfolio Value'}, 'y2': {'field': upper}},
+        }
+
+    def line(field: str, color: str, dashed: bool = False) -> dict:
+        mark = {'type': 'line', 'color': color, 'strokeWidth': 2}
+        if dashed:
+            mark['strokeDash'] = [2, 3]
+        return {'mark': mark, 'encoding': {'x': x, 'y': {'field': field, **usd}}}
+
+    tooltip_fields = ['Year', '5th', '25th', 'Median', '75th', '95th']
+    return {
+        'title': {'text': projection_title(summary.depletion_prob, params).split('\n')},
+        'layer': [
+            band('5th', '95th', 'blue', 0.15),
+            band('25th', '75th', 'green', 0.3),
+            line('Median', 'black'),
+            line('Worst Case', 'red', dashed=True),
+            line('Best Case', 'green', dashed=True),
+            {
+                'mark': {'type': 'rule', 'opacity': 0},
+                'encoding': {
+                    'x': x,
+                    'tooltip': [{'field': field, 'type': 'quantitative', 'format': ',.0f'} for field in tooltip_fields],
+                },
+            },
+        ],
+    }
+
+def summary_key(summary: SimulationSummary, params: Optional[SimulationParams]) -> str:
+    """Hash identifying a rendered chart: the result's bands and headline numbers plus the parameters."""
+    digest = hashlib.sha256(np.ascontiguousarray(summary.percentiles.to_numpy()).tobytes())
+    digest.update(np.concatenate([summary.best_simulation, summary.worst_simulation]).astype(np.float64).tobytes())
+    digest.update(repr(summary.depletion_prob).encode())
+    if params is not None:
+        digest.update(params_key(params, None, kind='figure').encode())
+    return digest.hexdigest()
+
+def projection_png(summary: SimulationSummary, params: Optional[SimulationParams]) -> bytes:
+    """PNG of the projection chart, rendered once and then served from the figure cache."""
+    def render() -> bytes:
+        with stage('render'), chart_style():
+            fig = plot_projection(summary.percentiles, summary.depletion_prob, params,
+                                  summary.best_simulation, summary.worst_simulation)
+            return figure_png(fig)
+
+    return get_figure_cache().get_or_compute(summary_key(summary, params), render)
+
+def figure_png(fig: 'Figure') -> bytes:
+    """Save a figure as PNG; call inside the chart_style block that built it."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=ChartConfig.DPI)
+    return buffer.getvalue()
+
+def plot_projection(
+    percentiles: pd.DataFrame,
+    depletion_prob: float,
+    params: Optional[SimulationParams],
+    best_sim: Sequence[float],
+    worst_sim: Sequence[float]
+) -> 'Figure':
+    """
+    Plot percentile bands per year with the median, best and worst paths.
+
+    The figure is not attached to pyplot, so it needs no closing. It is built
+    under chart_style; save it in the same chart_style block.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    with chart_style():
+        fig = Figure(figsize=(12, 7))
+        ax = fig.subplots()
+
+        usd_formatter = FuncFormatter(lambda x, _: f'${x:,.0f}')
+
+        ax.fill_between(percentiles.index, percentiles['5th'], percentiles['95th'], alpha=0.15, color='blue', label='90% Confidence Band')
+        ax.fill_between(percentiles.index, percentiles['25th'], percentiles['75th'], alpha=0.3, color='green', label='50% Confidence Band')
+
+        ax.plot(percentiles['Median'], color='black', linewidth=2, label='Median Path')
+        ax.plot(worst_sim, color='red', linewidth=2, linestyle=':', label='Worst Case')
+        ax.plot(best_sim, color='green', linewidth=2, linestyle=':', label='Best Case')
+
+        ax.set_title(projection_title(depletion_prob, params), pad=20)
+
+        ax.set_xlabel("Years Into Retirement")
+        ax.set_ylabel("Portfolio Value")
+        ax.yaxis.set_major_formatter(usd_formatter)
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+
+        fig.tight_layout()
+    return fig
+
+def visualize_allocation_sweep(sweep_df: pd.DataFrame, asset_names: List[str]) -> None:
+    """
+    Plot the risk/return frontier of an allocation sweep.
+    """
+    with chart_style():
+        png = figure_png(plot_allocation_sweep(sweep_df, asset_names))
+    st.image(png, width='stretch')
+
+def plot_allocation_sweep(sweep_df: pd.DataFrame, asset_names: List[str]) -> 'Figure':
+    """
+    Scatter each swept allocation by depletion risk and median final value.
+
+    Like plot_projection, the figure is not attached to pyplot and is built under chart_style.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    with chart_style():
+        fig = Figure(figsize=(12, 7))
+        ax = fig.subplots()
+
+        usd_formatter = FuncFormatter(lambda x, _: f'${x:,.0f}')
+
+        # Colour by the weight of the first asset to show how the frontier shifts
+        scatter = ax.scatter(
+            sweep_df['Depletion Risk'], sweep_df['Median'],
+            c=sweep_df[asset_names[0]], cmap='viridis', s=18, alpha=0.8
+        )
+        fig.colorbar(scatter, ax=ax, label=f"{asset_names[0]} Allocation")
+
+        ax.set_title(f"Allocation Frontier ({len(sweep_df)} Allocations)", pad=20)
+        ax.set_xlabel("Depletion Risk")
+        ax.set_ylabel("Median Final Value")
+        ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{x:.0%}'))
+        ax.yaxis.set_major_formatter(usd_formatter)
+        ax.grid(True, alpha=0.3)
+
+        fig.tight_layout()
+    return fig
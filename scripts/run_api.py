@@ -0,0 +1,38 @@
+"""
+Serve the retirement simulation HTTP API.
+
+Endpoints accept the same scenario fields as run_batch (initial_portfolio,
+annual_withdrawal, retirement_years, allocation, ...) as a JSON body:
+
+    POST /api/simulate   percentile bands per year, best/worst paths
+    POST /api/summary    depletion probability and final-year percentiles
+    POST /api/batch      {"scenarios": [...]} -> one summary record per scenario
+    GET  /api/health     data, worker pool and cache status
+
+Usage:
+    python scripts/run_api.py --port 8000 --workers 8
+
+For production, serve a single multi-threaded process with a WSGI server so
+every request shares one copy of the market data, e.g.
+    gunicorn --workers 1 --threads 32 'retirementTester.app.api:create_app()'
+"""
+import argparse
+import logging
+import os
+
+from retirementTester.app.api import ApiConfig, CoalescingExecutor, create_app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=ApiConfig.MAX_WORKERS,
+                        help='Number of simulations computed concurrently')
+    args = parser.parse_args()
+
+    app = create_app(CoalescingExecutor(max_workers=args.workers))
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO'))
+    main()
@@ -0,0 +1,215 @@
+"""
+Run many retirement scenarios in one batch and write summary metrics per scenario.
+
+Scenarios are read from a CSV, JSON or YAML file. Each scenario needs an id,
+initial_portfolio, annual_withdrawal, retirement_years and an allocation; it
+may also set n_simulations, sampling, seed, periods_per_year (1, 4 or 12),
+return_model (historical, stationary_bootstrap, block_bootstrap, normal or
+student_t), variance_reduction (none, stratified or antithetic),
+withdrawal_strategy (fixed, inflation_indexed, percent_of_portfolio or
+guardrails), inflation_rate and, in JSON or YAML files, a glide_path giving the
+final-year allocation. In CSV files the allocation is given as one column per
+asset name (e.g. "Global Stocks", "American Bonds").
+
+Market data is loaded once and memory-mapped by every worker without copying. Completed scenarios
+are checkpointed as they finish, so an interrupted run resumes where it left off.
+
+Usage:
+    python scripts/run_batch.py scenarios.csv results.parquet --workers 16
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from retirementTester.app.returns_store import attach_shared_returns, get_returns_store
+from retirementTester.app.simulation import run_retirement_simulation, run_streaming_simulation
+from retirementTester.app.utils import SimulationConfig, params_from_dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMULATIONS = 1000
+SCENARIOS_PER_TASK = 16
+PROGRESS_INTERVAL = 5.0
+
+def load_scenarios(path: str) -> List[Dict[str, Any]]:
+    """
+    Read scenarios from a CSV, JSON or YAML file.
+
+    Raises:
+        ValueError: If the file type is unsupported or a scenario has no id.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        frame = pd.read_csv(path)
+        asset_columns = [column for column in frame.columns if column in SimulationConfig.ASSET_TICKERS]
+        scenarios = []
+        for row in frame.to_dict(orient='records'):
+            allocation = {name: float(row.pop(name)) for name in asset_columns if pd.notna(row.get(name))}
+            row = {key: value for key, value in row.items() if pd.notna(value)}
+            row['allocation'] = {name: weight for name, weight in allocation.items() if weight > 0}
+            scenarios.append(row)
+    elif extension == '.json':
+        with open(path) as f:
+            scenarios = json.load(f)
+    elif extension in ('.yaml', '.yml'):
+        import yaml
+
+        with open(path) as f:
+            scenarios = yaml.safe_load(f)
+    else:
+        raise ValueError(f"Unsupported scenario file type: {extension}")
+
+    for scenario in scenarios:
+        if 'id' not in scenario:
+            raise ValueError(f"Scenario without an id: {scenario}")
+        scenario['id'] = str(scenario['id'])
+    return scenarios
+
+def time_steps(scenarios: List[Dict[str, Any]]) -> List[int]:
+    """
+    Supported periods_per_year values used by the scenarios, always including annual steps.
+
+    Invalid values are skipped here; run_scenario records those scenarios as failed.
+    """
+    steps = {1}
+    for scenario in scenarios:
+        try:
+            periods_per_year = int(scenario.get('periods_per_year', 1))
+        except (TypeError, ValueError):
+            continue
+        if periods_per_year in SimulationConfig.PERIOD_FREQUENCIES:
+            steps.add(periods_per_year)
+    return sorted(steps)
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one scenario and reduce it to a flat record of summary metrics."""
+    start = time.perf_counter()
+    record = {'id': scenario['id']}
+    try:
+        params = params_from_dict(scenario, DEFAULT_SIMULATIONS)
+        if params.n_simulations <= SimulationConfig.SIMULATION_CHUNK_SIZE:
+            # Small runs fit in one block: exact final-year percentiles are cheaper than sketches
+            results_df, depletion_prob, best_case, worst_case = run_retirement_simulation(params)
+            final_values = results_df.iloc[:, -1].to_numpy()
+            final_5th, final_median, final_95th = np.percentile(final_values, [5, 50, 95])
+            n_paths = len(final_values)
+        else:
+            summary = run_streaming_simulation(params)
+            final = summary.percentiles.iloc[-1]
+            final_5th, final_median, final_95th = final['5th'], final['Median'], final['95th']
+            depletion_prob, best_case, worst_case = summary.depletion_prob, summary.best_simulation, summary.worst_simulation
+            n_paths = summary.n_paths
+        record.update({
+            'status': 'ok',
+            'depletion_prob': depletion_prob,
+            'final_5th': float(final_5th),
+            'final_median': float(final_median),
+            'final_95th': float(final_95th),
+            'best_final': best_case[-1],
+            'worst_final': worst_case[-1],
+            'n_paths': n_paths,
+            'error': None,
+        })
+    except Exception as e:
+        record.update({'status': 'failed', 'error': str(e)})
+    record['elapsed'] = time.perf_counter() - start
+    return record
+
+def run_scenarios(scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Run a batch of scenarios in one task to amortize inter-process overhead."""
+    return [run_scenario(scenario) for scenario in scenarios]
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Completed records from an earlier, interrupted run."""
+    records = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['id']] = record
+    return {key: record for key, record in records.items() if record['status'] == 'ok'}
+
+def write_output(records: List[Dict[str, Any]], path: str) -> None:
+    """Write records as a Parquet file (requires pyarrow), or CSV for a .csv path."""
+    frame = pd.DataFrame(records)
+    if path.lower().endswith('.csv'):
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', help='CSV, JSON or YAML scenario file')
+    parser.add_argument('output', help='Output file (.parquet or .csv)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--restart', action='store_true', help='Ignore any checkpoint from an earlier run')
+    args = parser.parse_args()
+
+    checkpoint_path = f"{args.output}.checkpoint.jsonl"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    scenarios = load_scenarios(args.scenarios)
+    completed = load_checkpoint(checkpoint_path)
+    pending = [scenario for scenario in scenarios if scenario['id'] not in completed]
+    logger.info(f"{len(scenarios)} scenarios, {len(completed)} already completed, {len(pending)} to run")
+
+    # Load each time step used by the batch once, in the parent; workers map the shared segments zero-copy,
+    # in a directory private to this batch
+    shared_dir = tempfile.TemporaryDirectory(prefix='retirement-batch-')
+    manifests = {}
+    for periods_per_year in time_steps(pending):
+        store = get_returns_store(periods_per_year)
+        store.load()
+        manifests[periods_per_year] = store.share(shared_dir.name)
+
+    start = time.perf_counter()
+    last_report = start
+    failures = 0
+    with shared_dir, open(checkpoint_path, 'a') as checkpoint, ProcessPoolExecutor(
+        max_workers=args.workers, initializer=attach_shared_returns, initargs=(manifests,)
+    ) as executor:
+        futures = [
+            executor.submit(run_scenarios, pending[begin:begin + SCENARIOS_PER_TASK])
+            for begin in range(0, len(pending), SCENARIOS_PER_TASK)
+        ]
+        done = 0
+        for future in as_completed(futures):
+            for record in future.result():
+                checkpoint.write(json.dumps(record) + '\n')
+                if record['status'] == 'ok':
+                    completed[record['id']] = record
+                else:
+                    failures += 1
+                    logger.warning(f"Scenario {record['id']} failed: {record['error']}")
+            checkpoint.flush()
+            done += len(future.result())
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL or done == len(pending):
+                rate = done / (now - start)
+                logger.info(f"{done}/{len(pending)} scenarios done ({rate:.1f} scenarios/s, {failures} failed)")
+                last_report = now
+
+    records = [completed[scenario['id']] for scenario in scenarios if scenario['id'] in completed]
+    write_output(records, args.output)
+    logger.info(f"Wrote {len(records)} scenario results to {args.output}")
+
+    if failures:
+        logger.warning(f"{failures} scenarios failed; rerun the same command to retry them")
+        return 1
+    os.remove(checkpoint_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
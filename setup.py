@@ -14,11 +14,16 @@ setup(
         'numpy>=1.21.0',
         'matplotlib>=3.4.0',
         'yfinance>=0.1.63',
-        'streamlit>=0.84.0'
+        'streamlit>=1.52.0'
     ],
+    extras_require={
+        'numba': ['numba>=0.57'],
+    },
     entry_points={
         'console_scripts': [
             'run_simulation=scripts.run_simulation:main',
+            'run_batch=scripts.run_batch:main',
+            'run_api=scripts.run_api:main',
         ],
     },
 )
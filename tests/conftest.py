@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from retirementTester.app.data import MarketDataConfig
+from retirementTester.app.result_cache import get_growth_cache, get_result_cache
+from retirementTester.app.returns_store import get_returns_store
+from retirementTester.app.utils import SimulationConfig, setup_simulation_params
+
+SEED = 12345
+
+def _synthetic_returns(periods_per_year: int = 1, n_years: int = 100, seed: int = SEED) -> pd.DataFrame:
+    """Normally distributed period returns for every configured ticker."""
+    rng = np.random.default_rng(seed + periods_per_year)
+    frequency = SimulationConfig.PERIOD_FREQUENCIES[periods_per_year]
+    index = pd.date_range(end='2024-12-31', periods=n_years * periods_per_year, freq=frequency)
+    tickers = list(SimulationConfig.ASSET_TICKERS.values())
+    return pd.DataFrame(
+        rng.normal(0.06 / periods_per_year, 0.15 / np.sqrt(periods_per_year), (len(index), len(tickers))),
+        index=index, columns=tickers
+    )
+
+@pytest.fixture
+def synthetic_returns():
+    """Factory for synthetic returns: synthetic_returns(periods_per_year=1, n_years=100)."""
+    return _synthetic_returns
+
+@pytest.fixture(autouse=True)
+def offline_market_data(tmp_path, monkeypatch):
+    """
+    Synthetic returns in every store and empty result caches for each test.
+
+    The user-wide shared segment directory is redirected to a temporary one.
+    """
+    monkeypatch.setattr(MarketDataConfig, 'SHARED_RETURNS_DIR', str(tmp_path / 'shared'))
+    for periods_per_year in SimulationConfig.PERIOD_FREQUENCIES:
+        get_returns_store(periods_per_year).publish(_synthetic_returns(periods_per_year))
+    get_result_cache().clear()
+    get_growth_cache().clear()
+    yield
+    get_result_cache().clear()
+    get_growth_cache().clear()
+
+@pytest.fixture
+def params():
+    """Small 60/40 simulation with a fixed seed."""
+    names = list(SimulationConfig.ASSET_TICKERS)
+    return setup_simulation_params(1.5e6, 60000, 30, 2000, {names[0]: 0.6, names[1]: 0.4}, seed=SEED)
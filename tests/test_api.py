@@ -0,0 +1,69 @@
+import pytest
+
+from retirementTester.app.api import CoalescingExecutor, create_app
+from retirementTester.app.utils import SimulationConfig
+
+ASSETS = list(SimulationConfig.ASSET_TICKERS)
+
+def scenario(**overrides):
+    spec = {
+        'initial_portfolio': 1.5e6,
+        'annual_withdrawal': 60000,
+        'retirement_years': 30,
+        'n_simulations': 500,
+        'allocation': {ASSETS[0]: 0.6, ASSETS[1]: 0.4},
+        'seed': 12345,
+    }
+    spec.update(overrides)
+    return spec
+
+@pytest.fixture
+def client():
+    executor = CoalescingExecutor(max_workers=2)
+    yield create_app(executor).test_client()
+    executor.shutdown()
+
+def test_summary_returns_depletion_probability(client):
+    response = client.post('/api/summary', json=scenario())
+    assert response.status_code == 200
+    assert 0 <= response.get_json()['depletion_prob'] <= 1
+
+@pytest.mark.parametrize('body', [
+    scenario(retirement_years=0),
+    scenario(retirement_years=-5),
+    scenario(retirement_years=SimulationConfig.MAX_YEARS + 1),
+    scenario(annual_withdrawal=-1000000),
+    scenario(annual_withdrawal=float('nan')),
+    scenario(annual_withdrawal=float('inf')),
+    scenario(initial_portfolio=float('nan')),
+    scenario(allocation=[0.6, 0.4]),
+    scenario(allocation={'Unknown Asset': 1.0}),
+    scenario(glide_path=[0.2, 0.8]),
+    scenario(n_simulations=0),
+    {'initial_portfolio': 1.5e6},
+    [scenario()],
+])
+def test_invalid_requests_are_rejected_with_json_400(client, body):
+    response = client.post('/api/simulate', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_non_json_body_is_rejected_with_json_400(client):
+    response = client.post('/api/simulate', data='not json', content_type='text/plain')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_batch_reports_invalid_scenarios_per_record(client):
+    response = client.post('/api/batch', json={'scenarios': [
+        scenario(id='good'),
+        scenario(id='bad-years', retirement_years=0),
+        'not a scenario',
+    ]})
+    assert response.status_code == 200
+    records = {record['id']: record for record in response.get_json()['results']}
+    assert records['good']['status'] == 'ok'
+    assert records['bad-years']['status'] == 'failed'
+    assert records['2']['status'] == 'failed'
+
+def test_batch_requires_a_scenarios_list(client):
+    assert client.post('/api/batch', json={'scenarios': 'all'}).status_code == 400
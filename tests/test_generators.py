@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from retirementTester.app.generators import (
+    BlockBootstrapGenerator, MultivariateNormalGenerator, StationaryBootstrapGenerator, StudentTGenerator,
+    get_return_generator
+)
+from retirementTester.app.utils import SimulationConfig
+
+def period_numbers(n_rows):
+    """Returns whose values are their own row numbers, with a second asset offset by 1000."""
+    rows = np.arange(n_rows, dtype=np.float64)
+    return np.column_stack([rows, rows + 1000])
+
+def historical_returns(n_rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    cov = [[0.02, 0.006], [0.006, 0.004]]
+    return np.expm1(rng.multivariate_normal([0.06, 0.03], cov, size=n_rows))
+
+def test_block_bootstrap_draws_contiguous_blocks_that_wrap_around():
+    n_rows, block_length = 7, 5
+    paths = BlockBootstrapGenerator(block_length).generate(period_numbers(n_rows), 500, 23, np.random.default_rng(1))
+    rows = paths[:, :, 0].astype(int)
+
+    assert paths.shape == (500, 23, 2)
+    np.testing.assert_array_equal(paths[:, :, 1] - paths[:, :, 0], 1000)
+    steps = np.diff(rows, axis=1) % n_rows
+    within_block = (np.arange(1, 23) % block_length) != 0
+    assert np.all(steps[:, within_block] == 1)
+    # Blocks starting near the end of the history continue from its start
+    assert np.any(np.diff(rows, axis=1)[:, within_block] < 0)
+
+def test_stationary_bootstrap_blocks_have_the_mean_length():
+    n_rows, mean_block_length = 50, 4.0
+    generator = StationaryBootstrapGenerator(mean_block_length)
+    paths = generator.generate(period_numbers(n_rows), 2000, 120, np.random.default_rng(2))
+    rows = paths[:, :, 0].astype(int)
+
+    assert rows.min() >= 0 and rows.max() < n_rows
+    np.testing.assert_array_equal(paths[:, :, 1] - paths[:, :, 0], 1000)
+    # Every step either continues the block (wrapping around) or starts a new one
+    continues = np.diff(rows, axis=1) % n_rows == 1
+    new_blocks = 1 - continues.mean()
+    expected = (1 / mean_block_length) * (1 - 1 / n_rows)
+    assert new_blocks == pytest.approx(expected, rel=0.05)
+
+@pytest.mark.parametrize('generator', [BlockBootstrapGenerator(3), StationaryBootstrapGenerator(3)])
+def test_bootstrap_paths_may_be_longer_than_the_history(generator):
+    paths = generator.generate(period_numbers(5), 10, 40, np.random.default_rng(3))
+    assert paths.shape == (10, 40, 2)
+
+@pytest.mark.parametrize('generator', [MultivariateNormalGenerator(), StudentTGenerator(5.0)])
+def test_parametric_models_match_historical_mean_and_covariance(generator):
+    history = historical_returns()
+    paths = generator.generate(history, 20000, 10, np.random.default_rng(4))
+    log_paths = np.log1p(paths).reshape(-1, 2)
+    log_history = np.log1p(history)
+
+    assert paths.min() > -1
+    np.testing.assert_allclose(log_paths.mean(axis=0), log_history.mean(axis=0), atol=0.003)
+    np.testing.assert_allclose(np.cov(log_paths, rowvar=False), np.cov(log_history, rowvar=False), rtol=0.05)
+
+@pytest.mark.parametrize('generator', [MultivariateNormalGenerator(antithetic=True),
+                                       StudentTGenerator(5.0, antithetic=True)])
+def test_antithetic_paths_mirror_each_other_about_the_mean(generator):
+    history = historical_returns()
+    mean = np.log1p(history).mean(axis=0)
+    paths = generator.generate(history, 11, 10, np.random.default_rng(5))
+    shocks = np.log1p(paths) - mean
+
+    assert paths.shape == (11, 10, 2)
+    np.testing.assert_allclose(shocks[:5], -shocks[6:11], atol=1e-12)
+
+def test_generators_reject_too_short_histories():
+    with pytest.raises(ValueError):
+        BlockBootstrapGenerator(5).generate(np.empty((0, 2)), 10, 10, np.random.default_rng())
+    with pytest.raises(ValueError):
+        MultivariateNormalGenerator().generate(historical_returns(n_rows=1), 10, 10, np.random.default_rng())
+
+def test_historical_model_has_no_generator():
+    with pytest.raises(ValueError):
+        get_return_generator(SimulationConfig.RETURN_MODEL_HISTORICAL)
+
+def test_block_lengths_are_configured_in_years():
+    generator = get_return_generator(SimulationConfig.RETURN_MODEL_BLOCK_BOOTSTRAP, periods_per_year=12)
+    assert generator.block_length == SimulationConfig.BOOTSTRAP_BLOCK_YEARS * 12
@@ -0,0 +1,92 @@
+import logging
+import threading
+
+import numpy as np
+import pytest
+
+from retirementTester.app.jobs import Job, JobConfig, JobManager
+from retirementTester.app.result_cache import cached_simulation_summary
+from retirementTester.app.simulation import SimulationCancelled, run_retirement_simulation, run_streaming_simulation
+from retirementTester.app.utils import SimulationConfig
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1)
+    yield manager
+    manager._executor.shutdown(wait=True)
+
+def run_job(manager, job, compute):
+    manager.submit(job, compute)
+    job.future.result(timeout=30)
+    return job
+
+def test_progress_is_reported_every_step_without_changing_results(params):
+    reported = []
+    with_progress = run_retirement_simulation(params, progress=reported.append)[0]
+    without_progress = run_retirement_simulation(params)[0]
+    np.testing.assert_array_equal(with_progress.to_numpy(), without_progress.to_numpy())
+    assert reported[-1] == params.n_simulations
+    assert reported == sorted(reported)
+    assert SimulationConfig.PROGRESS_STEP in reported
+
+@pytest.mark.parametrize('run', [run_retirement_simulation, run_streaming_simulation])
+def test_cancelling_from_progress_stops_the_run(params, run):
+    reported = []
+
+    def cancel(completed_paths):
+        reported.append(completed_paths)
+        raise SimulationCancelled()
+
+    with pytest.raises(SimulationCancelled):
+        run(params, progress=cancel)
+    assert reported == [SimulationConfig.PROGRESS_STEP]
+
+def test_job_records_result_and_progress(manager, params):
+    job = run_job(manager, Job(params, params.n_simulations, 'test'),
+                  lambda job: cached_simulation_summary(params, 1, job.report))
+    assert job.status == Job.DONE
+    assert job.progress == 1.0
+    assert job.result.n_paths == params.n_simulations
+
+def test_cancelled_job_stops_within_a_step_and_is_not_an_error(manager, params, caplog):
+    def compute(job):
+        def report(completed_paths):
+            job.cancel()
+            job.report(completed_paths)
+        return cached_simulation_summary(params, 1, report)
+
+    with caplog.at_level(logging.INFO):
+        job = run_job(manager, Job(params, params.n_simulations, 'test'), compute)
+    assert job.status == Job.CANCELLED
+    assert job.result is None and job.error is None
+    assert job.completed_paths < params.n_simulations
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+def test_queued_job_cancelled_before_it_starts(manager, params):
+    started, release = threading.Event(), threading.Event()
+
+    def block(job):
+        started.set()
+        release.wait(10)
+
+    manager.submit(Job(params, 1, 'blocker'), block)
+    started.wait(10)
+    queued = Job(params, params.n_simulations, 'queued')
+    manager.submit(queued, lambda job: pytest.fail("cancelled job ran"))
+    assert manager.cancel(queued.id)
+    release.set()
+    assert queued.status == Job.CANCELLED
+
+def test_abandoned_job_cancels_itself(manager, params, monkeypatch):
+    monkeypatch.setattr(JobConfig, 'ABANDON_AFTER', -1.0)
+    job = run_job(manager, Job(params, params.n_simulations, 'test'),
+                  lambda job: cached_simulation_summary(params, 1, job.report))
+    assert job.status == Job.CANCELLED
+
+def test_failed_job_records_the_error(manager, params):
+    def compute(job):
+        raise ValueError("bad input")
+
+    job = run_job(manager, Job(params, 1, 'test'), compute)
+    assert job.status == Job.FAILED
+    assert job.error == "bad input"
@@ -0,0 +1,35 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from retirementTester.app.simulation import sample_portfolio_returns, simulate_portfolios
+from retirementTester.app.strategies import get_withdrawal_strategy
+from retirementTester.app.utils import SimulationConfig
+
+pytest.importorskip('numba')
+
+from retirementTester.app.kernels import check_kernel_equivalence, kernel_verified  # noqa: E402
+
+def test_compiled_kernel_matches_numpy_reference():
+    assert check_kernel_equivalence() <= SimulationConfig.KERNEL_RTOL
+    assert kernel_verified()
+
+@pytest.mark.parametrize('periods_per_year', [1, 12])
+@pytest.mark.parametrize('withdrawal_strategy', list(SimulationConfig.WITHDRAWAL_STRATEGIES.values()))
+def test_compiled_kernel_gives_the_same_paths(params, periods_per_year, withdrawal_strategy):
+    # A withdrawal near the break-even rate, so some paths deplete and some grow
+    params = replace(params, annual_withdrawal=90000, periods_per_year=periods_per_year,
+                     withdrawal_strategy=withdrawal_strategy, return_model=SimulationConfig.RETURN_MODEL_NORMAL)
+    portfolio_returns = sample_portfolio_returns(params)
+
+    def simulate(kernel):
+        return simulate_portfolios(portfolio_returns, params.initial_portfolio, params.period_withdrawal,
+                                   strategy=get_withdrawal_strategy(params), kernel=kernel)
+
+    reference, reference_depleted = simulate(SimulationConfig.KERNEL_NUMPY)
+    compiled, compiled_depleted = simulate(SimulationConfig.KERNEL_NUMBA)
+    np.testing.assert_array_equal(compiled_depleted, reference_depleted)
+    np.testing.assert_allclose(compiled, reference, rtol=SimulationConfig.KERNEL_RTOL, atol=1e-6)
+    if withdrawal_strategy != SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO:
+        assert 0 < reference_depleted.mean() < 1
@@ -0,0 +1,64 @@
+from dataclasses import replace
+
+from retirementTester.app.result_cache import (
+    ResultCache, cached_portfolio_returns, cached_simulation_summary, derived_seed, get_result_cache, params_key
+)
+from retirementTester.app.utils import SimulationConfig, setup_simulation_params
+
+def test_params_key_ignores_number_types_and_asset_order():
+    names = list(SimulationConfig.ASSET_TICKERS)
+    first = setup_simulation_params(1500000, 60000, 30, 2000, {names[0]: 0.6, names[1]: 0.4}, seed=1)
+    second = setup_simulation_params(1.5e6, 60000.0, 30, 2000, {names[1]: 0.4, names[0]: 0.6}, seed=1)
+    assert params_key(first, 'v1') == params_key(second, 'v1')
+
+def test_params_key_is_stable_across_calls(params):
+    assert params_key(params, 'v1') == params_key(replace(params), 'v1')
+
+def test_params_key_changes_with_seed_data_version_and_kind(params):
+    key = params_key(params, 'v1')
+    assert params_key(replace(params, seed=params.seed + 1), 'v1') != key
+    assert params_key(params, 'v2') != key
+    assert params_key(params, 'v1', kind='growth') != key
+
+def test_params_key_ignores_kernel(params):
+    numpy_key = params_key(replace(params, kernel=SimulationConfig.KERNEL_NUMPY), 'v1')
+    assert params_key(replace(params, kernel=SimulationConfig.KERNEL_NUMBA), 'v1') == numpy_key
+
+def test_params_key_ignores_path_count_and_seed_for_all_historical_windows(params):
+    historical = replace(params, sampling=SimulationConfig.SAMPLING_HISTORICAL)
+    key = params_key(historical, 'v1')
+    assert params_key(replace(historical, n_simulations=500, seed=None), 'v1') == key
+    assert params_key(replace(params, n_simulations=500), 'v1') != params_key(params, 'v1')
+
+def test_cached_summary_is_computed_once(params):
+    first = cached_simulation_summary(params)
+    misses = get_result_cache().stats()['misses']
+    assert cached_simulation_summary(params) is first
+    assert get_result_cache().stats()['misses'] == misses
+
+def test_cache_evicts_least_recently_used_entries():
+    cache = ResultCache(max_bytes=2500)
+    for key in 'abc':
+        cache.put(key, b'x' * 1000)
+    assert cache.get('a') is None
+    assert cache.get('c') == b'x' * 1000
+
+def test_derived_seed_is_deterministic(params):
+    unseeded = replace(params, seed=None)
+    assert derived_seed(unseeded) == derived_seed(replace(unseeded))
+    assert derived_seed(unseeded) == derived_seed(params)
+
+def test_derived_seed_depends_only_on_path_settings(params):
+    seed = derived_seed(params)
+    assert derived_seed(replace(params, annual_withdrawal=65000, initial_portfolio=2e6)) == seed
+    assert derived_seed(replace(params, withdrawal_strategy=SimulationConfig.WITHDRAWAL_GUARDRAILS)) == seed
+    assert derived_seed(replace(params, kernel=SimulationConfig.KERNEL_NUMBA)) == seed
+    assert derived_seed(replace(params, retirement_years=31)) != seed
+    assert derived_seed(replace(params, n_simulations=3000)) != seed
+    assert derived_seed(replace(params, return_model=SimulationConfig.RETURN_MODEL_NORMAL)) != seed
+
+def test_withdrawal_what_ifs_share_cached_portfolio_returns(params):
+    params = replace(params, seed=derived_seed(params))
+    other = replace(params, annual_withdrawal=65000)
+    other = replace(other, seed=derived_seed(other))
+    assert cached_portfolio_returns(other) is cached_portfolio_returns(params)
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from retirementTester.app.data import MarketDataConfig
+from retirementTester.app.returns_store import ReturnsStore, get_returns_store
+from retirementTester.app.simulation import run_retirement_simulation
+from retirementTester.app.utils import SimulationConfig
+
+def test_store_is_shared_per_time_step():
+    assert get_returns_store(1) is get_returns_store(1)
+    assert get_returns_store(12) is not get_returns_store(1)
+    assert get_returns_store(12).frequency == 'ME'
+
+def test_publish_versions_the_data(synthetic_returns):
+    store = ReturnsStore()
+    store.publish(synthetic_returns())
+    version = store.version
+    store.publish(synthetic_returns())
+    assert store.version == version
+    store.publish(synthetic_returns(seed=1))
+    assert store.version != version
+
+def test_matrix_of_adjacent_tickers_is_a_view(synthetic_returns):
+    data = synthetic_returns()
+    store = ReturnsStore()
+    store.publish(data)
+    tickers = list(data.columns[1:3])
+    matrix = store.matrix(tickers)
+    np.testing.assert_array_equal(matrix, data[tickers].to_numpy())
+    assert np.shares_memory(matrix, store._matrix)
+
+def test_matrix_keeps_longest_contiguous_complete_run(synthetic_returns):
+    data = synthetic_returns(n_years=10)
+    data.iloc[2, 0] = np.nan
+    data.iloc[0, 1] = np.nan
+    store = ReturnsStore()
+    store.publish(data)
+    tickers = list(data.columns[:2])
+    np.testing.assert_array_equal(store.matrix(tickers), data.iloc[3:, :2].to_numpy())
+
+def test_matrix_is_empty_when_no_period_is_complete(synthetic_returns):
+    data = synthetic_returns(n_years=4)
+    data.iloc[::2, 0] = np.nan
+    data.iloc[1::2, 1] = np.nan
+    store = ReturnsStore()
+    store.publish(data)
+    assert store.matrix(list(data.columns[:2])).shape == (0, 2)
+
+def test_matrix_rejects_unknown_tickers(synthetic_returns):
+    store = ReturnsStore()
+    store.publish(synthetic_returns())
+    with pytest.raises(ValueError):
+        store.matrix(['NOT-A-TICKER'])
+
+def test_attach_maps_shared_segment_read_only(tmp_path, synthetic_returns):
+    source = ReturnsStore()
+    source.publish(synthetic_returns())
+    manifest_path = source.share(str(tmp_path))
+
+    attached = ReturnsStore()
+    attached.attach(manifest_path)
+    tickers = list(source.tickers)
+    assert attached.version == source.version
+    assert attached.tickers == source.tickers
+    assert isinstance(attached._matrix, np.memmap)
+    assert not attached._matrix.flags.writeable
+    np.testing.assert_array_equal(attached.matrix(tickers), source.matrix(tickers))
+    pd.testing.assert_index_equal(attached.index, source.index)
+
+def test_manifest_records_source_and_date_range(tmp_path, synthetic_returns):
+    store = ReturnsStore()
+    data = synthetic_returns()
+    store.publish(data)
+    with open(store.share(str(tmp_path))) as f:
+        manifest = json.load(f)
+    assert manifest['source'] == ReturnsStore.SOURCE_PUBLISHED
+    assert manifest['frequency'] == 'YE'
+    assert manifest['requested_start'] == MarketDataConfig.DEFAULT_START_DATE
+    assert manifest['start'] == data.index[0].isoformat()
+    assert manifest['end'] == data.index[-1].isoformat()
+
+def test_sharing_a_new_version_prunes_the_old_segment(tmp_path, synthetic_returns):
+    store = ReturnsStore()
+    store.publish(synthetic_returns())
+    store.share(str(tmp_path))
+    store.publish(synthetic_returns(seed=1))
+    store.share(str(tmp_path))
+    segments = [name for name in os.listdir(tmp_path) if name.endswith('.npy')]
+    assert segments == [f"returns-YE-{store.version}.npy"]
+
+@pytest.mark.parametrize('source, attaches', [
+    (ReturnsStore.SOURCE_FETCHED, True),
+    (ReturnsStore.SOURCE_PUBLISHED, False),
+])
+def test_only_fetched_data_stands_in_for_a_fetch(synthetic_returns, source, attaches):
+    data = synthetic_returns()
+    writer = ReturnsStore()
+    writer.publish(data, source=source)
+    writer.share(MarketDataConfig.SHARED_RETURNS_DIR)
+
+    reader = ReturnsStore()
+    assert reader._attach_fresh(list(data.columns)) is attaches
+    assert reader.is_loaded is attaches
+
+def test_shared_segment_for_another_time_step_is_ignored(synthetic_returns):
+    writer = ReturnsStore('YE')
+    writer.publish(synthetic_returns(), source=ReturnsStore.SOURCE_FETCHED)
+    manifest_path = writer.share(MarketDataConfig.SHARED_RETURNS_DIR)
+    os.replace(manifest_path, ReturnsStore('ME').manifest_path())
+    assert not ReturnsStore('ME')._attach_fresh(list(writer.tickers))
+
+def test_parallel_runs_share_through_a_private_directory(params, tmp_path, monkeypatch):
+    monkeypatch.setattr(MarketDataConfig, 'SHARE_RETURNS', True)
+    temp_root = tmp_path / 'tmp'
+    temp_root.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(temp_root))
+    params = replace(params, n_simulations=SimulationConfig.SIMULATION_CHUNK_SIZE + 500)
+    parallel = run_retirement_simulation(params, n_workers=2)[0]
+    serial = run_retirement_simulation(params)[0]
+    np.testing.assert_array_equal(parallel.to_numpy(), serial.to_numpy())
+    # Published test data never reaches the user-wide directory, and the private one is removed
+    assert not os.path.exists(MarketDataConfig.SHARED_RETURNS_DIR)
+    assert not os.listdir(temp_root)
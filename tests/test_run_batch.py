@@ -0,0 +1,91 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+from scripts import run_batch
+
+def write_json(path, scenarios):
+    path.write_text(json.dumps(scenarios))
+    return str(path)
+
+def scenario(scenario_id, **overrides):
+    spec = {'id': scenario_id, 'initial_portfolio': 1.5e6, 'annual_withdrawal': 60000, 'retirement_years': 30,
+            'n_simulations': 200, 'seed': 1, 'allocation': {'Global Stocks': 0.6, 'American Bonds': 0.4}}
+    spec.update(overrides)
+    return spec
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['run_batch.py', *map(str, args), '--workers', '1'])
+    return run_batch.main()
+
+def test_csv_allocation_columns_become_the_allocation(tmp_path):
+    path = tmp_path / 'scenarios.csv'
+    path.write_text("id,initial_portfolio,annual_withdrawal,retirement_years,seed,Global Stocks,American Bonds\n"
+                    "1,1500000,60000,30,,0.6,0.4\n"
+                    "2,1000000,40000,25,7,1.0,0\n")
+    first, second = run_batch.load_scenarios(str(path))
+    assert first['id'] == '1' and second['id'] == '2'
+    assert first['allocation'] == {'Global Stocks': 0.6, 'American Bonds': 0.4}
+    assert second['allocation'] == {'Global Stocks': 1.0}
+    assert 'seed' not in first and second['seed'] == 7
+    assert 'Global Stocks' not in first
+
+def test_scenarios_need_an_id_and_a_supported_file_type(tmp_path):
+    with pytest.raises(ValueError):
+        run_batch.load_scenarios(write_json(tmp_path / 'scenarios.json', [{'initial_portfolio': 1e6}]))
+    with pytest.raises(ValueError):
+        run_batch.load_scenarios(str(tmp_path / 'scenarios.txt'))
+
+def test_time_steps_skip_invalid_values():
+    scenarios = [{'periods_per_year': 12}, {'periods_per_year': 2}, {'periods_per_year': 'abc'}, {}]
+    assert run_batch.time_steps(scenarios) == [1, 12]
+
+def test_checkpoint_keeps_the_latest_successful_record(tmp_path):
+    path = tmp_path / 'results.csv.checkpoint.jsonl'
+    path.write_text('\n'.join(json.dumps(record) for record in [
+        {'id': 'a', 'status': 'failed'},
+        {'id': 'a', 'status': 'ok', 'depletion_prob': 0.1},
+        {'id': 'b', 'status': 'failed'},
+    ]) + '\n')
+    assert run_batch.load_checkpoint(str(path)) == {'a': {'id': 'a', 'status': 'ok', 'depletion_prob': 0.1}}
+
+def test_write_output_as_csv(tmp_path):
+    records = [{'id': 'a', 'status': 'ok', 'depletion_prob': 0.1}]
+    path = tmp_path / 'results.csv'
+    run_batch.write_output(records, str(path))
+    pd.testing.assert_frame_equal(pd.read_csv(path, dtype={'id': str}), pd.DataFrame(records))
+
+def test_write_output_as_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    records = [{'id': 'a', 'status': 'ok', 'depletion_prob': 0.1}]
+    path = tmp_path / 'results.parquet'
+    run_batch.write_output(records, str(path))
+    pd.testing.assert_frame_equal(pd.read_parquet(path), pd.DataFrame(records))
+
+def test_invalid_time_step_fails_only_its_scenario(tmp_path, monkeypatch):
+    scenarios = write_json(tmp_path / 'scenarios.json', [
+        scenario('good'), scenario('two', periods_per_year=2), scenario('text', periods_per_year='abc'),
+    ])
+    output = tmp_path / 'results.csv'
+    assert run_main(monkeypatch, scenarios, output) == 1
+
+    assert list(pd.read_csv(output)['id']) == ['good']
+    with open(f"{output}.checkpoint.jsonl") as f:
+        records = {record['id']: record for record in map(json.loads, f)}
+    assert records['good']['status'] == 'ok'
+    assert records['two']['status'] == 'failed' and records['text']['status'] == 'failed'
+
+def test_resumed_run_skips_completed_scenarios(tmp_path, monkeypatch):
+    scenarios = write_json(tmp_path / 'scenarios.json', [scenario('done'), scenario('new')])
+    output = tmp_path / 'results.csv'
+    checkpoint = {'id': 'done', 'status': 'ok', 'depletion_prob': 0.5}
+    (tmp_path / 'results.csv.checkpoint.jsonl').write_text(json.dumps(checkpoint) + '\n')
+
+    assert run_main(monkeypatch, scenarios, output) == 0
+    results = pd.read_csv(output).set_index('id')
+    assert list(results.index) == ['done', 'new']
+    assert results.loc['done', 'depletion_prob'] == 0.5
+    assert results.loc['new', 'status'] == 'ok'
+    assert not (tmp_path / 'results.csv.checkpoint.jsonl').exists()
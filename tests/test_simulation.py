@@ -0,0 +1,85 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from retirementTester.app.simulation import (
+    find_max_withdrawal, run_adaptive_simulation, run_retirement_simulation, run_streaming_simulation, sample_start_indices
+)
+from retirementTester.app.summary import PERCENTILE_LABELS, SimulationSummary
+from retirementTester.app.utils import SimulationConfig
+
+def test_same_seed_gives_identical_paths(params):
+    first, depletion, _, _ = run_retirement_simulation(params)
+    second, second_depletion, _, _ = run_retirement_simulation(params)
+    np.testing.assert_array_equal(first.to_numpy(), second.to_numpy())
+    assert depletion == second_depletion
+
+def test_different_seeds_give_different_paths(params):
+    first = run_retirement_simulation(params)[0]
+    second = run_retirement_simulation(replace(params, seed=params.seed + 1))[0]
+    assert not np.array_equal(first.to_numpy(), second.to_numpy())
+
+@pytest.mark.parametrize('return_model', [SimulationConfig.RETURN_MODEL_HISTORICAL,
+                                          SimulationConfig.RETURN_MODEL_STATIONARY_BOOTSTRAP])
+def test_results_do_not_depend_on_worker_count(params, return_model):
+    # More than one block, so the parallel run really splits the work
+    params = replace(params, n_simulations=SimulationConfig.SIMULATION_CHUNK_SIZE + 500, return_model=return_model)
+    serial = run_retirement_simulation(params, n_workers=1)[0]
+    parallel = run_retirement_simulation(params, n_workers=2)[0]
+    np.testing.assert_array_equal(serial.to_numpy(), parallel.to_numpy())
+
+def test_start_indices_are_drawn_per_block():
+    # The first block is the same whatever the total, since every block has its own child seed
+    size = SimulationConfig.SIMULATION_CHUNK_SIZE
+    short = sample_start_indices(50, size, seed=7)
+    long = sample_start_indices(50, 2 * size, seed=7)
+    np.testing.assert_array_equal(long[:size], short)
+    assert long.min() >= 0 and long.max() < 50
+
+def test_streaming_percentiles_match_exact_percentiles(params):
+    params = replace(params, n_simulations=SimulationConfig.SIMULATION_CHUNK_SIZE + 500)
+    exact = SimulationSummary.from_results(*run_retirement_simulation(params))
+    streamed = run_streaming_simulation(params)
+
+    assert streamed.n_paths == exact.n_paths
+    assert streamed.depletion_prob == pytest.approx(exact.depletion_prob)
+    assert streamed.best_simulation == pytest.approx(exact.best_simulation)
+    assert streamed.worst_simulation == pytest.approx(exact.worst_simulation)
+    for label in PERCENTILE_LABELS:
+        np.testing.assert_allclose(streamed.percentiles[label], exact.percentiles[label], rtol=0.01, atol=1.0)
+
+def test_streaming_results_do_not_depend_on_worker_count(params):
+    params = replace(params, n_simulations=SimulationConfig.SIMULATION_CHUNK_SIZE + 500)
+    serial = run_streaming_simulation(params, n_workers=1)
+    parallel = run_streaming_simulation(params, n_workers=2)
+    assert parallel.depletion_prob == serial.depletion_prob
+    assert parallel.percentiles.equals(serial.percentiles)
+
+def test_adaptive_run_stops_once_precise_enough(params):
+    params = replace(params, return_model=SimulationConfig.RETURN_MODEL_NORMAL)
+    summary = run_adaptive_simulation(params, tolerance=0.02)
+    assert summary.converged
+    assert summary.depletion_half_width <= 0.02
+    assert summary.n_paths % SimulationConfig.ADAPTIVE_BATCH_SIZE == 0
+
+def test_max_withdrawal_meets_target_and_is_tight(params):
+    withdrawal = find_max_withdrawal(params, 0.05)
+    assert 0 < withdrawal < params.initial_portfolio
+    assert run_retirement_simulation(replace(params, annual_withdrawal=withdrawal))[1] <= 0.05
+    slightly_more = replace(params, annual_withdrawal=withdrawal + 10 * SimulationConfig.WITHDRAWAL_TOLERANCE)
+    assert run_retirement_simulation(slightly_more)[1] > 0.05
+
+def test_max_withdrawal_is_capped_at_the_accepted_range(params):
+    params = replace(params, initial_portfolio=SimulationConfig.MAX_PORTFOLIO)
+    assert find_max_withdrawal(params, 0.05) == SimulationConfig.MAX_WITHDRAWAL
+
+def test_max_withdrawal_rejects_strategies_that_never_deplete(params):
+    params = replace(params, withdrawal_strategy=SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO)
+    with pytest.raises(ValueError):
+        find_max_withdrawal(params, 0.05)
+
+@pytest.mark.parametrize('target', [-0.1, 1.1])
+def test_max_withdrawal_rejects_targets_outside_zero_to_one(params, target):
+    with pytest.raises(ValueError):
+        find_max_withdrawal(params, target)
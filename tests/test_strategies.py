@@ -0,0 +1,59 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from retirementTester.app.simulation import run_retirement_simulation
+from retirementTester.app.strategies import (
+    GuardrailWithdrawal, InflationIndexedWithdrawal, PercentOfPortfolioWithdrawal, allocation_schedule
+)
+from retirementTester.app.utils import SimulationConfig
+
+def test_inflation_indexed_withdrawal_rises_once_a_year():
+    strategy = InflationIndexedWithdrawal(1e6, 40000, periods_per_year=12, inflation_rate=0.03)
+    portfolio = np.full(3, 1e6)
+    assert strategy.withdrawal(0, portfolio) == pytest.approx(40000 / 12)
+    assert strategy.withdrawal(11, portfolio) == pytest.approx(40000 / 12)
+    assert strategy.withdrawal(12, portfolio) == pytest.approx(40000 * 1.03 / 12)
+    assert strategy.withdrawal(24, portfolio) == pytest.approx(40000 * 1.03 ** 2 / 12)
+
+def test_percent_of_portfolio_amount_is_fixed_for_the_year():
+    strategy = PercentOfPortfolioWithdrawal(1e6, 40000, periods_per_year=4)
+    np.testing.assert_allclose(strategy.withdrawal(0, np.array([1e6, 2e6])), [10000, 20000])
+    # Later quarters keep the amount set at the start of the year
+    np.testing.assert_allclose(strategy.withdrawal(3, np.array([5e5, 5e5])), [10000, 20000])
+    np.testing.assert_allclose(strategy.withdrawal(4, np.array([5e5, 5e5])), [5000, 5000])
+
+def test_guardrails_adjust_only_outside_the_band():
+    strategy = GuardrailWithdrawal(1e6, 40000, inflation_rate=0.0, band=0.2, adjustment=0.1)
+    strategy.withdrawal(0, np.full(5, 1e6))
+    # Withdrawal rates just outside, just inside and at the initial 4% rate; the band is 3.2% to 4.8%
+    rates = np.array([0.0481, 0.0479, 0.04, 0.0321, 0.0319])
+    np.testing.assert_allclose(strategy.withdrawal(1, 40000 / rates), [36000, 40000, 40000, 40000, 44000])
+
+def test_guardrail_withdrawal_grows_with_inflation_inside_the_band():
+    strategy = GuardrailWithdrawal(1e6, 40000, periods_per_year=12, inflation_rate=0.03)
+    strategy.withdrawal(0, np.full(2, 1e6))
+    np.testing.assert_allclose(strategy.withdrawal(12, np.full(2, 1e6)), 40000 * 1.03 / 12)
+
+def test_glide_path_runs_from_start_to_target_allocation(params):
+    names = list(params.assets)
+    monthly = replace(params, periods_per_year=12, glide_path={names[0]: 0.2, names[1]: 0.8})
+    schedule = allocation_schedule(monthly)
+    assert schedule.shape == (monthly.n_periods, 2)
+    np.testing.assert_allclose(schedule[:12], [[0.6, 0.4]] * 12)
+    np.testing.assert_allclose(schedule[-12:], [[0.2, 0.8]] * 12)
+    np.testing.assert_allclose(schedule.sum(axis=1), 1.0)
+    assert np.all(np.diff(schedule[:, 0]) <= 0)
+
+def test_percent_of_portfolio_never_depletes(params):
+    params = replace(params, annual_withdrawal=300000,
+                     withdrawal_strategy=SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO)
+    _, depletion_prob, _, _ = run_retirement_simulation(params)
+    assert depletion_prob == 0
+
+@pytest.mark.parametrize('annual_withdrawal', [1.5e6, 2e6])
+def test_percent_of_portfolio_rate_must_be_below_one(params, annual_withdrawal):
+    with pytest.raises(ValueError):
+        replace(params, annual_withdrawal=annual_withdrawal,
+                withdrawal_strategy=SimulationConfig.WITHDRAWAL_PERCENT_OF_PORTFOLIO)
@@ -0,0 +1,37 @@
+import pytest
+
+from retirementTester.app.utils import SimulationConfig, params_from_dict, setup_simulation_params
+
+ASSETS = {'Global Stocks': 0.6, 'American Bonds': 0.4}
+
+@pytest.mark.parametrize('years', [0, -5, SimulationConfig.MAX_YEARS + 1])
+def test_retirement_years_are_range_checked(years):
+    with pytest.raises(ValueError):
+        setup_simulation_params(1.5e6, 60000, years, 1000, ASSETS)
+
+@pytest.mark.parametrize('withdrawal', [-1000, SimulationConfig.MAX_WITHDRAWAL * 2, float('nan'), float('inf')])
+def test_annual_withdrawal_is_range_checked(withdrawal):
+    with pytest.raises(ValueError):
+        setup_simulation_params(1.5e6, withdrawal, 30, 1000, ASSETS)
+
+def test_allocation_must_sum_to_one():
+    with pytest.raises(ValueError):
+        setup_simulation_params(1.5e6, 60000, 30, 1000, {'Global Stocks': 0.6, 'American Bonds': 0.6})
+
+def test_unknown_asset_is_rejected():
+    with pytest.raises(KeyError):
+        setup_simulation_params(1.5e6, 60000, 30, 1000, {'Unknown Asset': 1.0})
+
+@pytest.mark.parametrize('field', ['allocation', 'glide_path'])
+def test_params_from_dict_requires_weight_mappings(field):
+    spec = {'initial_portfolio': 1.5e6, 'annual_withdrawal': 60000, 'retirement_years': 30, 'allocation': ASSETS}
+    spec[field] = [0.6, 0.4]
+    with pytest.raises(ValueError):
+        params_from_dict(spec)
+
+def test_params_from_dict_converts_numbers():
+    params = params_from_dict({'initial_portfolio': '1500000', 'annual_withdrawal': 60000,
+                               'retirement_years': '30', 'allocation': ASSETS, 'seed': '7'})
+    assert params.retirement_years == 30
+    assert params.seed == 7
+    assert params.n_simulations == 1000
@@ -0,0 +1,50 @@
+import threading
+
+import matplotlib
+import pandas as pd
+
+from retirementTester.app.components.asset_selector import allocation_pie_png
+from retirementTester.app.simulation import run_streaming_simulation
+from retirementTester.app.visualization import chart_style, figure_png, plot_allocation_sweep, projection_png
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def test_charts_render_without_pyplot_or_global_style_changes(params):
+    import matplotlib.pyplot as plt
+
+    rc_before = dict(matplotlib.rcParams)
+    summary = run_streaming_simulation(params)
+    sweep = pd.DataFrame({'Depletion Risk': [0.1, 0.2], 'Median': [1e6, 2e6], 'Global Stocks': [0.4, 0.8]})
+    with chart_style():
+        assert figure_png(plot_allocation_sweep(sweep, ['Global Stocks'])).startswith(PNG_SIGNATURE)
+    assert projection_png(summary, params).startswith(PNG_SIGNATURE)
+    assert allocation_pie_png((('Global Stocks', 0.6), ('American Bonds', 0.4))).startswith(PNG_SIGNATURE)
+    assert plt.get_fignums() == []
+    assert dict(matplotlib.rcParams) == rc_before
+
+def test_chart_style_keeps_concurrent_renders_apart():
+    default_facecolor = matplotlib.rcParams['axes.facecolor']
+    styled, release = threading.Event(), threading.Event()
+    seen = []
+
+    def styled_render():
+        with chart_style():
+            styled.set()
+            release.wait(10)
+
+    def plain_render():
+        with chart_style(None):
+            seen.append(matplotlib.rcParams['axes.facecolor'])
+
+    first = threading.Thread(target=styled_render)
+    first.start()
+    styled.wait(10)
+    assert matplotlib.rcParams['axes.facecolor'] != default_facecolor
+    second = threading.Thread(target=plain_render)
+    second.start()
+    second.join(0.2)
+    assert seen == []
+    release.set()
+    first.join(10)
+    second.join(10)
+    assert seen == [default_facecolor]